@@ -0,0 +1,153 @@
+"""Overdue alerts for entities that stay departed longer than allowed.
+
+OverdueScheduler keeps one deadline per departed entity, its departure
+time plus the allowance for its type (OVERDUE_HOURS), in a min-heap.
+track() is called on every status change and costs O(log n). due() pops
+only the deadlines that have passed, so a check while the earliest
+deadline is still ahead costs O(1), and the UI sleeps until
+next_deadline() rather than scanning the cards on a clock.
+
+A status change does not search the heap for the entity's old deadline:
+the old entry stays and is skipped when it reaches the top (lazy
+deletion). The heap is rebuilt from the live entries when the stale ones
+outnumber them, so it never grows beyond a constant factor.
+
+The module is Tk-free; AccountingTab drives it and highlights the cards.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Iterable, NamedTuple
+
+from config import OVERDUE_HOURS
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Stale entries tolerated before the heap is rebuilt, besides 1 per live one.
+_COMPACT_SLACK = 64
+
+Key = tuple[str, int]  # (entity_type, entity_id)
+
+
+class Alert(NamedTuple):
+    entity_type: str
+    entity_id: int
+    entity_name: str
+    departed: datetime
+    deadline: datetime
+
+
+class OverdueScheduler:
+    """Deadlines of departed entities, per-type allowances in hours.
+
+    A type with no allowance, or one of 0, is never overdue.
+    """
+
+    def __init__(self, hours: dict[str, float] = OVERDUE_HOURS):
+        self._limits = {t: timedelta(hours=h) for t, h in hours.items() if h > 0}
+        self._heap: list[tuple[datetime, int, Key]] = []
+        self._pending: dict[Key, tuple[int, Alert]] = {}  # deadline not reached
+        self._overdue: dict[Key, Alert] = {}
+        self._seq = count()
+
+    # Queries
+
+    def __len__(self) -> int:
+        """Entities being watched, overdue or not."""
+        return len(self._pending) + len(self._overdue)
+
+    def overdue(self) -> list[Alert]:
+        """The entities past their deadline, longest overdue first."""
+        return sorted(self._overdue.values(), key=lambda a: a.deadline)
+
+    def overdue_ids(self, entity_type: str) -> set[int]:
+        return {eid for t, eid in self._overdue if t == entity_type}
+
+    def next_deadline(self) -> datetime | None:
+        """The earliest deadline not yet passed to due(), if any."""
+        heap = self._heap
+        while heap and not self._live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    # Updates
+
+    def track(
+        self,
+        entity_type: str,
+        entity_id: int,
+        name: str,
+        status: str,
+        ts: str | None,
+    ) -> bool:
+        """Record an entity's status and its last change ts ('YYYY-MM-DD
+        HH:MM:SS'); use status 'deleted' for a deleted one.
+
+        Returns True if the entity was overdue and no longer is.
+        """
+        key = (entity_type, entity_id)
+        limit = self._limits.get(entity_type)
+        departed = None
+        if status == "departed" and limit is not None and ts:
+            departed = datetime.strptime(ts, _TS_FORMAT)
+        current = self._overdue.get(key) or self._pending.get(key, (0, None))[1]
+        if current is not None and current.departed == departed:
+            return False  # the same departure as before
+
+        self._pending.pop(key, None)
+        cleared = self._overdue.pop(key, None) is not None
+        if departed is not None:
+            alert = Alert(entity_type, entity_id, name, departed, departed + limit)
+            seq = next(self._seq)
+            self._pending[key] = (seq, alert)
+            heapq.heappush(self._heap, (alert.deadline, seq, key))
+            self._compact()
+        return cleared
+
+    def load(self, entity_type: str, rows: Iterable[tuple]) -> set[int]:
+        """Track every entity of a type from (id, name, status, last change
+        ts, version) rows, forgetting those of the type not among them.
+
+        Returns the ids that were overdue and no longer are.
+        """
+        cleared = set()
+        seen = set()
+        for eid, name, status, ts, _version in rows:
+            seen.add(eid)
+            if self.track(entity_type, eid, name, status, ts):
+                cleared.add(eid)
+        gone = [
+            key
+            for key in (*self._pending, *self._overdue)
+            if key[0] == entity_type and key[1] not in seen
+        ]
+        for key in gone:
+            if self.track(*key, "", "deleted", None):
+                cleared.add(key[1])
+        return cleared
+
+    def due(self, now: datetime) -> list[Alert]:
+        """Move the entries whose deadline is at or before now to the
+        overdue set and return them, earliest first."""
+        fired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if self._live(entry):
+                _seq, alert = self._pending.pop(entry[2])
+                self._overdue[entry[2]] = alert
+                fired.append(alert)
+        return fired
+
+    def _live(self, entry: tuple[datetime, int, Key]) -> bool:
+        pending = self._pending.get(entry[2])
+        return pending is not None and pending[0] == entry[1]
+
+    def _compact(self) -> None:
+        if len(self._heap) > 2 * len(self._pending) + _COMPACT_SLACK:
+            self._heap = [
+                (alert.deadline, seq, key)
+                for key, (seq, alert) in self._pending.items()
+            ]
+            heapq.heapify(self._heap)
@@ -0,0 +1,241 @@
+"""Vectorized analytics over the event log.
+
+load_events() reads `events` in one pass into NumPy column arrays; the
+functions below work on those arrays without a Python loop per event:
+
+* dwell_times()      — length of every completed stay on site;
+* occupancy()        — entities on site over time, per bucket;
+* longest_absences() — the N longest departed → arrived gaps;
+* hourly_heatmap()   — events per weekday × hour of day.
+
+Times are epoch seconds of the stored local timestamps read as UTC (see
+Database.iter_event_codes()), so a day is always 86 400 seconds and hours
+and weekdays come out as they were recorded.
+
+NumPy is optional: the app and its PyInstaller build do not need it. This
+module imports without it, and load_events() raises ImportError then
+(pip install numpy).
+
+A stay starts at the first 'arrived' after a departure and ends at the
+next 'departed' or 'deleted' event; repeated arrivals or departures
+change nothing. Before its first event in the loaded range, an entity's
+whereabouts are unknown: a first 'departed' means it was on site from the
+start, a first 'arrived' that it was away.
+"""
+
+from datetime import datetime
+from itertools import chain
+from typing import TYPE_CHECKING, NamedTuple
+
+from database import ENTITY_TYPES, EVENT_TYPES, Database
+
+if TYPE_CHECKING:
+    from eventcache import EventCache
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+AVAILABLE = np is not None
+
+_ARRIVED = EVENT_TYPES.index("arrived")
+_DEPARTED = EVENT_TYPES.index("departed")
+_DELETED = EVENT_TYPES.index("deleted")
+
+_DAY = 86400
+
+
+class EventColumns(NamedTuple):
+    """The event log as parallel arrays, ordered by entity, then time."""
+
+    id: "np.ndarray"  # int64 events.id
+    ts: "np.ndarray"  # int64 epoch seconds
+    entity_type: "np.ndarray"  # int8 position in ENTITY_TYPES
+    entity_id: "np.ndarray"  # int64
+    event: "np.ndarray"  # int8 position in EVENT_TYPES
+
+
+class Occupancy(NamedTuple):
+    """Entities on site per bucket of occupancy()."""
+
+    start: "np.ndarray"  # int64 epoch seconds of each bucket start
+    level: "np.ndarray"  # int64 entities on site just before the bucket
+    peak: "np.ndarray"  # int64 most entities on site at once in the bucket
+
+
+class Absence(NamedTuple):
+    entity_type: str
+    entity_id: int
+    departed: int  # epoch seconds
+    returned: int | None  # None if still away
+    seconds: int
+
+
+def epoch(dt: datetime) -> int:
+    """Epoch seconds of a local datetime on the scale load_events() uses."""
+    return int((dt - datetime(1970, 1, 1)).total_seconds())
+
+
+def load_events(
+    db: Database,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cache: "EventCache | None" = None,
+) -> EventColumns:
+    """Read events with start <= ts < end (all by default) into columns.
+
+    With an eventcache.EventCache the cache is refreshed and the columns
+    are taken from its memory-mapped files instead of SQLite.
+
+    Raises:
+        ImportError:   If NumPy is not installed.
+        DatabaseError: On any SQLite error.
+    """
+    if np is None:
+        raise ImportError("analytics needs NumPy: pip install numpy")
+    if cache is not None:
+        c = cache.columns()
+        ids, ts, etype, eid, event = c.id, c.ts, c.entity_type, c.entity_id, c.event
+        if start is not None or end is not None:
+            inside = np.ones(len(ts), dtype=bool)
+            if start is not None:
+                inside &= ts >= epoch(start)
+            if end is not None:
+                inside &= ts < epoch(end)
+            ids, ts, etype, eid, event = (
+                a[inside] for a in (ids, ts, etype, eid, event)
+            )
+    else:
+        flat = np.fromiter(
+            chain.from_iterable(db.iter_event_codes(start, end)), dtype=np.int64
+        )
+        ids, ts, etype, eid, event = flat.reshape(-1, 5).T
+    # Per entity, in time order; the id breaks ties within one second.
+    order = np.lexsort((ids, ts, eid, etype))
+    return EventColumns(
+        ids[order].astype(np.int64),
+        ts[order].astype(np.int64),
+        etype[order].astype(np.int8),
+        eid[order].astype(np.int64),
+        event[order].astype(np.int8),
+    )
+
+
+def _transitions(cols: EventColumns) -> tuple["np.ndarray", ...]:
+    """Return (key, ts, on_site, first) for the events that change presence.
+
+    key identifies the entity, on_site is True for arrivals and False for
+    departures; repeats of the previous state are dropped, so arrivals and
+    departures alternate per entity. first marks each entity's first one.
+    """
+    moves = np.isin(cols.event, (_ARRIVED, _DEPARTED, _DELETED))
+    key = cols.entity_id[moves] * len(ENTITY_TYPES) + cols.entity_type[moves]
+    ts = cols.ts[moves]
+    on_site = cols.event[moves] == _ARRIVED
+
+    new_key = np.ones(len(key), dtype=bool)
+    new_key[1:] = key[1:] != key[:-1]
+    changed = new_key.copy()
+    changed[1:] |= on_site[1:] != on_site[:-1]
+    return key[changed], ts[changed], on_site[changed], new_key[changed]
+
+
+def _pairs(
+    key: "np.ndarray", on_site: "np.ndarray", opening: bool
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """Indices (i, i + 1) of consecutive transitions of one entity that go
+    from on_site == opening to the other state."""
+    i = np.flatnonzero(
+        (on_site[:-1] == opening) & (on_site[1:] != opening) & (key[:-1] == key[1:])
+    )
+    return i, i + 1
+
+
+def dwell_times(cols: EventColumns) -> "np.ndarray":
+    """Seconds of every completed stay, int64, ordered by entity and time."""
+    key, ts, on_site, _first = _transitions(cols)
+    start, stop = _pairs(key, on_site, True)
+    return ts[stop] - ts[start]
+
+
+def occupancy(cols: EventColumns, start: int, end: int, step: int) -> Occupancy:
+    """Entities on site in buckets of `step` seconds from start to end.
+
+    Entities whose first loaded event is a departure count as on site
+    from the beginning.
+    """
+    key, ts, on_site, first = _transitions(cols)
+    baseline = int(np.count_nonzero(first & ~on_site))
+    delta = np.where(on_site, 1, -1)
+
+    order = np.argsort(ts, kind="stable")
+    ts, delta = ts[order], delta[order]
+    level_after = baseline + np.cumsum(delta)
+
+    bounds = np.arange(start, end, step, dtype=np.int64)
+    before = np.searchsorted(ts, bounds, side="left")
+    level = np.where(before > 0, level_after[before - 1], baseline)
+
+    peak = level.copy()
+    inside = (ts >= start) & (ts < start + len(bounds) * step)
+    bucket = (ts[inside] - start) // step
+    if len(bucket):
+        # ts is sorted, so each bucket's changes are one contiguous run.
+        runs = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        highest = np.maximum.reduceat(level_after[inside], runs)
+        peak[bucket[runs]] = np.maximum(peak[bucket[runs]], highest)
+    return Occupancy(bounds, level, peak)
+
+
+def longest_absences(
+    cols: EventColumns, n: int = 10, until: int | None = None
+) -> list[Absence]:
+    """The n longest absences, longest first.
+
+    An absence runs from a 'departed' event to the entity's next arrival.
+    With `until` (epoch seconds) absences that have not ended yet count up
+    to that moment; without it they are left out. Deleted entities are not
+    absent.
+    """
+    key, ts, on_site, _first = _transitions(cols)
+    # 'deleted' also ends a stay, but the entity is gone rather than away.
+    gone = cols.event == _DELETED
+    deleted = cols.entity_id[gone] * len(ENTITY_TYPES) + cols.entity_type[gone]
+
+    left, right = _pairs(key, on_site, False)
+    starts, ends = ts[left], ts[right]
+    keys = key[left]
+    if until is not None:
+        last = np.ones(len(key), dtype=bool)
+        last[:-1] = key[:-1] != key[1:]
+        away = np.flatnonzero(last & ~on_site)
+        away = away[~np.isin(key[away], deleted)]
+        keys = np.concatenate((keys, key[away]))
+        starts = np.concatenate((starts, ts[away]))
+        ends = np.concatenate((ends, np.full(len(away), -1, dtype=np.int64)))
+    length = np.where(ends >= 0, ends, until if until is not None else 0) - starts
+
+    top = np.arange(len(length))
+    if n < len(length):
+        top = np.argpartition(-length, n)[:n]
+    top = top[np.argsort(-length[top], kind="stable")]
+    return [
+        Absence(
+            ENTITY_TYPES[int(keys[i]) % len(ENTITY_TYPES)],
+            int(keys[i]) // len(ENTITY_TYPES),
+            int(starts[i]),
+            int(ends[i]) if ends[i] >= 0 else None,
+            int(length[i]),
+        )
+        for i in top
+    ]
+
+
+def hourly_heatmap(cols: EventColumns, event: str = "arrived") -> "np.ndarray":
+    """Counts of `event` per weekday (rows, Monday first) × hour (columns)."""
+    ts = cols.ts[cols.event == EVENT_TYPES.index(event)]
+    days = ts // _DAY
+    weekday = (days + 3) % 7  # 1970-01-01 was a Thursday
+    hour = ts % _DAY // 3600
+    return np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
@@ -0,0 +1,248 @@
+"""Online database backups: scheduling, rotation, compression and verification."""
+
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from config import BACKUP_COMPRESS, BACKUP_DIR, BACKUP_INTERVAL_HOURS, BACKUP_KEEP
+from database import Database, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "database-"
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+_RETRY_DELAY = 600.0  # seconds before a failed scheduled backup is retried
+# A .part file nobody has written to for this long was left by a backup
+# that never finished; one in progress is written every few milliseconds.
+_STALE_PART_AGE = 300.0
+
+
+class BackupError(DatabaseError):
+    """Raised when a backup cannot be written or fails verification."""
+
+
+class BackupInfo(NamedTuple):
+    path: str
+    size: int  # bytes on disk, after compression
+    duration: float  # seconds spent copying, verifying and compressing
+
+
+def _verify(path: str) -> None:
+    """Run PRAGMA quick_check on a backup copy and raise BackupError unless 'ok'."""
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute("PRAGMA quick_check").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        raise BackupError(f"Cannot verify backup '{path}': {e}") from e
+    if [r[0] for r in rows] != ["ok"]:
+        raise BackupError(f"Backup '{path}' failed quick_check: {rows[0][0]}")
+
+
+def _compress(path: str) -> str:
+    """Gzip path into path + '.gz', remove the original and return the new path."""
+    gz_path = path + ".gz"
+    part = gz_path + ".part"
+    with open(path, "rb") as src, gzip.open(part, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(part, gz_path)
+    os.remove(path)
+    return gz_path
+
+
+class BackupManager:
+    """Writes verified, rotated backups of a Database on a worker thread.
+
+    Backups are taken every interval_hours (counted from the newest backup
+    on disk, so restarts do not reset the schedule) and on request() from
+    the UI. All work happens on one daemon thread; the UI polls state().
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        directory: str = BACKUP_DIR,
+        keep: int = BACKUP_KEEP,
+        interval_hours: float = BACKUP_INTERVAL_HOURS,
+        compress: bool = BACKUP_COMPRESS,
+    ):
+        self.db = db
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval_hours * 3600
+        self.compress = compress
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._pending = False  # request() was called and the worker has not started it
+        self._running = False
+        self._last: BackupInfo | None = None
+        self._last_error: str | None = None
+        self._failed_at: float | None = None
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the worker thread. Safe to call more than once.
+
+        Also removes the .part files of backups that never finished.
+        """
+        if self._thread is not None:
+            return
+        self._remove_stale_parts()
+        self._thread = threading.Thread(
+            target=self._run, name="backup", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the worker to exit and wait up to timeout seconds for it.
+
+        A backup still running after that is abandoned when the process
+        exits (the worker is a daemon thread); its .part file is removed
+        by the next start().
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request(self) -> None:
+        """Schedule an immediate backup on the worker thread."""
+        with self._lock:
+            self._pending = True
+        self._wake.set()
+
+    def state(self) -> tuple[bool, BackupInfo | None, str | None]:
+        """Return (busy, last successful backup, last error message).
+
+        busy stays True from request() until that backup has finished.
+        """
+        with self._lock:
+            return self._pending or self._running, self._last, self._last_error
+
+    # Work
+
+    def list_backups(self) -> list[str]:
+        """Return backup file paths, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # The timestamp in the name sorts lexicographically in time order.
+        return [
+            os.path.join(self.directory, n)
+            for n in sorted(names)
+            if n.startswith(_PREFIX) and n.endswith((".db", ".db.gz"))
+        ]
+
+    def run_once(self) -> BackupInfo:
+        """Take, verify, compress and rotate one backup synchronously.
+
+        Raises:
+            BackupError: If the copy cannot be written or fails quick_check.
+        """
+        started = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime(_STAMP_FORMAT)
+        final = os.path.join(self.directory, f"{_PREFIX}{stamp}.db")
+        part = final + ".part"
+
+        try:
+            self.db.backup(part)
+            _verify(part)
+            os.replace(part, final)
+            if self.compress:
+                final = _compress(final)
+        except (DatabaseError, OSError) as e:
+            if os.path.exists(part):
+                os.remove(part)
+            if isinstance(e, BackupError):
+                raise
+            raise BackupError(f"Backup failed: {e}") from e
+
+        self._rotate()
+        info = BackupInfo(final, os.path.getsize(final), time.monotonic() - started)
+        logger.info("Backup written: %s (%d bytes, %.2fs)", *info)
+        return info
+
+    def _remove_stale_parts(self) -> None:
+        """Delete .part files that no backup has written to for a while."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        now = time.time()
+        for name in names:
+            if not (name.startswith(_PREFIX) and name.endswith(".part")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > _STALE_PART_AGE:
+                    os.remove(path)
+                    logger.info("Removed unfinished backup %s", path)
+            except OSError as e:
+                logger.warning("Cannot remove unfinished backup %s: %s", path, e)
+
+    def _rotate(self) -> None:
+        """Delete the oldest backups so that at most `keep` remain."""
+        backups = self.list_backups()
+        for path in backups[: max(len(backups) - self.keep, 0)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Cannot remove old backup %s: %s", path, e)
+
+    def _seconds_until_due(self) -> float | None:
+        """Return seconds until the next scheduled backup, or None if disabled."""
+        if self.interval <= 0:
+            return None
+        due = 0.0
+        backups = self.list_backups()
+        if backups:
+            try:
+                age = time.time() - os.path.getmtime(backups[-1])
+                due = max(self.interval - age, 0.0)
+            except OSError:
+                pass
+        # Without this a persistent failure (e.g. a full disk) would retry in a loop.
+        if self._failed_at is not None:
+            due = max(due, self._failed_at + _RETRY_DELAY - time.monotonic())
+        return due
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._seconds_until_due())
+            if self._stop.is_set():
+                break
+            self._wake.clear()
+            with self._lock:
+                self._pending = False
+                self._running = True
+            try:
+                info = self.run_once()
+            except BackupError as e:
+                logger.error("%s", e)
+                self._failed_at = time.monotonic()
+                with self._lock:
+                    self._last_error = str(e)
+            else:
+                self._failed_at = None
+                with self._lock:
+                    self._last = info
+                    self._last_error = None
+            finally:
+                with self._lock:
+                    self._running = False
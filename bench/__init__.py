@@ -0,0 +1 @@
+"""Benchmarks and load simulators for the data layer and the card grid."""
@@ -0,0 +1,135 @@
+"""Benchmark of analytics.py on a large synthetic event log (5M by default).
+
+Generates the log once into a temporary database with bench/synthetic.py,
+then times load_events() from SQLite and from the event cache (eventcache.py)
+and every vectorized computation on the loaded columns, and the same dwell
+times computed by a plain Python loop over them for comparison. Needs NumPy.
+
+Run from the repository root:
+
+    python bench/bench_analytics.py
+    python bench/bench_analytics.py --vehicles 500 --commanders 100 --months 3
+    python bench/bench_analytics.py --db big.db      # keep and reuse the log
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, ".")
+
+import analytics  # noqa: E402
+from bench.synthetic import generate  # noqa: E402
+from database import Database  # noqa: E402
+from eventcache import EventCache  # noqa: E402
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def python_dwell_times(cols: "analytics.EventColumns") -> list[int]:
+    """dwell_times() event by event, as the reference."""
+    arrived, departed = (
+        analytics.EVENT_TYPES.index(e) for e in ("arrived", "departed")
+    )
+    deleted = analytics.EVENT_TYPES.index("deleted")
+    dwell = []
+    key = since = None
+    for etype, eid, ts, event in zip(
+        cols.entity_type.tolist(),
+        cols.entity_id.tolist(),
+        cols.ts.tolist(),
+        cols.event.tolist(),
+    ):
+        if (etype, eid) != key:
+            key, since = (etype, eid), None
+        if event == arrived:
+            if since is None:
+                since = ts
+        elif event in (departed, deleted) and since is not None:
+            dwell.append(ts - since)
+            since = None
+    return dwell
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=2500)
+    parser.add_argument("--commanders", type=int, default=500)
+    parser.add_argument("--months", type=int, default=14)
+    parser.add_argument("--moves-per-day", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="database file to use; generated if missing")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if not analytics.AVAILABLE:
+        sys.exit("bench_analytics needs NumPy: pip install numpy")
+
+    end = datetime(2026, 1, 1)
+    tmp = None
+    path = args.db
+    if path is None:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bench.db")
+    fresh = not os.path.exists(path)
+    db = Database(path)
+    if fresh:
+        counts, ms = _timed(
+            lambda: generate(
+                db,
+                vehicles=args.vehicles,
+                commanders=args.commanders,
+                months=args.months,
+                moves_per_day=args.moves_per_day,
+                seed=args.seed,
+                end=end,
+            )
+        )
+        print(f"\ngenerated {counts['events']:,} events in {ms / 1000:.1f} s")
+
+    cache = EventCache(db, os.path.join(os.path.dirname(path), "bench_cache"))
+    results = {}
+    cols, results["load_events"] = _timed(lambda: analytics.load_events(db))
+    _rows, results["event cache build"] = _timed(cache.refresh)
+    _cols, results["load_events, cached"] = _timed(
+        lambda: analytics.load_events(db, cache=cache)
+    )
+    until = int(cols.ts.max()) + 1
+    start = until - 30 * args.months * 86400
+    dwell, results["dwell_times"] = _timed(lambda: analytics.dwell_times(cols))
+    occ, results["occupancy, hourly"] = _timed(
+        lambda: analytics.occupancy(cols, start, until, 3600)
+    )
+    _top, results["longest_absences(20)"] = _timed(
+        lambda: analytics.longest_absences(cols, 20, until=until)
+    )
+    _heat, results["hourly_heatmap"] = _timed(lambda: analytics.hourly_heatmap(cols))
+    reference, results["dwell, Python loop"] = _timed(lambda: python_dwell_times(cols))
+    assert reference == dwell.tolist()
+
+    print(f"\n{len(cols.id):,} events, {len(dwell):,} stays, peak {occ.peak.max()}\n")
+    print(f"{'step':<24}{'ms':>10}")
+    print("─" * 34)
+    for name, ms in results.items():
+        print(f"{name:<24}{ms:>10.1f}")
+    speedup = results["dwell, Python loop"] / results["dwell_times"]
+    print(f"\ndwell_times is {speedup:.0f}× the Python loop\n")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"events": len(cols.id), "ms": results}, f, indent=2)
+    db._conn.close()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Headless benchmark of the card grid model at 1k–100k cards.
+
+Drives ui/cardlayout.CardGridModel against a RecordingCanvas and reports,
+per grid size, the wall time and the number of canvas calls of every
+action the operator can trigger: populate, resize, delete, toggle, hover
+and hit-testing. Times include RecordingCanvas's own bookkeeping, so they
+are an upper bound on the Python side of the work; the call counts are
+what a real tk.Canvas would have to process.
+
+Run from the repository root:
+
+    python bench/bench_cards.py
+    python bench/bench_cards.py --sizes 1000 10000 --json bench_cards.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from bench.synthetic import vehicle_number  # noqa: E402
+from ui.cardlayout import CardGridModel, RecordingCanvas  # noqa: E402
+
+_STATUSES = ("idle", "arrived", "departed")
+
+
+def _cards(n: int, rnd: random.Random) -> list[tuple[int, str, str, str, int]]:
+    return [
+        (i + 1, vehicle_number(i), rnd.choice(_STATUSES), "08:00 01.03.2026", 0)
+        for i in range(n)
+    ]
+
+
+def _measure(canvas: RecordingCanvas, fn, repeat: int = 1) -> tuple[float, float]:
+    """Run fn() repeat times; return (ms per call, canvas calls per call)."""
+    canvas.reset_calls()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - t0) * 1000
+    return elapsed / repeat, canvas.total_calls() / repeat
+
+
+def run_size(n: int, seed: int, repeat: int) -> dict:
+    """Benchmark every action on a grid of n cards."""
+    rnd = random.Random(seed)
+    cards = _cards(n, rnd)
+    canvas = RecordingCanvas()
+    model = CardGridModel(canvas, "vehicle")
+    model.resize(900)
+
+    results = {}
+    results["populate"] = _measure(canvas, lambda: model.load(cards))
+
+    widths = iter(range(937, 937 + 37 * repeat, 37))  # each step changes cell width
+    results["resize"] = _measure(canvas, lambda: model.resize(next(widths)))
+
+    victims = iter(rnd.sample(model.order, min(repeat, n)))
+    results["delete"] = _measure(canvas, lambda: model.remove(next(victims)))
+
+    eids = model.order
+    versions = iter(range(1, 10 * repeat + 1))
+
+    def toggle() -> None:
+        eid = rnd.choice(eids)
+        model.update(eid, rnd.choice(_STATUSES), "09:00 01.03.2026", next(versions))
+
+    results["toggle"] = _measure(canvas, toggle, 10 * repeat)
+
+    geo = model.geometry
+    height = model.total_height()
+    points = [
+        (rnd.randrange(geo.width), rnd.randrange(max(height, 1)))
+        for _ in range(100 * repeat)
+    ]
+    hover_points = iter(points)
+    results["hover"] = _measure(
+        canvas, lambda: model.hover(model.hit_test(*next(hover_points))), len(points)
+    )
+    hit_points = iter(points)
+    results["hit_test"] = _measure(
+        canvas, lambda: model.hit_test(*next(hit_points)), len(points)
+    )
+
+    return {
+        name: {"ms": ms, "canvas_calls": calls} for name, (ms, calls) in results.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="resizes and deletes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    print(f"\n{'cards':>8}  {'action':<10}{'ms/op':>12}{'canvas calls/op':>18}")
+    print("─" * 50)
+    for n in args.sizes:
+        report[n] = run_size(n, args.seed, args.repeat)
+        for name, r in report[n].items():
+            print(f"{n:>8}  {name:<10}{r['ms']:>12.4f}{r['canvas_calls']:>18.1f}")
+        print()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
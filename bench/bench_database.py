@@ -0,0 +1,242 @@
+"""Microbenchmarks for the Database layer on a large synthetic dataset.
+
+Builds a deterministic dataset with bench/synthetic.py, times every
+scenario below, writes the results as JSON and compares them against a
+stored baseline, flagging scenarios that got slower than the threshold
+allows.
+
+Run from the repository root:
+
+    python bench/bench_database.py --save-baseline     # record a baseline
+    python bench/bench_database.py                     # compare against it
+    python bench/bench_database.py --vehicles 5000 --months 6 --out run.json
+
+Baselines are machine-specific; record one on the machine you compare on.
+The exit code is 1 when any scenario regressed.
+
+The event log ends at --end, midnight today by default, so every run
+writes the same rows relative to the retention cutoff and the purge has
+the same share of them to delete. Pin --end to reproduce a run exactly.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, ".")
+
+from bench.synthetic import generate  # noqa: E402
+from database import Database  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join("bench", "baseline.json")
+
+# Differences below this many milliseconds are treated as timer noise.
+_NOISE_FLOOR_MS = 0.05
+
+
+def _time_calls(fn, repeat: int) -> list[float]:
+    """Call fn() repeat times and return the wall time of each call in ms."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def _summary(times: list[float]) -> dict:
+    ordered = sorted(times)
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0],
+        "median_ms": statistics.median(ordered),
+        "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+    }
+
+
+def _scenarios(db: Database, rnd: random.Random) -> dict:
+    """Return name → zero-argument callable for every read/write scenario."""
+    vehicles = [(r["id"], r["number"]) for r in db.get_vehicles()]
+    probe = vehicles[len(vehicles) // 2][1]
+
+    def toggle() -> None:
+        vid, number = rnd.choice(vehicles)
+        db.update_status_and_log(
+            "vehicle", vid, number, rnd.choice(["arrived", "departed"])
+        )
+
+    return {
+        "get_entities[all vehicles]": lambda: db.get_entities("vehicle"),
+        "get_entities[vehicle prefix]": lambda: db.get_entities("vehicle", probe[:2]),
+        "get_entities[vehicle exact]": lambda: db.get_entities("vehicle", probe),
+        "get_entities[no match]": lambda: db.get_entities("vehicle", "zzz"),
+        "get_entities[all commanders]": lambda: db.get_entities("commander"),
+        "get_entities[commander name]": lambda: db.get_entities("commander", "Иванов"),
+        "get_events[newest]": lambda: db.get_events(),
+        "get_events[by name]": lambda: db.get_events(probe),
+        "get_events[by event]": lambda: db.get_events("departed"),
+        "get_events[no match]": lambda: db.get_events("zzz"),
+        "stats": db.stats,
+        "recent_activity": lambda: db.recent_activity(10),
+        "update_status_and_log": toggle,
+    }
+
+
+def _bench_purge(template: str, repeat: int) -> list[float]:
+    """Time _purge_old_events + commit, each run on a fresh copy of the dataset."""
+    times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(repeat):
+            path = os.path.join(tmp, "purge.db")
+            shutil.copyfile(template, path)
+            db = Database(path=path)
+            t0 = time.perf_counter()
+            db._purge_old_events()
+            db._conn.commit()
+            times.append((time.perf_counter() - t0) * 1000)
+            db._conn.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    return times
+
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.db")
+        db = Database(path=template)
+        t0 = time.perf_counter()
+        dataset = generate(
+            db,
+            vehicles=args.vehicles,
+            commanders=args.commanders,
+            months=args.months,
+            moves_per_day=args.moves,
+            seed=args.seed,
+            end=datetime.combine(args.end, datetime.min.time()),
+        )
+        print(
+            f"Dataset: {dataset['vehicles']} vehicles, {dataset['commanders']} "
+            f"commanders, {dataset['events']} events "
+            f"({time.perf_counter() - t0:.1f}s to generate)"
+        )
+        # Fold the WAL into the main file so copies of it are self-contained.
+        db._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        results = {}
+        purge_template = os.path.join(tmp, "purge-template.db")
+        shutil.copyfile(template, purge_template)
+        results["_purge_old_events"] = _summary(
+            _bench_purge(purge_template, max(args.repeat // 10, 3))
+        )
+
+        rnd = random.Random(args.seed)
+        for name, fn in _scenarios(db, rnd).items():
+            fn()  # warm the page cache and statement cache
+            results[name] = _summary(_time_calls(fn, args.repeat))
+        db._conn.close()
+
+    return {
+        "meta": {
+            "dataset": dataset,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "end": args.end.isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a comparison table and return the names of regressed scenarios.
+
+    Scenarios are compared on their fastest run: the minimum is far less
+    sensitive to scheduler and cache noise than the median, while a real
+    slowdown shifts every run, the fastest one included.
+    """
+    regressions = []
+    base = baseline.get("results", {})
+    print(f"\n{'scenario':<32}{'min ms':>12}{'baseline':>12}{'change':>10}")
+    print("─" * 66)
+    for name, r in current["results"].items():
+        cur = r["min_ms"]
+        b = base.get(name)
+        if b is None:
+            print(f"{name:<32}{cur:>12.3f}{'—':>12}{'new':>10}")
+            continue
+        ref = b["min_ms"]
+        change = (cur - ref) / ref if ref else 0.0
+        regressed = change > threshold and cur - ref > _NOISE_FLOOR_MS
+        mark = "  ✗ REGRESSION" if regressed else ""
+        print(f"{name:<32}{cur:>12.3f}{ref:>12.3f}{change:>+10.0%}{mark}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--commanders", type=int, default=300)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--moves", type=float, default=4.0, help="per entity per day")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="the event log ends at midnight starting this day (YYYY-MM-DD)",
+    )
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold", type=float, default=0.3, help="allowed slowdown, 0.3 = 30%%"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store this run as the baseline"
+    )
+    args = parser.parse_args()
+
+    current = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        compare(current, {}, args.threshold)
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first.")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("dataset") != current["meta"]["dataset"]:
+        print("Warning: baseline was recorded on a different dataset.")
+    regressions = compare(current, baseline, args.threshold)
+    print()
+    if regressions:
+        print(
+            f"{len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}"
+        )
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark of the report engine (reports.py).
+
+Generates a large synthetic event log once (bench/synthetic.py), then
+builds the movement report over the whole log with 1, 2, 4 … workers and
+prints the time and speedup of each. The speedup is bounded by the CPU
+count and by how fast the disk serves the shards' pages. Last, it times
+the duty report for the last day of the log, which like the app's report
+has the whole log before it; a --db file from before the presence table
+is backfilled first, outside the timing.
+
+Run from the repository root:
+
+    python bench/bench_reports.py
+    python bench/bench_reports.py --workers 1 2 4 8 --by week
+    python bench/bench_reports.py --db big.db      # keep and reuse the log
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, ".")
+
+import reports  # noqa: E402
+from bench.synthetic import generate  # noqa: E402
+from database import Database  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=2500)
+    parser.add_argument("--commanders", type=int, default=500)
+    parser.add_argument("--months", type=int, default=14)
+    parser.add_argument("--moves-per-day", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--by", choices=reports.SHARD_KINDS, default="month")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--db", help="database file to use; generated if missing")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    end = datetime(2026, 1, 1)
+    tmp = None
+    path = args.db
+    if path is None:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "bench.db")
+    if not os.path.exists(path):
+        db = Database(path)
+        t0 = time.perf_counter()
+        counts = generate(
+            db,
+            vehicles=args.vehicles,
+            commanders=args.commanders,
+            months=args.months,
+            moves_per_day=args.moves_per_day,
+            seed=args.seed,
+            end=end,
+        )
+        print(
+            f"\ngenerated {counts['events']:,} events "
+            f"in {time.perf_counter() - t0:.1f} s"
+        )
+        db._conn.close()
+
+    db = Database(path)
+    backfill = db.migrate_in_background()
+    if backfill is not None:
+        t0 = time.perf_counter()
+        backfill.join()
+        print(f"\nbackfilled presence in {time.perf_counter() - t0:.1f} s")
+    first, last = db._conn.execute("SELECT MIN(ts), MAX(ts) FROM events").fetchone()
+    db._conn.close()
+    start, stop = date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+    shards = len(reports.shards(start, stop, args.by))
+
+    results = {}
+    baseline = None
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        report = reports.build_movement_report(start, stop, args.by, workers, path)
+        results[workers] = (time.perf_counter() - t0) * 1000
+        if baseline is None:
+            baseline = report
+        assert report == baseline
+
+    events = sum(sum(day.values()) for day in baseline.daily.values())
+    print(
+        f"\n{events:,} events, {start}..{stop}, {shards} {args.by} shards, "
+        f"{os.cpu_count()} CPUs\n"
+    )
+    print(f"{'workers':<10}{'ms':>10}{'speedup':>10}")
+    print("─" * 30)
+    for workers, ms in results.items():
+        print(f"{workers:<10}{ms:>10.1f}{results[args.workers[0]] / ms:>9.2f}×")
+
+    day_start, day_end = reports.duty_period(stop)
+    with tempfile.TemporaryDirectory() as out:
+        t0 = time.perf_counter()
+        duty = reports.write_duty_report(day_start, day_end, out, path)
+        duty_ms = (time.perf_counter() - t0) * 1000
+    print(
+        f"\nduty report for {stop}: {duty.events:,} events, "
+        f"{len(duty.absent):,} absent, {duty_ms:.1f} ms\n"
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "events": events,
+                    "cpus": os.cpu_count(),
+                    "ms": results,
+                    "duty_ms": duty_ms,
+                },
+                f,
+            )
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
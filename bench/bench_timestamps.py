@@ -0,0 +1,94 @@
+"""Per-row cost of timestamp formatting for card grids and event tables.
+
+Formats 100k stored timestamps, as a large event table or card grid would,
+with the original strptime/strftime formatter and with ui.components
+fmt_timestamp: uncached, on a cold cache, on a warm cache (a rebuild of
+the same rows, as after a search keystroke) and through the
+fmt_timestamps batch call.
+
+Run from the repository root:
+
+    python bench/bench_timestamps.py
+    python bench/bench_timestamps.py --rows 500000 --distinct 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from ui.components import fmt_timestamp, fmt_timestamps  # noqa: E402
+
+
+def fmt_strptime(raw: str) -> str:
+    """The formatter before the slicing rewrite, kept as the reference."""
+    try:
+        dt = datetime.strptime(raw[:16], "%Y-%m-%d %H:%M")
+        return dt.strftime("%H:%M %d.%m.%Y")
+    except (ValueError, TypeError):
+        return raw[:16] if raw else "—"
+
+
+def _values(rows: int, distinct: int, seed: int) -> list[str]:
+    """rows timestamps drawn from `distinct` values, in event-log order."""
+    rnd = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    pool = sorted(
+        (start + timedelta(seconds=rnd.randrange(90 * 86400))).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        for _ in range(distinct)
+    )
+    return sorted(rnd.choice(pool) for _ in range(rows))
+
+
+def _ns_per_row(fn, values: list[str]) -> float:
+    t0 = time.perf_counter()
+    fn(values)
+    return (time.perf_counter() - t0) * 1e9 / len(values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument(
+        "--distinct", type=int, default=10_000, help="distinct timestamps"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    values = _values(args.rows, args.distinct, args.seed)
+    uncached = fmt_timestamp.__wrapped__
+
+    results = {
+        "strptime/strftime": _ns_per_row(
+            lambda vs: [fmt_strptime(v) for v in vs], values
+        ),
+        "slicing, uncached": _ns_per_row(lambda vs: [uncached(v) for v in vs], values),
+    }
+    fmt_timestamp.cache_clear()
+    results["slicing, cold cache"] = _ns_per_row(
+        lambda vs: [fmt_timestamp(v) for v in vs], values
+    )
+    results["slicing, warm cache"] = _ns_per_row(
+        lambda vs: [fmt_timestamp(v) for v in vs], values
+    )
+    results["fmt_timestamps batch"] = _ns_per_row(fmt_timestamps, values)
+
+    assert [fmt_strptime(v) for v in values] == fmt_timestamps(values)
+
+    base = results["strptime/strftime"]
+    print(f"\n{args.rows} rows, {args.distinct} distinct timestamps\n")
+    print(f"{'formatter':<24}{'ns/row':>10}{'speed-up':>10}")
+    print("─" * 44)
+    for name, ns in results.items():
+        print(f"{name:<24}{ns:>10.0f}{base / ns:>9.1f}×")
+    info = fmt_timestamp.cache_info()
+    print(f"\ncache: {info.currsize}/{info.maxsize} entries, {info.hits} hits\n")
+
+
+if __name__ == "__main__":
+    main()
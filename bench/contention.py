@@ -0,0 +1,140 @@
+"""Multi-process write contention benchmark for Database.update_status_and_log.
+
+Spawns N worker processes that all toggle vehicle statuses in one shared
+database file as fast as they can, once per contention policy, and reports
+throughput, latency percentiles and the share of writes that failed with a
+DatabaseError (the error dialog an operator would see).
+
+Run from the repository root:
+
+    python bench/contention.py --procs 8 --writes 200
+    python bench/contention.py --json bench_contention.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from database import ContentionPolicy, Database, DatabaseError  # noqa: E402
+
+# name → policy; "none" reproduces the behaviour before busy handling existed.
+POLICIES: dict[str, ContentionPolicy] = {
+    "none": ContentionPolicy(busy_timeout_ms=0, immediate=False, max_retries=0),
+    "busy-timeout": ContentionPolicy(immediate=False, max_retries=0),
+    "immediate": ContentionPolicy(max_retries=0),
+    "immediate+retry": ContentionPolicy(),
+}
+
+VEHICLES = 50
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[k]
+
+
+def _worker(path: str, policy: ContentionPolicy, writes: int, seed: int, start, out):
+    db = Database(path=path, policy=policy)
+    vehicles = [(r["id"], r["number"]) for r in db.get_vehicles()]
+    rnd = random.Random(seed)
+    latencies: list[float] = []
+    failures = 0
+    start.wait()
+    for i in range(writes):
+        vid, number = rnd.choice(vehicles)
+        t0 = time.perf_counter()
+        try:
+            db.update_status_and_log(
+                "vehicle", vid, number, "arrived" if i % 2 else "departed"
+            )
+            latencies.append(time.perf_counter() - t0)
+        except DatabaseError:
+            failures += 1
+    out.put((latencies, failures))
+
+
+def run_policy(name: str, procs: int, writes: int) -> dict:
+    """Run one policy against a fresh database and return its summary."""
+    policy = POLICIES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "database.db")
+        seed_db = Database(path=path)
+        for i in range(VEHICLES):
+            seed_db.add_vehicle(f"А{i:03d}АА")
+        seed_db._conn.close()
+
+        ctx = mp.get_context("spawn")
+        start = ctx.Event()
+        out = ctx.Queue()
+        workers = [
+            ctx.Process(target=_worker, args=(path, policy, writes, i, start, out))
+            for i in range(procs)
+        ]
+        for w in workers:
+            w.start()
+        # Let every process open its connection before the clock starts.
+        time.sleep(1.0)
+        t0 = time.perf_counter()
+        start.set()
+        results = [out.get() for _ in workers]
+        elapsed = time.perf_counter() - t0
+        for w in workers:
+            w.join()
+
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    failures = sum(f for _, f in results)
+    attempted = procs * writes
+    return {
+        "policy": name,
+        "procs": procs,
+        "writes": attempted,
+        "ok": len(latencies),
+        "failed": failures,
+        "failure_rate": failures / attempted if attempted else 0.0,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="per process")
+    parser.add_argument(
+        "--policy", action="append", choices=sorted(POLICIES), help="repeatable"
+    )
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    rows = [run_policy(p, args.procs, args.writes) for p in args.policy or POLICIES]
+
+    print(
+        f"\n{'policy':<18}{'writes/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'max ms':>10}{'failed':>10}"
+    )
+    print("─" * 68)
+    for r in rows:
+        print(
+            f"{r['policy']:<18}{r['throughput']:>10.1f}{r['p50_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['max_ms']:>10.1f}{r['failure_rate']:>10.1%}"
+        )
+    print()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
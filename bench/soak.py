@@ -0,0 +1,245 @@
+"""Year-long soak simulator for database growth, purge cost and click latency.
+
+Replays a realistic duty workload against Database in accelerated time:
+the database clock (_now / _cutoff_ts) is driven by a simulated datetime,
+so a year of traffic — and the monthly retention purge that comes with
+it — runs in minutes. The model per simulated day:
+
+* shift changes around 08:00 and 20:00, when most commanders arrive or leave;
+* two to four convoys, each taking out a slice of the fleet within minutes
+  and bringing it back hours later;
+* scattered individual vehicle movements through the day;
+* a night lull with only occasional movements between 00:00 and 06:00.
+
+Every status change goes through update_status_and_log() exactly like a
+click on a card. The simulator records per-operation wall-clock latency,
+database and WAL file sizes and rows purged per simulated day, and writes a
+fixed-format monthly text report that can be diffed between versions, plus
+the per-day data as JSON.
+
+Run from the repository root:
+
+    python bench/soak.py --days 365 --report soak_report.txt
+    python bench/soak.py --days 90 --maintenance --json soak_days.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, ".")
+
+from bench.synthetic import commander_name, vehicle_number  # noqa: E402
+from database import Database  # noqa: E402
+from maintenance import MaintenanceScheduler  # noqa: E402
+
+
+class _SimClock(datetime):
+    """datetime whose now() returns the simulated time; patched into database."""
+
+    current = datetime(2026, 1, 1)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def _around(rnd: random.Random, base: datetime, sigma_min: float) -> datetime:
+    return base + timedelta(minutes=rnd.gauss(0, sigma_min))
+
+
+def day_plan(
+    rnd: random.Random, day: datetime, vehicles: int, commanders: int
+) -> list[tuple[datetime, str, int]]:
+    """Return the day's status changes as (time, entity_type, index), sorted."""
+    ops: list[tuple[datetime, str, int]] = []
+    at = day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Shift changes: day shift 08:00–20:00, a tenth of commanders on nights.
+    for c in range(commanders):
+        if rnd.random() < 0.1:
+            ops.append((_around(rnd, at + timedelta(hours=8), 10), "commander", c))
+            ops.append((_around(rnd, at + timedelta(hours=20), 10), "commander", c))
+        elif rnd.random() < 0.85:
+            ops.append((_around(rnd, at + timedelta(hours=8), 20), "commander", c))
+            ops.append((_around(rnd, at + timedelta(hours=19), 45), "commander", c))
+
+    # Convoys: a slice of the fleet leaves together and returns together.
+    for _ in range(rnd.randint(2, 4)):
+        size = max(1, int(vehicles * rnd.uniform(0.05, 0.15)))
+        members = rnd.sample(range(vehicles), size)
+        out = at + timedelta(hours=rnd.uniform(7, 15))
+        back = out + timedelta(hours=rnd.uniform(2, 6))
+        for v in members:
+            ops.append((out + timedelta(minutes=rnd.uniform(0, 10)), "vehicle", v))
+            ops.append((back + timedelta(minutes=rnd.uniform(0, 15)), "vehicle", v))
+
+    # Individual trips during the day.
+    for v in range(vehicles):
+        if rnd.random() < 0.3:
+            leave = at + timedelta(hours=rnd.uniform(6, 20))
+            ops.append((leave, "vehicle", v))
+            ops.append((leave + timedelta(minutes=rnd.uniform(20, 180)), "vehicle", v))
+
+    # Night lull: the odd movement between midnight and 06:00.
+    for _ in range(rnd.randint(0, max(1, vehicles // 50))):
+        ops.append(
+            (
+                at + timedelta(hours=rnd.uniform(0, 6)),
+                "vehicle",
+                rnd.randrange(vehicles),
+            )
+        )
+
+    day_end = at + timedelta(days=1)
+    ops = [(min(max(ts, at), day_end - timedelta(seconds=1)), t, i) for ts, t, i in ops]
+    ops.sort(key=lambda op: op[0])
+    return ops
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _pct(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def simulate(args) -> list[dict]:
+    """Run the simulation and return one record per simulated day."""
+    rnd = random.Random(args.seed)
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    days: list[dict] = []
+
+    with tempfile.TemporaryDirectory() as tmp, patch("database.datetime", _SimClock):
+        path = os.path.join(tmp, "database.db")
+        _SimClock.current = start
+        db = Database(path=path)
+        maintenance = MaintenanceScheduler(db, idle_seconds=0)
+
+        ids: dict[str, list[tuple[int, str]]] = {"vehicle": [], "commander": []}
+        for i in range(args.vehicles):
+            name = vehicle_number(i)
+            ids["vehicle"].append((db.add_vehicle(name), name))
+        for i in range(args.commanders):
+            name = commander_name(i)
+            ids["commander"].append((db.add_commander(name), name))
+        # (entity_type, id) → [status, version], as the station's cards see it.
+        state = {(t, eid): ["idle", 0] for t, lst in ids.items() for eid, _ in lst}
+
+        count_sql = "SELECT COUNT(*) FROM events"
+        for d in range(args.days):
+            day = start + timedelta(days=d)
+            events_before = db._conn.execute(count_sql).fetchone()[0]
+            latencies: list[float] = []
+            maintained = not args.maintenance
+
+            for ts, etype, idx in day_plan(rnd, day, args.vehicles, args.commanders):
+                if not maintained and ts.hour >= 3:
+                    # Nightly idle window: what MaintenanceScheduler does in the app.
+                    _SimClock.current = ts.replace(hour=3, minute=0, second=0)
+                    maintenance.run_once()
+                    maintained = True
+                eid, name = ids[etype][idx]
+                st = state[(etype, eid)]
+                new_status = "departed" if st[0] == "arrived" else "arrived"
+                _SimClock.current = ts
+                t0 = time.perf_counter()
+                st[1] = db.update_status_and_log(
+                    etype, eid, name, new_status, expected_version=st[1]
+                ).version
+                latencies.append((time.perf_counter() - t0) * 1000)
+                st[0] = new_status
+
+            events_after = db._conn.execute(count_sql).fetchone()[0]
+            latencies.sort()
+            days.append(
+                {
+                    "date": day.strftime("%Y-%m-%d"),
+                    "ops": len(latencies),
+                    "p50_ms": _pct(latencies, 50),
+                    "p99_ms": _pct(latencies, 99),
+                    "max_ms": latencies[-1] if latencies else 0.0,
+                    "events": events_after,
+                    "purged": events_before + len(latencies) - events_after,
+                    "db_bytes": _file_size(path),
+                    "wal_bytes": _file_size(path + "-wal"),
+                }
+            )
+            if args.progress and (d + 1) % 30 == 0:
+                print(f"  simulated {d + 1} days", file=sys.stderr)
+        db._conn.close()
+
+    return days
+
+
+def monthly_report(days: list[dict], args) -> str:
+    """Aggregate day records per month into a fixed-width, diff-friendly table."""
+    months: dict[str, list[dict]] = {}
+    for rec in days:
+        months.setdefault(rec["date"][:7], []).append(rec)
+
+    lines = [
+        "Soak report",
+        f"vehicles={args.vehicles} commanders={args.commanders} days={args.days} "
+        f"seed={args.seed} maintenance={'on' if args.maintenance else 'off'}",
+        "",
+        f"{'month':<9}{'ops':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'events':>10}{'purged':>9}{'db MB':>8}{'wal MB':>8}",
+        "─" * 79,
+    ]
+    for month, recs in months.items():
+        last = recs[-1]
+        lines.append(
+            f"{month:<9}{sum(r['ops'] for r in recs):>8}"
+            f"{statistics.median(r['p50_ms'] for r in recs):>9.3f}"
+            f"{max(r['p99_ms'] for r in recs):>9.3f}"
+            f"{max(r['max_ms'] for r in recs):>9.2f}"
+            f"{last['events']:>10}{sum(r['purged'] for r in recs):>9}"
+            f"{last['db_bytes'] / 2**20:>8.2f}{last['wal_bytes'] / 2**20:>8.2f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=300)
+    parser.add_argument("--commanders", type=int, default=60)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--start", default="2026-01-01", help="first simulated day")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--maintenance",
+        action="store_true",
+        help="run a MaintenanceScheduler pass at 03:00 every simulated night",
+    )
+    parser.add_argument("--report", help="write the monthly report to this file")
+    parser.add_argument("--json", help="write per-day records to this file")
+    parser.add_argument("--progress", action="store_true")
+    args = parser.parse_args()
+
+    days = simulate(args)
+    report = monthly_report(days, args)
+    print(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(days, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Deterministic synthetic duty data for benchmarks and soak runs.
+
+generate() fills a database with vehicles, commanders and a chronological
+event log covering the last N months, using a seeded RNG so the same
+arguments (including `end`) always produce the same rows. Rows are written
+with executemany, one transaction per simulated day, so several hundred
+thousand events take a second or two. The presence stays are written
+alongside the events, as the live code would have kept them, and the
+activity rollups are recounted at the end.
+"""
+
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import presence
+from database import Database
+
+_LETTERS = "АВЕКМНОРСТУХ"
+_SURNAMES = [
+    "Иванов",
+    "Петров",
+    "Сидоров",
+    "Смирнов",
+    "Кузнецов",
+    "Попов",
+    "Васильев",
+    "Соколов",
+    "Михайлов",
+    "Новиков",
+    "Фёдоров",
+    "Морозов",
+    "Волков",
+    "Алексеев",
+    "Лебедев",
+    "Семёнов",
+]
+
+
+def vehicle_number(i: int) -> str:
+    """Return a unique, realistic-looking plate number for index i."""
+    a, b, c = (_LETTERS[(i // n) % len(_LETTERS)] for n in (1, 12, 144))
+    return f"{a}{i % 1000:03d}{b}{c} {i // 1000 + 10}"
+
+
+def commander_name(i: int) -> str:
+    """Return a unique 'Фамилия И.О.' for index i."""
+    surname = _SURNAMES[i % len(_SURNAMES)]
+    initials = _LETTERS[(i // 16) % 12] + "." + _LETTERS[(i // 192) % 12] + "."
+    return f"{surname} {initials}{'' if i < 2304 else f' ({i})'}"
+
+
+def _insert_stays(conn: sqlite3.Connection, first_id: int, stays: list[tuple]) -> int:
+    """Insert (type, id, name, arrived, departed) stays; return the next stay id."""
+    rows = list(zip(range(first_id, first_id + len(stays)), stays))
+    conn.executemany(
+        "INSERT INTO presence "
+        "(id, entity_type, entity_id, entity_name, arrived, departed) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(sid, *stay) for sid, stay in rows],
+    )
+    conn.executemany(
+        "INSERT INTO presence_index (id, arrived, departed) VALUES (?, ?, ?)",
+        [
+            (
+                sid,
+                presence.minutes(arrived),
+                (
+                    presence.minutes(departed, round_up=True)
+                    if departed
+                    else presence.OPEN_END
+                ),
+            )
+            for sid, (_t, _i, _n, arrived, departed) in rows
+        ],
+    )
+    return first_id + len(stays)
+
+
+def generate(
+    db: Database,
+    vehicles: int = 500,
+    commanders: int = 100,
+    months: int = 3,
+    moves_per_day: float = 4.0,
+    seed: int = 1,
+    end: datetime | None = None,
+) -> dict:
+    """Populate an empty Database and return the counts that were written.
+
+    Every entity makes on average moves_per_day status changes per day,
+    alternating arrived/departed, between 06:00 and 23:00. The entity's
+    status, updated and version columns match its last generated event,
+    and every arrival opens a presence stay that its departure closes.
+    """
+    rnd = random.Random(seed)
+    end = end or datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=30 * months)
+    created = start.strftime("%Y-%m-%d %H:%M:%S")
+    conn = db._conn
+    # Finish the presence backfill of the new file while it is still empty,
+    # so it does not replay the generated events into duplicate stays.
+    backfill = db.migrate_in_background()
+    if backfill is not None:
+        backfill.join()
+
+    entities: list[tuple[str, int, str]] = []
+    with conn:
+        for i in range(vehicles):
+            name = vehicle_number(i)
+            cur = conn.execute(
+                "INSERT INTO vehicles (number, status, created) VALUES (?, 'idle', ?)",
+                (name, created),
+            )
+            entities.append(("vehicle", cur.lastrowid, name))
+        for i in range(commanders):
+            name = commander_name(i)
+            cur = conn.execute(
+                "INSERT INTO commanders (name, status, created) VALUES (?, 'idle', ?)",
+                (name, created),
+            )
+            entities.append(("commander", cur.lastrowid, name))
+        conn.executemany(
+            "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+            "VALUES (?, ?, ?, 'created', ?)",
+            [(t, eid, name, created) for t, eid, name in entities],
+        )
+
+    state: dict[tuple[str, int], list] = {}  # (type, id) → [status, ts, version]
+    arrived: dict[tuple[str, int], str] = {}  # (type, id) → ts of the open stay
+    stay_id = 1
+    total = len(entities)
+    day = start.replace(hour=0, minute=0, second=0)
+    while day < end:
+        batch = []
+        for etype, eid, name in entities:
+            moves = int(moves_per_day) + (rnd.random() < moves_per_day % 1)
+            for _ in range(moves):
+                ts = day + timedelta(seconds=rnd.randrange(6 * 3600, 23 * 3600))
+                if ts >= end:
+                    continue
+                batch.append((ts, etype, eid, name))
+        batch.sort(key=lambda e: e[0])
+        rows = []
+        stays = []
+        for ts, etype, eid, name in batch:
+            st = state.setdefault((etype, eid), ["departed", None, 0])
+            st[0] = "arrived" if st[0] == "departed" else "departed"
+            st[1] = ts.strftime("%Y-%m-%d %H:%M:%S")
+            st[2] += 1
+            rows.append((etype, eid, name, st[0], st[1]))
+            if st[0] == "arrived":
+                arrived[(etype, eid)] = st[1]
+            else:
+                stays.append((etype, eid, name, arrived.pop((etype, eid)), st[1]))
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            stay_id = _insert_stays(conn, stay_id, stays)
+        total += len(rows)
+        day += timedelta(days=1)
+
+    names = {(etype, eid): name for etype, eid, name in entities}
+    with conn:
+        for (etype, eid), (status, ts, version) in state.items():
+            table, _ = db._entity_table(etype)
+            conn.execute(
+                f"UPDATE {table} SET status = ?, updated = ?, version = ? WHERE id = ?",
+                (status, ts, version, eid),
+            )
+        _insert_stays(
+            conn,
+            stay_id,
+            [(t, i, names[(t, i)], ts, None) for (t, i), ts in arrived.items()],
+        )
+    db.rebuild_activity_rollups()
+
+    return {
+        "vehicles": vehicles,
+        "commanders": commanders,
+        "months": months,
+        "events": total,
+    }
@@ -1,13 +1,13 @@
-"""Application configuration: colors, statuses, and label mappings."""
+"""Application configuration: colors, statuses, and label mappings.
+
+The database layer, backups, maintenance and the headless tools import
+this module, so it must not import tkinter or customtkinter. The UI theme
+is applied by ui/theme.py when the window is created.
+"""
 
 import os
 import sys
 
-import customtkinter as ctk
-
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("dark-blue")
-
 
 def _get_db_path() -> str:
     """Return the absolute path to the SQLite database file.
@@ -28,6 +28,79 @@ DB_PATH = _get_db_path()
 # Purge runs lazily on every status change.
 EVENT_RETENTION_MONTHS: int = 1
 
+# Write contention when several processes share database.db.
+# The app writes on the Tk thread, which is frozen while a write waits: at
+# worst (retries + 1) × the busy timeout plus the backoff, about 3.2 s here.
+DB_BUSY_TIMEOUT_MS: int = 1000  # SQLite waits this long for a lock itself
+DB_WRITE_RETRIES: int = 2  # then the write is retried with backoff
+DB_RETRY_BASE_DELAY: float = 0.05  # seconds; doubles on every retry
+DB_RETRY_MAX_DELAY: float = 0.5
+
+# Online backups are written next to the database, into BACKUP_DIR.
+BACKUP_DIR = os.path.join(os.path.dirname(DB_PATH), "backups")
+BACKUP_KEEP: int = 10  # how many of the newest backups to keep
+BACKUP_INTERVAL_HOURS: float = 6  # 0 disables scheduled backups
+BACKUP_COMPRESS: bool = True  # gzip each backup after verification
+
+# Background WAL checkpointing and incremental vacuum, run only while idle.
+MAINTENANCE_POLL_SECONDS: float = 30  # how often the scheduler wakes up
+MAINTENANCE_IDLE_SECONDS: float = 60  # no writes for this long counts as idle
+MAINTENANCE_WAL_TRUNCATE_BYTES: int = 4 * 1024 * 1024  # TRUNCATE above this size
+MAINTENANCE_VACUUM_PAGES: int = 256  # pages reclaimed per incremental_vacuum step
+MAINTENANCE_VACUUM_STEPS: int = 16  # max steps per idle period
+
+# Card grids draw one screenful right away and the rest in chunks afterwards,
+# one chunk per event-loop turn, so the window paints and reacts early.
+GRID_FILL_CHUNK: int = 300  # cards drawn per turn
+
+# One line per launch with the time each startup phase finished.
+STARTUP_LOG = os.path.join(os.path.dirname(DB_PATH), "startup.log")
+STARTUP_LOG_KEEP: int = 200  # launches kept in the log
+
+# The accounting grids as they were on exit, painted at the next start
+# before the database is read; see snapshot.py.
+UI_SNAPSHOT = os.path.join(os.path.dirname(DB_PATH), "ui_snapshot.json")
+
+# Latency histograms of Database calls, shown on the hidden diagnostics tab
+# (Ctrl+Shift+D). With RASKHOD_DIAGNOSTICS=1 recording starts at launch.
+DIAGNOSTICS: bool = os.environ.get("RASKHOD_DIAGNOSTICS") == "1"
+DIAG_RECENT_CALLS: int = 500  # recent calls kept for the slowest-calls list
+DIAG_SQL_PER_CALL: int = 50  # statements kept per recorded call
+
+# Event-loop watchdog: a heartbeat on the Tk loop, checked from a thread. A
+# heartbeat later than the threshold is a stall; the main thread's stack is
+# sampled while it lasts and the stall is written to STALL_LOG.
+WATCHDOG_ENABLED: bool = True
+WATCHDOG_HEARTBEAT_MS: int = 100  # how often the Tk loop checks in
+WATCHDOG_THRESHOLD_MS: int = 250  # lateness that counts as a stall
+WATCHDOG_SAMPLE_MS: int = 20  # stack sampling interval during a stall
+WATCHDOG_REPORT_SECONDS: float = 5  # long stalls are also logged while ongoing
+STALL_LOG = os.path.join(os.path.dirname(DB_PATH), "stalls.log")
+STALL_LOG_BYTES: int = 1024 * 1024  # rotated at this size
+STALL_LOG_BACKUPS: int = 3  # rotated files kept
+
+# On-demand cProfile captures: Ctrl+Shift+P starts and stops one; with
+# `main.py --profile` or RASKHOD_PROFILE=1 the app is profiled from launch.
+# Each capture is a .pstats file plus a text summary next to the database.
+PROFILE_ON_START: bool = os.environ.get("RASKHOD_PROFILE") == "1"
+PROFILE_DIR = os.path.dirname(DB_PATH)
+PROFILE_TOP_N: int = 40  # functions listed per table in the summary
+
+# Columnar copy of the event log for analytics (eventcache.py, needs NumPy).
+EVENT_CACHE_DIR = os.path.join(os.path.dirname(DB_PATH), "event_cache")
+
+# Movement reports (reports.py) are written into REPORTS_DIR. The date range
+# is split into shards aggregated by REPORT_WORKERS processes; 0 means one
+# per CPU. The app's build has no process pool and always uses one.
+REPORTS_DIR = os.path.join(os.path.dirname(DB_PATH), "reports")
+REPORT_WORKERS: int = 0
+# The daily duty report ("суточный расход") covers 24 hours from this hour.
+DUTY_DAY_START_HOUR: int = 0
+
+# Hours an entity may stay departed before its card is flagged as overdue
+# (alerts.py); 0 turns the alerts off for that type.
+OVERDUE_HOURS: dict[str, float] = {"vehicle": 12, "commander": 24}
+
 C: dict[str, str] = {
     "bg": "#0f1117",
     "surface": "#1a1d27",
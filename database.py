@@ -2,10 +2,24 @@
 
 import calendar
 import logging
+import os
+import random
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterator, NamedTuple, TypeVar
 
-from config import DB_PATH, EVENT_RETENTION_MONTHS
+import migrations
+import presence
+from config import (
+    DB_BUSY_TIMEOUT_MS,
+    DB_PATH,
+    DB_RETRY_BASE_DELAY,
+    DB_RETRY_MAX_DELAY,
+    DB_WRITE_RETRIES,
+    EVENT_RETENTION_MONTHS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +36,72 @@ class NotFoundError(DatabaseError):
     """Raised when a requested record does not exist."""
 
 
+class ConflictError(DatabaseError):
+    """Raised when a record was changed elsewhere since the caller read it."""
+
+
+class IncompleteError(DatabaseError):
+    """Raised when derived data is still being backfilled from the event log."""
+
+
+class ContentionPolicy(NamedTuple):
+    """How writes behave when another process holds the database lock.
+
+    busy_timeout_ms: how long SQLite itself waits for a lock before failing.
+    immediate:       take the write lock at BEGIN (BEGIN IMMEDIATE) instead of
+                     on the first write, so a transaction never fails halfway.
+    max_retries:     extra attempts after 'database is locked' / 'busy'.
+    base_delay:      first backoff in seconds; doubles on every retry.
+    max_delay:       upper bound for a single backoff.
+
+    A write blocks its thread for up to (max_retries + 1) × busy_timeout_ms
+    plus the backoff before it fails; the defaults in config.py keep that to
+    a few seconds because the app writes on the Tk thread.
+    """
+
+    busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS
+    immediate: bool = True
+    max_retries: int = DB_WRITE_RETRIES
+    base_delay: float = DB_RETRY_BASE_DELAY
+    max_delay: float = DB_RETRY_MAX_DELAY
+
+
+class StatusChange(NamedTuple):
+    """What update_status_and_log() wrote."""
+
+    version: int  # the entity's new version
+    ts: str  # its 'updated' and the event's ts, "YYYY-MM-DD HH:MM:SS"
+
+
+_T = TypeVar("_T")
+
+# Every entity and event type. The position of a type is its code in
+# iter_event_codes(), and EVENT_TYPES are the keys of activity_series() items.
+ENTITY_TYPES: tuple[str, ...] = ("vehicle", "commander")
+EVENT_TYPES: tuple[str, ...] = ("arrived", "departed", "created", "deleted")
+
+# activity_series() bucket → SQL expression for the bucket's first day.
+_BUCKET_SQL: dict[str, str] = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",
+    "month": "substr(day, 1, 7) || '-01'",
+}
+
+
+def _is_busy(exc: sqlite3.Error) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED, the errors worth retrying."""
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    msg = str(exc)
+    return "locked" in msg or "busy" in msg
+
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
 def _now() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return datetime.now().strftime(_TS_FORMAT)
 
 
 def _cutoff_ts(months: int) -> str:
@@ -54,8 +132,20 @@ def _cutoff_ts(months: int) -> str:
     return cutoff.strftime("%Y-%m-%d %H:%M:%S")
 
 
-# Whitelist for table names used in dynamic SQL — prevents injection in _migrate.
-_ALLOWED_TABLES: frozenset[str] = frozenset({"vehicles", "commanders"})
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(first: date, bucket: str) -> date:
+    if bucket == "week":
+        return first + timedelta(days=7)
+    if bucket == "month":
+        return (first + timedelta(days=31)).replace(day=1)
+    return first + timedelta(days=1)
 
 
 class Database:
@@ -65,59 +155,118 @@ class Database:
     methods. Callers must not access _conn directly.
     """
 
-    def __init__(self, path: str = DB_PATH):
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        policy: ContentionPolicy | None = None,
+        migrate: bool = True,
+    ):
+        """Open the database and apply pending migrations.
+
+        With migrate=False the caller must call migrate() before using it;
+        the app does that to time the two steps separately.
+        """
+        self._path = path
+        self._policy = policy or ContentionPolicy()
+        self._last_write = time.monotonic()
+        self._background_migrations: list = []
+        self._presence_ready = False
         try:
-            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn = sqlite3.connect(
+                path,
+                check_same_thread=False,
+                # The implicit BEGIN before the first INSERT/UPDATE/DELETE of
+                # every write transaction becomes BEGIN IMMEDIATE.
+                isolation_level="IMMEDIATE" if self._policy.immediate else "DEFERRED",
+            )
+            self._conn.execute(f"PRAGMA busy_timeout = {self._policy.busy_timeout_ms}")
             self._conn.row_factory = sqlite3.Row
             self._conn.execute("PRAGMA journal_mode=WAL")
             self._conn.execute("PRAGMA synchronous=NORMAL")
             self._conn.execute("PRAGMA foreign_keys=ON")
-            self._migrate()
         except sqlite3.Error as e:
             raise DatabaseError(f"Cannot open database '{path}': {e}") from e
+        if migrate:
+            self.migrate()
 
-    def _migrate(self) -> None:
-        """Create tables on first run and add any missing columns."""
-        self._conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS vehicles (
-                id      INTEGER PRIMARY KEY AUTOINCREMENT,
-                number  TEXT    NOT NULL UNIQUE,
-                status  TEXT    NOT NULL DEFAULT 'idle',
-                created TEXT    NOT NULL,
-                updated TEXT    DEFAULT NULL
-            );
-            CREATE TABLE IF NOT EXISTS commanders (
-                id      INTEGER PRIMARY KEY AUTOINCREMENT,
-                name    TEXT    NOT NULL UNIQUE,
-                status  TEXT    NOT NULL DEFAULT 'idle',
-                created TEXT    NOT NULL,
-                updated TEXT    DEFAULT NULL
-            );
-            CREATE TABLE IF NOT EXISTS events (
-                id          INTEGER PRIMARY KEY AUTOINCREMENT,
-                entity_type TEXT    NOT NULL,
-                entity_id   INTEGER NOT NULL,
-                entity_name TEXT    NOT NULL,
-                event_type  TEXT    NOT NULL,
-                ts          TEXT    NOT NULL
-            );
-            CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
-            """
-        )
+    @property
+    def path(self) -> str:
+        """The database file this instance was opened on."""
+        return self._path
 
-        # Backfill 'updated' column for databases created before it was added.
-        for table in ("vehicles", "commanders"):
-            if table not in _ALLOWED_TABLES:
-                raise ValueError(f"Unexpected table name in migration: {table!r}")
-            cur = self._conn.execute(f"PRAGMA table_info({table})")
-            columns = [row[1] for row in cur.fetchall()]
-            if "updated" not in columns:
-                self._conn.execute(
-                    f"ALTER TABLE {table} ADD COLUMN updated TEXT DEFAULT NULL"
-                )
+    def migrate(self) -> None:
+        """Apply pending schema migrations (see migrations.py).
+
+        Foreground data migrations run here; background ones are kept for
+        migrate_in_background().
+        """
+        try:
+            self._background_migrations = migrations.upgrade(self._conn)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Cannot open database '{self._path}': {e}") from e
+        if self._is_memory():
+            # A new in-memory database has nothing to backfill.
+            self.migrate_in_background()
+
+    def migrate_in_background(self) -> threading.Thread | None:
+        """Finish background data migrations on a worker thread.
 
+        The worker uses its own connection and commits chunk by chunk, so the
+        app stays usable; progress survives a restart. Returns the started
+        thread, or None when nothing is pending.
+        """
+        pending, self._background_migrations = self._background_migrations, []
+        if not pending:
+            return None
+        if self._is_memory():
+            # In-memory databases are private to the main connection.
+            for m in pending:
+                migrations.run_data_migration(self._conn, m)
+            return None
+
+        def run() -> None:
+            conn = self._connect_aux()
+            try:
+                for m in pending:
+                    migrations.run_data_migration(conn, m)
+            except sqlite3.Error as e:
+                logger.error("Background migration failed: %s", e)
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=run, name="migrations", daemon=True)
+        thread.start()
+        return thread
+
+    def _commit(self) -> None:
+        """Commit the current transaction and remember when the last write happened."""
         self._conn.commit()
+        self._last_write = time.monotonic()
+
+    def _retrying(self, write: Callable[[], _T]) -> _T:
+        """Run a write transaction, retrying it while the database is locked.
+
+        write() must perform the whole transaction including the commit.
+        Between attempts the transaction is rolled back and the thread sleeps
+        with exponential backoff and jitter, so competing processes do not
+        retry in lockstep. Any other error, or the last busy error, is raised.
+        """
+        policy = self._policy
+        attempt = 0
+        while True:
+            try:
+                return write()
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt >= policy.max_retries:
+                    raise
+                self._conn.rollback()
+                cap = min(policy.base_delay * (2**attempt), policy.max_delay)
+                delay = cap / 2 + random.uniform(0, cap / 2)
+                logger.debug(
+                    "Database busy (%s), retry %d in %.3fs", e, attempt + 1, delay
+                )
+                time.sleep(delay)
+                attempt += 1
 
     @staticmethod
     def _entity_table(entity_type: str) -> tuple[str, str]:
@@ -128,25 +277,41 @@ class Database:
             return "commanders", "name"
         raise ValueError(f"Unknown entity type: {entity_type!r}")
 
+    @classmethod
+    def _entity_rows_sql(cls, entity_type: str) -> str:
+        """The iter_entities() query for one entity type."""
+        table, col = cls._entity_table(entity_type)
+        return (
+            f"SELECT id, {col}, status, COALESCE(updated, created), version "
+            f"FROM {table} WHERE {col} LIKE ? ORDER BY {col}"
+        )
+
     def _add_entity(self, entity_type: str, value: str) -> int:
         """Insert a new entity row and return its generated id."""
         table, col = self._entity_table(entity_type)
         value = value.strip()
         if not value:
             raise ValueError(f"{entity_type.capitalize()} value must not be empty.")
-        try:
+
+        def write() -> int:
             cur = self._conn.execute(
                 f"INSERT INTO {table} ({col}, status, created) VALUES (?, 'idle', ?)",
                 (value, _now()),
             )
             self._log(entity_type, cur.lastrowid, value, "created")
-            self._conn.commit()
+            self._commit()
             return cur.lastrowid
+
+        try:
+            return self._retrying(write)
         except sqlite3.IntegrityError:
+            # Release the write lock taken by BEGIN IMMEDIATE.
+            self._conn.rollback()
             raise DuplicateError(
                 f"{entity_type.capitalize()} '{value}' already exists."
             )
         except sqlite3.Error as e:
+            self._conn.rollback()
             raise DatabaseError(f"Failed to add {entity_type}: {e}") from e
 
     def _delete_entity(self, entity_type: str, eid: int) -> None:
@@ -160,10 +325,14 @@ class Database:
             raise DatabaseError(f"Failed to delete {entity_type}: {e}") from e
         if not row:
             raise NotFoundError(f"{entity_type.capitalize()} id={eid} not found.")
-        try:
+
+        def write() -> None:
             self._log(entity_type, eid, row[0], "deleted")
             self._conn.execute(f"DELETE FROM {table} WHERE id = ?", (eid,))
-            self._conn.commit()
+            self._commit()
+
+        try:
+            self._retrying(write)
         except sqlite3.Error as e:
             self._conn.rollback()
             raise DatabaseError(f"Failed to delete {entity_type}: {e}") from e
@@ -179,27 +348,244 @@ class Database:
         except sqlite3.Error as e:
             raise DatabaseError(f"Failed to fetch {entity_type}s: {e}") from e
 
+    def _get_entity(self, entity_type: str, eid: int) -> sqlite3.Row | None:
+        """Return a single entity row by id, or None if it does not exist."""
+        table, _ = self._entity_table(entity_type)
+        try:
+            return self._conn.execute(
+                f"SELECT * FROM {table} WHERE id = ?", (eid,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to fetch {entity_type}: {e}") from e
+
     def _log(
         self, entity_type: str, entity_id: int, entity_name: str, event_type: str
     ) -> None:
         """Append an event row without committing — caller is responsible for commit."""
+        ts = _now()
         self._conn.execute(
             "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
             "VALUES (?, ?, ?, ?, ?)",
-            (entity_type, entity_id, entity_name, event_type, _now()),
+            (entity_type, entity_id, entity_name, event_type, ts),
         )
+        self._count_activity(entity_type, event_type, ts)
+        self._record_presence(entity_type, entity_id, entity_name, event_type, ts)
 
-    def _purge_old_events(self) -> None:
-        """Delete events older than EVENT_RETENTION_MONTHS calendar months.
+    def _count_activity(self, entity_type: str, event_type: str, ts: str) -> None:
+        """Add one event to its hourly and daily rollup rows, without committing."""
+        self._conn.execute(
+            "INSERT INTO activity_hourly (hour, entity_type, event_type, count) "
+            "VALUES (?, ?, ?, 1) ON CONFLICT (hour, entity_type, event_type) "
+            "DO UPDATE SET count = count + 1",
+            (ts[:13], entity_type, event_type),
+        )
+        self._conn.execute(
+            "INSERT INTO activity_daily (day, entity_type, event_type, count) "
+            "VALUES (?, ?, ?, 1) ON CONFLICT (day, entity_type, event_type) "
+            "DO UPDATE SET count = count + 1",
+            (ts[:10], entity_type, event_type),
+        )
+
+    def _presence_complete(self) -> bool:
+        """True once the presence backfill has finished; checked until it has."""
+        if not self._presence_ready:
+            self._presence_ready = not migrations.is_pending(
+                self._conn, migrations.PRESENCE_BACKFILL
+            )
+        return self._presence_ready
+
+    def _record_presence(
+        self,
+        entity_type: str,
+        entity_id: int,
+        entity_name: str,
+        event_type: str,
+        ts: str,
+    ) -> None:
+        """Apply an event to the presence intervals, without committing.
+
+        While the backfill is running the event is left to it: the backfill
+        replays the log in id order and reaches this event as well.
+        """
+        if self._presence_complete():
+            presence.record(
+                self._conn, entity_type, entity_id, entity_name, event_type, ts
+            )
+
+    def _purge_old_events(self) -> int:
+        """Delete events and presence intervals older than EVENT_RETENTION_MONTHS.
 
         Uses calendar arithmetic (see _cutoff_ts) so year rollovers and
         months with different day counts are handled correctly.
         Runs without its own commit — the caller commits the surrounding
         transaction, so the purge and the new event are atomic.
+        Returns the number of events deleted.
         """
         cutoff = _cutoff_ts(EVENT_RETENTION_MONTHS)
-        self._conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,))
-        logger.debug("Event purge: removed rows with ts < %s", cutoff)
+        # Presence intervals that ended before the cutoff go with their events.
+        self._conn.execute(
+            "DELETE FROM presence_index WHERE id IN "
+            "(SELECT id FROM presence WHERE departed < ?)",
+            (cutoff,),
+        )
+        self._conn.execute("DELETE FROM presence WHERE departed < ?", (cutoff,))
+        cur = self._conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,))
+        if cur.rowcount:
+            self._bump_event_generation()
+        logger.debug("Event purge: removed %d rows with ts < %s", cur.rowcount, cutoff)
+        return cur.rowcount
+
+    def _bump_event_generation(self) -> None:
+        """Record that events were deleted, without committing; see
+        event_log_version()."""
+        self._conn.execute("UPDATE event_log_state SET generation = generation + 1")
+
+    def _is_memory(self) -> bool:
+        return self._path == ":memory:" or self._path.startswith("file::memory:")
+
+    def set_trace(self, callback: Callable[[str], None] | None) -> None:
+        """Call callback(sql) for every statement run on the main connection.
+
+        Bound parameters are expanded into the SQL text. Pass None to stop.
+        Used by the query-plan tests and the diagnostics tab.
+        """
+        self._conn.set_trace_callback(callback)
+
+    def explain(self, sql: str) -> list[str]:
+        """Return the EXPLAIN QUERY PLAN of a statement, one indented line per step.
+
+        sql must have its parameters filled in, as set_trace() reports it.
+        """
+        try:
+            rows = self._conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Cannot explain statement: {e}") from e
+        depth = {0: -1}
+        lines = []
+        for node, parent, _unused, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node] + detail)
+        return lines
+
+    def _connect_aux(self) -> sqlite3.Connection:
+        """Open a separate connection to the same file for background work.
+
+        Worker threads use their own connection so they never interleave
+        statements with a transaction open on the main connection.
+        """
+        conn = sqlite3.connect(self._path)
+        conn.execute(f"PRAGMA busy_timeout = {self._policy.busy_timeout_ms}")
+        return conn
+
+    # Maintenance
+
+    def idle_seconds(self) -> float:
+        """Return seconds since the last write committed through this Database.
+
+        Writes by other processes sharing the file are not seen. Maintenance
+        that runs while they write stays safe: PASSIVE checkpoints never
+        wait, and each vacuum step is one short write under busy_timeout.
+        """
+        return time.monotonic() - self._last_write
+
+    def checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        """Run a WAL checkpoint and return (busy, wal_frames, checkpointed_frames).
+
+        PASSIVE never waits for readers or writers; TRUNCATE additionally
+        resets the -wal file to zero bytes once every frame is copied back.
+        """
+        if mode not in {"PASSIVE", "FULL", "RESTART", "TRUNCATE"}:
+            raise ValueError(f"Unknown checkpoint mode: {mode!r}")
+        if self._is_memory():
+            return 0, 0, 0
+        try:
+            conn = self._connect_aux()
+            try:
+                row = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"WAL checkpoint failed: {e}") from e
+        return row[0], row[1], row[2]
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """Return up to `pages` free pages to the OS and report how many were freed."""
+        if self._is_memory():
+            return 0
+        try:
+            conn = self._connect_aux()
+            try:
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                # execute() steps this pragma only once (one page); executescript
+                # runs it to completion and commits.
+                conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+                after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Incremental vacuum failed: {e}") from e
+        return before - after
+
+    def storage_info(self) -> dict:
+        """Return sizes for diagnostics as a dict with keys: file_size, wal_size,
+        page_size, page_count, freelist_count.
+        """
+        memory = self._is_memory()
+        try:
+            conn = self._conn if memory else self._connect_aux()
+            try:
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            finally:
+                if conn is not self._conn:
+                    conn.close()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to read storage info: {e}") from e
+
+        def size(path: str) -> int:
+            try:
+                return os.path.getsize(path)
+            except OSError:
+                return 0
+
+        return {
+            "file_size": 0 if memory else size(self._path),
+            "wal_size": 0 if memory else size(self._path + "-wal"),
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist,
+        }
+
+    # Backup
+
+    def backup(
+        self, dest: str, pages: int = 64, sleep: float = 0.005, progress=None
+    ) -> None:
+        """Copy the live database into dest with the SQLite online backup API.
+
+        The copy is made in steps of `pages` pages with a short sleep between
+        them, from a dedicated read connection, so writers on the main
+        connection are never blocked for more than one step. The result is
+        always a consistent snapshot, even while the WAL is being written.
+
+        Raises:
+            DatabaseError: On any SQLite error.
+        """
+        src = None
+        dst = None
+        try:
+            # An in-memory database is invisible to other connections.
+            src = self._conn if self._is_memory() else self._connect_aux()
+            dst = sqlite3.connect(dest)
+            src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Backup to '{dest}' failed: {e}") from e
+        finally:
+            if dst is not None:
+                dst.close()
+            if src is not None and src is not self._conn:
+                src.close()
 
     # Vehicles
 
@@ -243,21 +629,87 @@ class Database:
         """Return vehicles or commanders filtered by search substring."""
         return self._get_entities(entity_type, search)
 
+    def get_entity(self, entity_type: str, eid: int) -> sqlite3.Row | None:
+        """Return one vehicle or commander by id, or None if it was deleted."""
+        return self._get_entity(entity_type, eid)
+
+    def iter_entities(
+        self, entity_type: str, search: str = ""
+    ) -> Iterator[tuple[int, str, str, str, int]]:
+        """Yield (id, name, status, last change ts, version) straight from the cursor.
+
+        The lean variant of get_entities() for filling large card grids:
+        rows are plain tuples and are never collected into a list.
+        """
+        cur = self._conn.cursor()
+        cur.row_factory = None
+        try:
+            cur.execute(self._entity_rows_sql(entity_type), (f"%{search.strip()}%",))
+            yield from cur
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to fetch {entity_type}s: {e}") from e
+
+    def read_entities(
+        self, entity_types: tuple[str, ...] = ("vehicle", "commander")
+    ) -> dict[str, list[tuple[int, str, str, str, int]]]:
+        """Return the iter_entities() rows of several types from one read transaction.
+
+        Safe to call from a worker thread: it runs on its own connection
+        (the main one for in-memory databases), and all types are read from
+        the same committed state. The app uses it to reconcile the grids
+        painted from the startup snapshot.
+        """
+        conn = self._conn if self._is_memory() else self._connect_aux()
+        try:
+            if conn is not self._conn:
+                conn.execute("BEGIN")
+            result = {}
+            for entity_type in entity_types:
+                cur = conn.cursor()
+                cur.row_factory = None
+                cur.execute(self._entity_rows_sql(entity_type), ("%%",))
+                result[entity_type] = cur.fetchall()
+            return result
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to read entities: {e}") from e
+        finally:
+            if conn is not self._conn:
+                conn.close()
+
     # Status
 
     def update_status_and_log(
-        self, entity_type: str, entity_id: int, entity_name: str, status: str
-    ) -> None:
+        self,
+        entity_type: str,
+        entity_id: int,
+        entity_name: str,
+        status: str,
+        expected_version: int | None = None,
+    ) -> StatusChange:
         """Update entity status and write the event in a single transaction.
 
         Both the UPDATE and the event INSERT share one timestamp so the
-        'updated' column and the event log stay in sync.
+        'updated' column and the event log stay in sync. Every update bumps
+        the entity's version; when expected_version is given the UPDATE only
+        applies if the row still has that version (compare-and-set), so a
+        station acting on a stale card cannot overwrite a newer change.
 
-        Also lazily purges event rows older than EVENT_RETENTION_MONTHS within
-        the same transaction, so the purge and the new write are always atomic.
+        The event is counted in the activity rollups and opens or closes the
+        entity's presence interval, and event rows older than
+        EVENT_RETENTION_MONTHS are lazily purged, all within the same
+        transaction, so the derived tables, the purge and the new write are
+        atomic.
+
+        If another process holds the write lock, the transaction is retried
+        according to the ContentionPolicy before giving up.
+
+        Returns the entity's new version and the timestamp that was stored,
+        so callers can show and schedule from exactly what the log holds.
 
         Raises:
             ValueError:    For unknown entity_type or status values.
+            NotFoundError: If the entity no longer exists.
+            ConflictError: If expected_version no longer matches.
             DatabaseError: On any SQLite error.
         """
         table, _ = self._entity_table(entity_type)
@@ -266,24 +718,142 @@ class Database:
             raise ValueError(f"Unknown status: {status!r}")
 
         ts = _now()
-        try:
-            self._conn.execute(
-                f"UPDATE {table} SET status = ?, updated = ? WHERE id = ?",
-                (status, ts, entity_id),
-            )
+
+        def write() -> StatusChange:
+            if expected_version is None:
+                cur = self._conn.execute(
+                    f"UPDATE {table} SET status = ?, updated = ?, version = version + 1 "
+                    "WHERE id = ?",
+                    (status, ts, entity_id),
+                )
+            else:
+                cur = self._conn.execute(
+                    f"UPDATE {table} SET status = ?, updated = ?, version = version + 1 "
+                    "WHERE id = ? AND version = ?",
+                    (status, ts, entity_id, expected_version),
+                )
+            if cur.rowcount == 0:
+                # Nothing was written; release the write lock before raising.
+                self._conn.rollback()
+                if self._get_entity(entity_type, entity_id) is None:
+                    raise NotFoundError(
+                        f"{entity_type.capitalize()} id={entity_id} not found."
+                    )
+                raise ConflictError(
+                    f"{entity_type.capitalize()} '{entity_name}' was changed "
+                    "by another station."
+                )
+            version = self._conn.execute(
+                f"SELECT version FROM {table} WHERE id = ?", (entity_id,)
+            ).fetchone()[0]
             self._conn.execute(
                 "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
                 "VALUES (?, ?, ?, ?, ?)",
                 (entity_type, entity_id, entity_name, status, ts),
             )
+            self._count_activity(entity_type, status, ts)
+            self._record_presence(entity_type, entity_id, entity_name, status, ts)
             self._purge_old_events()
-            self._conn.commit()
+            self._commit()
+            return StatusChange(version, ts)
+
+        try:
+            return self._retrying(write)
         except sqlite3.Error as e:
             self._conn.rollback()
             raise DatabaseError(f"Failed to update status: {e}") from e
 
     # Events
 
+    def iter_event_codes(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after_id: int = 0,
+        names: bool = False,
+    ) -> Iterator[tuple]:
+        """Yield every event as plain integers, for bulk analytics.
+
+        Each row is (id, ts, entity type code, entity_id, event type code):
+        ts is in epoch seconds with the stored local time read as UTC, and
+        the codes are positions in ENTITY_TYPES and EVENT_TYPES (-1 for
+        anything else). With names every row ends with entity_name too.
+
+        With start and/or end only events with start <= ts < end are read,
+        through idx_events_ts, in no particular order. Otherwise rows come in
+        id order, starting after after_id.
+
+        Runs on its own connection (the main one for in-memory databases)
+        inside one read transaction, so it is safe on a worker thread and
+        sees one committed state.
+        """
+
+        def codes(column: str, values: tuple[str, ...]) -> str:
+            cases = " ".join(f"WHEN '{v}' THEN {i}" for i, v in enumerate(values))
+            return f"CASE {column} {cases} ELSE -1 END"
+
+        sql = (
+            "SELECT id, CAST(strftime('%s', ts) AS INTEGER), "
+            f"{codes('entity_type', ENTITY_TYPES)}, entity_id, "
+            f"{codes('event_type', EVENT_TYPES)}"
+            f"{', entity_name' if names else ''} FROM events WHERE id > :after"
+        )
+        params = {
+            "after": after_id,
+            "start": start.strftime(_TS_FORMAT) if start else "",
+            "end": end.strftime(_TS_FORMAT) if end else "9999",
+        }
+        if start or end:
+            sql += " AND ts >= :start AND ts < :end"
+        else:
+            sql += " ORDER BY id"
+        yield from self._read_rows(sql, params)
+
+    def iter_event_ids(self, upto: int) -> Iterator[int]:
+        """Yield the id of every event with id <= upto, in id order.
+
+        Runs like iter_event_codes(); the event cache uses it to find the
+        rows a purge has removed.
+        """
+        for row in self._read_rows(
+            "SELECT id FROM events WHERE id <= ? ORDER BY id", (upto,)
+        ):
+            yield row[0]
+
+    def event_log_version(self) -> tuple[int, int]:
+        """Return (generation, max id) of the event log.
+
+        The generation goes up whenever events are deleted (by the purge or
+        clear_events()), so a copy of the log that saw the same generation
+        only lacks the events with a greater id.
+        """
+        try:
+            return tuple(
+                self._conn.execute(
+                    "SELECT generation, (SELECT COALESCE(MAX(id), 0) FROM events) "
+                    "FROM event_log_state"
+                ).fetchone()
+            )
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to read event log state: {e}") from e
+
+    def _read_rows(self, sql: str, params) -> Iterator[tuple]:
+        """Yield the rows of one query, as plain tuples, from its own read
+        transaction on its own connection (the main one for in-memory
+        databases)."""
+        conn = self._conn if self._is_memory() else self._connect_aux()
+        try:
+            if conn is not self._conn:
+                conn.execute("BEGIN")
+            cur = conn.cursor()
+            cur.row_factory = None
+            yield from cur.execute(sql, params)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to read events: {e}") from e
+        finally:
+            if conn is not self._conn:
+                conn.close()
+
     def get_events(self, search: str = "", limit: int = 300) -> list[sqlite3.Row]:
         """Return events filtered by a search string, newest first."""
         try:
@@ -301,11 +871,26 @@ class Database:
             raise DatabaseError(f"Failed to fetch events: {e}") from e
 
     def clear_events(self) -> None:
-        """Delete all event history."""
-        try:
+        """Delete all event history, including the activity rollups and the
+        presence intervals that have ended.
+        """
+
+        def write() -> None:
             self._conn.execute("DELETE FROM events")
-            self._conn.commit()
+            self._bump_event_generation()
+            self._conn.execute(
+                "DELETE FROM presence_index WHERE id IN "
+                "(SELECT id FROM presence WHERE departed IS NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM presence WHERE departed IS NOT NULL")
+            self._conn.execute("DELETE FROM activity_hourly")
+            self._conn.execute("DELETE FROM activity_daily")
+            self._commit()
+
+        try:
+            self._retrying(write)
         except sqlite3.Error as e:
+            self._conn.rollback()
             raise DatabaseError(f"Failed to clear events: {e}") from e
 
     def recent_activity(self, limit: int = 5) -> list[sqlite3.Row]:
@@ -337,3 +922,154 @@ class Database:
             return dict(row)
         except sqlite3.Error as e:
             raise DatabaseError(f"Failed to fetch statistics: {e}") from e
+
+    def activity_series(
+        self,
+        start: date,
+        end: date,
+        bucket: str = "day",
+        entity_type: str | None = None,
+    ) -> list[dict]:
+        """Return event counts per day, week or month from start to end inclusive.
+
+        Each item is a dict with "start" (the bucket's first day: the day
+        itself, the Monday of the week or the 1st of the month) and a count
+        per event type: arrived, departed, created, deleted. Buckets without
+        events are included with zeros; the first and last bucket only count
+        the days inside the range. With entity_type only that type is counted.
+
+        Read from the daily rollups, so the cost depends on the length of the
+        range and not on the number of events, and the counts reach back past
+        EVENT_RETENTION_MONTHS.
+
+        Raises:
+            ValueError:    For an unknown bucket or entity_type, or end < start.
+            DatabaseError: On any SQLite error.
+        """
+        if bucket not in _BUCKET_SQL:
+            raise ValueError(f"Unknown bucket: {bucket!r}")
+        if entity_type is not None:
+            self._entity_table(entity_type)
+        if end < start:
+            raise ValueError(f"end {end} is before start {start}")
+
+        try:
+            rows = self._conn.execute(
+                f"""
+                SELECT {_BUCKET_SQL[bucket]} AS bucket, event_type, SUM(count)
+                FROM activity_daily
+                WHERE day BETWEEN :start AND :end
+                  AND (:etype IS NULL OR entity_type = :etype)
+                GROUP BY bucket, event_type
+                """,
+                {
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "etype": entity_type,
+                },
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to fetch activity: {e}") from e
+
+        series: dict[str, dict] = {}
+        first = _bucket_start(start, bucket)
+        while first <= end:
+            series[first.isoformat()] = {
+                "start": first,
+                **dict.fromkeys(EVENT_TYPES, 0),
+            }
+            first = _next_bucket(first, bucket)
+        for key, event_type, count in rows:
+            if event_type in EVENT_TYPES:
+                series[key][event_type] = count
+        return list(series.values())
+
+    def rebuild_activity_rollups(self) -> None:
+        """Recount the activity rollups from the event log.
+
+        Hours from the oldest event in the log on are recounted. Older hours,
+        whose events the purge has removed, keep their counts; the purge
+        cutoff is always midnight, so it never leaves part of an hour. The
+        daily rollups are then summed again from the hourly ones.
+
+        Raises:
+            DatabaseError: On any SQLite error.
+        """
+
+        def write() -> None:
+            first = self._conn.execute(
+                "SELECT substr(MIN(ts), 1, 13) FROM events"
+            ).fetchone()[0]
+            if first is not None:
+                self._conn.execute(
+                    "DELETE FROM activity_hourly WHERE hour >= ?", (first,)
+                )
+                self._conn.execute(
+                    "INSERT INTO activity_hourly (hour, entity_type, event_type, count) "
+                    "SELECT substr(ts, 1, 13), entity_type, event_type, COUNT(*) "
+                    "FROM events GROUP BY 1, 2, 3"
+                )
+            self._conn.execute("DELETE FROM activity_daily")
+            self._conn.execute(
+                "INSERT INTO activity_daily (day, entity_type, event_type, count) "
+                "SELECT substr(hour, 1, 10), entity_type, event_type, SUM(count) "
+                "FROM activity_hourly GROUP BY 1, 2, 3"
+            )
+            self._commit()
+
+        try:
+            self._retrying(write)
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            raise DatabaseError(f"Failed to rebuild activity rollups: {e}") from e
+
+    # Presence
+
+    def present_at(self, ts: datetime) -> list[sqlite3.Row]:
+        """Return the presence intervals that cover the moment ts.
+
+        An entity is present from its arrival up to, but not including, its
+        departure. Rows have entity_type, entity_id, entity_name, arrived and
+        departed (None while still on site), ordered by type and name.
+
+        Raises:
+            IncompleteError: While the presence backfill is still running.
+            DatabaseError:   On any SQLite error.
+        """
+        return self.present_between(ts, ts)
+
+    def present_between(self, start: datetime, end: datetime) -> list[sqlite3.Row]:
+        """Return the presence intervals that overlap start..end inclusive.
+
+        Rows as in present_at(). The R*Tree finds the candidates in whole
+        minutes; the stored timestamps then decide exactly.
+
+        Raises:
+            ValueError:      If end < start.
+            IncompleteError: While the presence backfill of an upgraded
+                             database is still running in the background.
+            DatabaseError:   On any SQLite error.
+        """
+        if end < start:
+            raise ValueError(f"end {end} is before start {start}")
+        a, b = start.strftime(_TS_FORMAT), end.strftime(_TS_FORMAT)
+        try:
+            if not self._presence_complete():
+                raise IncompleteError("Presence intervals are still being backfilled.")
+            return self._conn.execute(
+                """
+                SELECT p.entity_type, p.entity_id, p.entity_name, p.arrived, p.departed
+                FROM presence_index AS r JOIN presence AS p ON p.id = r.id
+                WHERE r.arrived <= :b_min AND r.departed >= :a_min
+                  AND p.arrived <= :b AND (p.departed IS NULL OR p.departed > :a)
+                ORDER BY p.entity_type, p.entity_name, p.arrived
+                """,
+                {
+                    "a": a,
+                    "b": b,
+                    "a_min": presence.minutes(a),
+                    "b_min": presence.minutes(b, round_up=True),
+                },
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Failed to fetch presence: {e}") from e
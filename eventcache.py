@@ -0,0 +1,293 @@
+"""On-disk columnar copy of the event log, memory-mapped for analytics.
+
+The cache keeps one fixed-width file per column: id, ts (epoch seconds, as
+in Database.iter_event_codes()), entity type, entity id, event type and
+the index of the entity's name in a string table. refresh() appends the
+events with an id above the cached watermark, so bringing the cache up to
+date reads only the new rows; columns() maps the files with numpy.memmap,
+so reading them back copies nothing.
+
+Deleted events are found through Database.event_log_version(): when its
+generation differs from the cached one (the purge or clear_events() ran),
+the cache is compacted to the ids still in the log before new rows are
+appended. A log whose max id went below the watermark, or whose
+generation went down (a restored backup), is cached again from scratch.
+
+Compaction writes a new set of files and switches meta.json to it; the old
+set is removed once nothing maps it any more (on Windows a mapped file
+cannot be deleted), at the latest on the next compaction or open.
+
+The cache belongs to one process: two processes must not refresh the same
+directory. It is derived data and can be deleted at any time.
+
+NumPy is optional, as for analytics.py: EventCache raises ImportError
+without it.
+"""
+
+import json
+import logging
+import os
+import threading
+from itertools import chain
+from typing import NamedTuple
+
+from config import EVENT_CACHE_DIR
+from database import Database
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+# Rows fetched from SQLite per append step.
+_APPEND_CHUNK = 200_000
+
+# Column name → dtype string; the files are "<column>.<set>.bin".
+_COLUMNS: dict[str, str] = {
+    "id": "<i8",
+    "ts": "<i8",
+    "entity_type": "<i1",
+    "entity_id": "<i8",
+    "event": "<i1",
+    "name": "<i4",
+}
+
+
+class CachedColumns(NamedTuple):
+    """Read-only memmap views of the cached rows, in id order."""
+
+    id: "np.ndarray"
+    ts: "np.ndarray"
+    entity_type: "np.ndarray"
+    entity_id: "np.ndarray"
+    event: "np.ndarray"
+    name: "np.ndarray"  # index into EventCache.names()
+
+
+class EventCache:
+    """Columnar event cache for one Database, kept in `directory`."""
+
+    def __init__(self, db: Database, directory: str = EVENT_CACHE_DIR):
+        if np is None:
+            raise ImportError("the event cache needs NumPy: pip install numpy")
+        self._db = db
+        self._dir = directory
+        self._lock = threading.Lock()
+        self._meta = self._load_meta()
+        self._names = self._load_names()
+        self._name_index = {name: i for i, name in enumerate(self._names)}
+        self._remove_stale_sets()
+
+    # Public
+
+    @property
+    def rows(self) -> int:
+        return self._meta["rows"]
+
+    @property
+    def watermark(self) -> int:
+        """The highest cached events.id."""
+        return self._meta["watermark"]
+
+    def names(self) -> list[str]:
+        """The string table: CachedColumns.name values index into it."""
+        return self._names
+
+    def refresh(self) -> int:
+        """Bring the cache up to date with the log; return the rows appended.
+
+        Raises:
+            DatabaseError: On any SQLite error.
+            OSError:       If the cache files cannot be written.
+        """
+        with self._lock:
+            generation, max_id = self._db.event_log_version()
+            meta = self._meta
+            if meta["generation"] < 0:
+                self._reset(generation)
+            elif generation < meta["generation"] or max_id < meta["watermark"]:
+                logger.info("Event cache: the log was replaced, starting over")
+                self._reset(generation)
+            elif generation != meta["generation"]:
+                self._compact(generation)
+            return self._append()
+
+    def columns(self, refresh: bool = True) -> CachedColumns:
+        """Map the cached rows, after refresh() unless refresh is False."""
+        if refresh:
+            self.refresh()
+        with self._lock:
+            return CachedColumns(
+                *(self._map(col, self._meta["set"]) for col in _COLUMNS)
+            )
+
+    # Files
+
+    def _path(self, name: str, file_set: int | None = None) -> str:
+        if file_set is None:
+            return os.path.join(self._dir, name)
+        return os.path.join(self._dir, f"{name}.{file_set}.bin")
+
+    def _load_meta(self) -> dict:
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") == CACHE_FORMAT and self._sizes_ok(meta):
+                return meta
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return {
+            "format": CACHE_FORMAT,
+            "set": 0,
+            "generation": -1,  # the first refresh starts from scratch
+            "watermark": 0,
+            "rows": 0,
+            "names": 0,
+            "names_bytes": 0,
+        }
+
+    def _sizes_ok(self, meta: dict) -> bool:
+        """True if every file holds at least what meta counts; anything
+        beyond is the torn tail of an interrupted append."""
+        sizes = {
+            self._path(col, meta["set"]): meta["rows"] * np.dtype(dtype).itemsize
+            for col, dtype in _COLUMNS.items()
+        }
+        sizes[self._path("names.txt")] = meta["names_bytes"]
+        return all(
+            (os.path.getsize(path) if os.path.exists(path) else 0) >= size
+            for path, size in sizes.items()
+        )
+
+    def _save_meta(self, meta: dict) -> None:
+        os.makedirs(self._dir, exist_ok=True)
+        part = self._path("meta.json.part")
+        with open(part, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(part, self._path("meta.json"))
+        self._meta = meta
+
+    def _load_names(self) -> list[str]:
+        if not self._meta["names_bytes"]:
+            return []
+        with open(self._path("names.txt"), "rb") as f:
+            data = f.read(self._meta["names_bytes"])
+        return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+    def _map(self, col: str, file_set: int) -> "np.ndarray":
+        rows = self._meta["rows"]
+        if not rows:
+            return np.empty(0, dtype=_COLUMNS[col])
+        return np.memmap(
+            self._path(col, file_set), dtype=_COLUMNS[col], mode="r", shape=(rows,)
+        )
+
+    def _remove_stale_sets(self) -> None:
+        if not os.path.isdir(self._dir):
+            return
+        for entry in os.listdir(self._dir):
+            parts = entry.split(".")
+            if parts[-1] == "bin" and parts[-2] != str(self._meta["set"]):
+                try:
+                    os.remove(os.path.join(self._dir, entry))
+                except OSError:
+                    pass  # still mapped somewhere; removed next time
+
+    # Updates
+
+    def _reset(self, generation: int) -> None:
+        os.makedirs(self._dir, exist_ok=True)
+        self._names, self._name_index = [], {}
+        meta = dict(self._meta, set=self._meta["set"] + 1, generation=generation)
+        meta.update(watermark=0, rows=0, names=0, names_bytes=0)
+        for name in [self._path(col, meta["set"]) for col in _COLUMNS] + [
+            self._path("names.txt")
+        ]:
+            open(name, "wb").close()
+        self._save_meta(meta)
+        self._remove_stale_sets()
+
+    def _compact(self, generation: int) -> None:
+        """Keep only the cached rows whose id is still in the log."""
+        live = np.fromiter(self._db.iter_event_ids(self.watermark), dtype=np.int64)
+        old = self._meta["set"]
+        keep = np.isin(self._map("id", old), live, assume_unique=True)
+        meta = dict(self._meta, set=old + 1, generation=generation)
+        meta["rows"] = int(np.count_nonzero(keep))
+        for col in _COLUMNS:
+            with open(self._path(col, meta["set"]), "wb") as f:
+                f.write(self._map(col, old)[keep].tobytes())
+        self._save_meta(meta)
+        self._remove_stale_sets()
+        logger.info(
+            "Event cache compacted: %d of %d rows kept", meta["rows"], len(keep)
+        )
+
+    def _append(self) -> int:
+        meta = dict(self._meta)
+        rows = self._db.iter_event_codes(after_id=meta["watermark"], names=True)
+        files = {}
+        appended = 0
+        try:
+            for name, size in [
+                (self._path(col, meta["set"]), meta["rows"] * np.dtype(dtype).itemsize)
+                for col, dtype in _COLUMNS.items()
+            ] + [(self._path("names.txt"), meta["names_bytes"])]:
+                f = open(name, "r+b")
+                files[name] = f
+                # Drop the torn tail of an interrupted append, if any.
+                f.truncate(size)
+                f.seek(size)
+            while True:
+                chunk = [row for _, row in zip(range(_APPEND_CHUNK), rows)]
+                if not chunk:
+                    break
+                meta["names_bytes"] += self._write_chunk(chunk, files, meta["set"])
+                appended += len(chunk)
+                meta["watermark"] = chunk[-1][0]
+            for f in files.values():
+                f.flush()
+        except BaseException:
+            # Forget names that meta.json will not count.
+            del self._names[self._meta["names"] :]
+            self._name_index = {name: i for i, name in enumerate(self._names)}
+            raise
+        finally:
+            for f in files.values():
+                f.close()
+        if appended:
+            meta["rows"] += appended
+            meta["names"] = len(self._names)
+            self._save_meta(meta)
+        return appended
+
+    def _write_chunk(self, chunk: list[tuple], files: dict, file_set: int) -> int:
+        """Append chunk to the open column files; return the bytes added to
+        the string table."""
+        codes = np.fromiter(
+            chain.from_iterable(row[:5] for row in chunk), dtype=np.int64
+        ).reshape(-1, 5)
+        index = self._name_index
+        new = []
+        for row in chunk:
+            if row[5] not in index:
+                index[row[5]] = len(self._names) + len(new)
+                new.append(row[5])
+        name_ids = np.fromiter((index[row[5]] for row in chunk), dtype=np.int32)
+        for i, col in enumerate(("id", "ts", "entity_type", "entity_id", "event")):
+            files[self._path(col, file_set)].write(
+                codes[:, i].astype(_COLUMNS[col]).tobytes()
+            )
+        files[self._path("name", file_set)].write(
+            name_ids.astype(_COLUMNS["name"]).tobytes()
+        )
+        # One JSON string per line, so any name survives the round trip.
+        data = "".join(json.dumps(n, ensure_ascii=False) + "\n" for n in new)
+        data = data.encode("utf-8")
+        files[self._path("names.txt")].write(data)
+        self._names.extend(new)
+        return len(data)
@@ -0,0 +1,310 @@
+"""Latency histograms of Database operations, for the diagnostics tab.
+
+Instrumentation.attach() wraps the methods named in INSTRUMENTED on one
+Database instance. Every call then records its duration in an HDR-style
+histogram, its row count, and the SQL it ran (through Database.set_trace),
+so the diagnostics tab can show p50/p95/p99 per operation and the slowest
+recent calls with their statements and query plans. A generator method such
+as iter_entities() is timed until the caller has exhausted or closed it,
+since its query runs while the rows are fetched. detach() removes the
+wrappers again: a Database that is not attached runs its own methods
+unchanged, so instrumentation costs nothing while it is off.
+"""
+
+import inspect
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, NamedTuple
+
+from config import DIAG_RECENT_CALLS, DIAG_SQL_PER_CALL
+from database import Database
+
+# Database methods that are timed while attached. _purge_old_events runs
+# inside update_status_and_log and is timed on its own as well. The card
+# grids are filled through iter_entities() and reconciled with
+# read_entities(); the other tabs use get_entities().
+INSTRUMENTED = (
+    "update_status_and_log",
+    "_purge_old_events",
+    "get_events",
+    "get_entities",
+    "iter_entities",
+    "read_entities",
+    "get_entity",
+    "add_entity",
+    "delete_entity",
+    "clear_events",
+    "recent_activity",
+    "stats",
+)
+
+
+class LatencyHistogram:
+    """HDR-style histogram of durations in microseconds.
+
+    Buckets are log-linear: exact up to 127 µs, then 64 buckets per power
+    of two, so every value is kept to within 1/64 (about 1.6 %) from 1 µs
+    to over an hour in a fixed array of under 1 800 counters. Recording is
+    two shifts and an increment.
+    """
+
+    SUB_BITS = 6  # 2**SUB_BITS buckets per power of two
+    MAX_US = 1 << 32  # about 71 minutes; longer values land in the last bucket
+
+    def __init__(self):
+        self.counts = [0] * (self.index(self.MAX_US) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def index(cls, us: int) -> int:
+        shift = max(us.bit_length() - cls.SUB_BITS - 1, 0)
+        return (shift << cls.SUB_BITS) + (us >> shift)
+
+    @classmethod
+    def highest_equivalent(cls, idx: int) -> int:
+        """The largest value that falls into bucket idx."""
+        shift = max((idx >> cls.SUB_BITS) - 1, 0)
+        sub = idx - (shift << cls.SUB_BITS)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, us: int) -> None:
+        self.counts[min(self.index(us), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, p: float) -> int:
+        """Value at or below which p percent of the recorded values fall."""
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * p // 100))  # ceil without floats
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.highest_equivalent(idx), self.max_us)
+        return self.max_us
+
+    def mean(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+
+class OpStats:
+    """Histogram and counters of one Database operation."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.rows = 0
+
+
+class OpSummary(NamedTuple):
+    name: str
+    calls: int
+    errors: int
+    rows: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class CallRecord(NamedTuple):
+    name: str
+    started: float  # time.time() when the call began
+    duration_us: int
+    rows: int | None
+    error: str | None  # exception class name if the call raised
+    statements: tuple[str, ...]  # SQL run during the call, parameters filled in
+
+
+def _row_count(name: str, result: Any) -> int | None:
+    if isinstance(result, list):
+        return len(result)
+    if name == "_purge_old_events":
+        return result  # the number of events deleted
+    if name == "read_entities":
+        return sum(len(rows) for rows in result.values())
+    return None
+
+
+class Instrumentation:
+    """Per-operation latency histograms and recent calls of one Database."""
+
+    def __init__(
+        self,
+        recent: int = DIAG_RECENT_CALLS,
+        sql_per_call: int = DIAG_SQL_PER_CALL,
+    ):
+        self._lock = threading.Lock()
+        self._ops: dict[str, OpStats] = {}
+        self._recent: deque[CallRecord] = deque(maxlen=recent)
+        self._sql_per_call = sql_per_call
+        self._db: Database | None = None
+        # SQL lists of the calls in progress on each thread, outermost first.
+        self._local = threading.local()
+
+    @property
+    def attached(self) -> bool:
+        return self._db is not None
+
+    def attach(self, db: Database) -> None:
+        """Start timing db's INSTRUMENTED methods and recording their SQL.
+
+        Takes over db.set_trace() until detach().
+        """
+        if self._db is not None:
+            return
+        for name in INSTRUMENTED:
+            method = getattr(db, name)
+            if inspect.isgeneratorfunction(method):
+                setattr(db, name, self._wrap_generator(name, method))
+            else:
+                setattr(db, name, self._wrap(name, method))
+        db.set_trace(self._on_sql)
+        self._db = db
+
+    def detach(self) -> None:
+        """Remove the wrappers; the recorded data is kept until reset()."""
+        db, self._db = self._db, None
+        if db is None:
+            return
+        db.set_trace(None)
+        for name in INSTRUMENTED:
+            db.__dict__.pop(name, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+            self._recent.clear()
+
+    # ── Recording ────────────────────────────────────────────────────────────
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            frames = self._frames()
+            statements: list[str] = []
+            frames.append(statements)
+            started = time.time()
+            t0 = time.perf_counter_ns()
+            result = None
+            error = None
+            try:
+                result = method(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                duration = (time.perf_counter_ns() - t0) // 1000
+                frames.pop()
+                self._record(
+                    CallRecord(
+                        name,
+                        started,
+                        duration,
+                        None if error else _row_count(name, result),
+                        error,
+                        tuple(statements),
+                    )
+                )
+
+        timed.__wrapped__ = method
+        return timed
+
+    def _wrap_generator(self, name: str, method: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            frames = self._frames()
+            statements: list[str] = []
+            started = time.time()
+            t0 = time.perf_counter_ns()
+            rows = 0
+            error = None
+            gen = method(*args, **kwargs)
+            try:
+                while True:
+                    # Only SQL run while the generator itself runs is its own.
+                    frames.append(statements)
+                    try:
+                        row = next(gen)
+                    except StopIteration:
+                        return
+                    finally:
+                        frames.pop()
+                    rows += 1
+                    yield row
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                gen.close()
+                self._record(
+                    CallRecord(
+                        name,
+                        started,
+                        (time.perf_counter_ns() - t0) // 1000,
+                        None if error else rows,
+                        error,
+                        tuple(statements),
+                    )
+                )
+
+        timed.__wrapped__ = method
+        return timed
+
+    def _frames(self) -> list[list[str]]:
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _on_sql(self, sql: str) -> None:
+        # A statement of a nested call (the purge inside a status change)
+        # belongs to the outer call as well.
+        for statements in self._frames():
+            if len(statements) < self._sql_per_call:
+                statements.append(sql)
+
+    def _record(self, call: CallRecord) -> None:
+        with self._lock:
+            op = self._ops.get(call.name)
+            if op is None:
+                op = self._ops[call.name] = OpStats()
+            op.latency.record(call.duration_us)
+            if call.error:
+                op.errors += 1
+            if call.rows:
+                op.rows += call.rows
+            self._recent.append(call)
+
+    # ── Reports ──────────────────────────────────────────────────────────────
+
+    def summary(self) -> list[OpSummary]:
+        """Per-operation counts and percentiles, busiest operation first."""
+        with self._lock:
+            rows = [
+                OpSummary(
+                    name,
+                    op.latency.count,
+                    op.errors,
+                    op.rows,
+                    op.latency.percentile(50) / 1000,
+                    op.latency.percentile(95) / 1000,
+                    op.latency.percentile(99) / 1000,
+                    op.latency.max_us / 1000,
+                )
+                for name, op in self._ops.items()
+            ]
+        rows.sort(key=lambda r: r.calls, reverse=True)
+        return rows
+
+    def slowest(self, n: int = 20) -> list[CallRecord]:
+        """The n slowest of the recent calls, slowest first."""
+        with self._lock:
+            recent = list(self._recent)
+        recent.sort(key=lambda c: c.duration_us, reverse=True)
+        return recent[:n]
@@ -1,7 +1,30 @@
-"""Application entry point."""
+"""Application entry point.
 
+    python main.py [--profile]
+
+--profile (or RASKHOD_PROFILE=1) profiles the app from launch until it is
+closed or Ctrl+Shift+P is pressed; see profiler.py.
+"""
+
+import startup  # first import: the startup timeline counts from here
+
+import argparse
+
+from config import PROFILE_ON_START
+from profiler import ProfileSession
 from ui.app import App
 
 if __name__ == "__main__":
-    app = App()
+    startup.mark("import")
+    parser = argparse.ArgumentParser(description="Система контроля")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile the app with cProfile from launch",
+    )
+    args, _unknown = parser.parse_known_args()
+    profiler = ProfileSession()
+    if args.profile or PROFILE_ON_START:
+        profiler.start()
+    app = App(profiler=profiler)
     app.mainloop()
@@ -0,0 +1,125 @@
+"""Idle-time WAL checkpointing and incremental vacuum."""
+
+import logging
+import threading
+
+from config import (
+    MAINTENANCE_IDLE_SECONDS,
+    MAINTENANCE_POLL_SECONDS,
+    MAINTENANCE_VACUUM_PAGES,
+    MAINTENANCE_VACUUM_STEPS,
+    MAINTENANCE_WAL_TRUNCATE_BYTES,
+)
+from database import Database, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceScheduler:
+    """Keeps the WAL and the main database file small while the app is idle.
+
+    Every poll_seconds the worker checks whether the database has seen no
+    writes for idle_seconds. If so it reclaims free pages left by the purge
+    in bounded incremental_vacuum steps (stopping as soon as a write
+    arrives), then checkpoints the WAL: PASSIVE normally, TRUNCATE once the
+    -wal file has grown past truncate_bytes.
+
+    Idle means idle for this process (Database.idle_seconds()); another
+    station writing to the same file does not hold maintenance back.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        poll_seconds: float = MAINTENANCE_POLL_SECONDS,
+        idle_seconds: float = MAINTENANCE_IDLE_SECONDS,
+        truncate_bytes: int = MAINTENANCE_WAL_TRUNCATE_BYTES,
+        vacuum_pages: int = MAINTENANCE_VACUUM_PAGES,
+        vacuum_steps: int = MAINTENANCE_VACUUM_STEPS,
+    ):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.truncate_bytes = truncate_bytes
+        self.vacuum_pages = vacuum_pages
+        self.vacuum_steps = vacuum_steps
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_report: dict | None = None
+
+    def start(self) -> None:
+        """Start the worker thread. Safe to call more than once."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the worker to exit and wait for the current step to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def last_report(self) -> dict | None:
+        """Return the report of the most recent maintenance pass, if any."""
+        with self._lock:
+            return self._last_report
+
+    def run_once(self) -> dict:
+        """Vacuum and checkpoint now; vacuuming stops early once writes resume.
+
+        Returns a dict with keys: pages_freed, checkpoint_mode, before, after —
+        where before/after are Database.storage_info() snapshots.
+        """
+        before = self.db.storage_info()
+
+        freed = 0
+        if before["freelist_count"] > 0:
+            for _ in range(self.vacuum_steps):
+                step = self.db.incremental_vacuum(self.vacuum_pages)
+                freed += step
+                if step == 0 or self._interrupted():
+                    break
+
+        # Vacuumed pages are written through the WAL, so checkpoint afterwards.
+        mode = None
+        wal_size = self.db.storage_info()["wal_size"]
+        if wal_size > 0:
+            mode = "TRUNCATE" if wal_size >= self.truncate_bytes else "PASSIVE"
+            self.db.checkpoint(mode)
+
+        report = {
+            "pages_freed": freed,
+            "checkpoint_mode": mode,
+            "before": before,
+            "after": self.db.storage_info(),
+        }
+        with self._lock:
+            self._last_report = report
+        if freed or mode == "TRUNCATE":
+            logger.info(
+                "Maintenance: freed %d pages, %s checkpoint, file %d → %d bytes",
+                freed,
+                mode,
+                before["file_size"],
+                report["after"]["file_size"],
+            )
+        return report
+
+    def _interrupted(self) -> bool:
+        """True when the app is closing or a writer became active again."""
+        return self._stop.is_set() or self.db.idle_seconds() < self.idle_seconds
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            if self._interrupted():
+                continue
+            try:
+                self.run_once()
+            except DatabaseError as e:
+                logger.warning("Maintenance pass failed: %s", e)
@@ -0,0 +1,400 @@
+"""Versioned schema migrations keyed on PRAGMA user_version.
+
+Each step is registered under a version number:
+
+* @migration — a schema change, applied together with the user_version
+  bump in one transaction.
+* @data_migration — a chunked rewrite of existing rows. The function is
+  called as fn(conn, checkpoint) and returns the next checkpoint, or None
+  when there is nothing left. Every chunk commits together with its
+  checkpoint in migration_progress, so an interrupted migration resumes
+  where it stopped. Background data migrations are finished by
+  Database.migrate_in_background() while the app is already usable.
+
+A database whose user_version equals latest_version() opens with a single
+PRAGMA read plus one lookup for unfinished data migrations.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Callable, NamedTuple
+
+import presence
+
+logger = logging.getLogger(__name__)
+
+# Whitelist for table names used in dynamic SQL — prevents injection in migrations.
+_ALLOWED_TABLES: frozenset[str] = frozenset({"vehicles", "commanders"})
+
+# Events replayed per chunk by the presence backfill.
+_PRESENCE_BACKFILL_CHUNK = 5000
+
+# Version of the presence backfill; see Database.present_between().
+PRESENCE_BACKFILL = 7
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None] | None = None
+    chunk: Callable[[sqlite3.Connection, str], str | None] | None = None
+    background: bool = False
+    transactional: bool = True
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def _register(m: Migration) -> None:
+    if any(existing.version == m.version for existing in MIGRATIONS):
+        raise ValueError(f"Duplicate migration version: {m.version}")
+    MIGRATIONS.append(m)
+    MIGRATIONS.sort(key=lambda x: x.version)
+
+
+def migration(version: int, description: str, transactional: bool = True):
+    """Register fn(conn) as the schema migration for `version`.
+
+    Non-transactional migrations (e.g. VACUUM) must be idempotent: a crash
+    between the step and the user_version bump re-runs them.
+    """
+
+    def register(fn):
+        _register(Migration(version, description, fn, transactional=transactional))
+        return fn
+
+    return register
+
+
+def data_migration(version: int, description: str, background: bool = False):
+    """Register fn(conn, checkpoint) -> next checkpoint | None as a chunked step."""
+
+    def register(fn):
+        _register(Migration(version, description, chunk=fn, background=background))
+        return fn
+
+    return register
+
+
+def latest_version(migrations: list[Migration] = MIGRATIONS) -> int:
+    return migrations[-1].version if migrations else 0
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def upgrade(
+    conn: sqlite3.Connection, migrations: list[Migration] = MIGRATIONS
+) -> list[Migration]:
+    """Apply every pending migration and finish foreground data migrations.
+
+    Returns the data migrations that are left to run in the background.
+
+    Raises:
+        sqlite3.Error: If a step fails; that step is rolled back.
+    """
+    current = current_version(conn)
+    for m in migrations:
+        if m.version > current:
+            _apply(conn, m)
+
+    background = []
+    for m in pending_data_migrations(conn, migrations):
+        if m.background:
+            background.append(m)
+        else:
+            run_data_migration(conn, m)
+    return background
+
+
+def pending_data_migrations(
+    conn: sqlite3.Connection, migrations: list[Migration] = MIGRATIONS
+) -> list[Migration]:
+    """Return data migrations that were started but have not finished yet."""
+    by_version = {m.version: m for m in migrations}
+    rows = conn.execute(
+        "SELECT version FROM migration_progress ORDER BY version"
+    ).fetchall()
+    return [by_version[r[0]] for r in rows if r[0] in by_version]
+
+
+def is_pending(conn: sqlite3.Connection, version: int) -> bool:
+    """True while the data migration `version` has not finished."""
+    row = conn.execute(
+        "SELECT 1 FROM migration_progress WHERE version = ?", (version,)
+    ).fetchone()
+    return row is not None
+
+
+def _apply(conn: sqlite3.Connection, m: Migration) -> None:
+    logger.info("Applying migration %d: %s", m.version, m.description)
+    if m.apply is not None and not m.transactional:
+        m.apply(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if m.apply is not None and m.transactional:
+            m.apply(conn)
+        if m.chunk is not None:
+            conn.execute(
+                "INSERT OR IGNORE INTO migration_progress (version, checkpoint) "
+                "VALUES (?, '')",
+                (m.version,),
+            )
+        # PRAGMA does not accept bound parameters; version is always an int.
+        conn.execute(f"PRAGMA user_version = {int(m.version)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def run_data_migration(
+    conn: sqlite3.Connection, m: Migration, stop: threading.Event | None = None
+) -> bool:
+    """Run the remaining chunks of a data migration.
+
+    Each chunk commits together with its checkpoint. Returns True when the
+    migration finished, False if `stop` was set first.
+    """
+    row = conn.execute(
+        "SELECT checkpoint FROM migration_progress WHERE version = ?", (m.version,)
+    ).fetchone()
+    if row is None:
+        return True
+    checkpoint = row[0]
+    while True:
+        if stop is not None and stop.is_set():
+            return False
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            nxt = m.chunk(conn, checkpoint)
+            if nxt is None:
+                conn.execute(
+                    "DELETE FROM migration_progress WHERE version = ?", (m.version,)
+                )
+            else:
+                conn.execute(
+                    "UPDATE migration_progress SET checkpoint = ? WHERE version = ?",
+                    (nxt, m.version),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if nxt is None:
+            logger.info("Data migration %d finished: %s", m.version, m.description)
+            return True
+        checkpoint = nxt
+
+
+# Migrations
+
+
+@migration(1, "Base schema: vehicles, commanders, events")
+def _base_schema(conn: sqlite3.Connection) -> None:
+    # IF NOT EXISTS: databases created before versioning already have the tables.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id      INTEGER PRIMARY KEY AUTOINCREMENT,
+            number  TEXT    NOT NULL UNIQUE,
+            status  TEXT    NOT NULL DEFAULT 'idle',
+            created TEXT    NOT NULL,
+            updated TEXT    DEFAULT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS commanders (
+            id      INTEGER PRIMARY KEY AUTOINCREMENT,
+            name    TEXT    NOT NULL UNIQUE,
+            status  TEXT    NOT NULL DEFAULT 'idle',
+            created TEXT    NOT NULL,
+            updated TEXT    DEFAULT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_type TEXT    NOT NULL,
+            entity_id   INTEGER NOT NULL,
+            entity_name TEXT    NOT NULL,
+            event_type  TEXT    NOT NULL,
+            ts          TEXT    NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS migration_progress (
+            version    INTEGER PRIMARY KEY,
+            checkpoint TEXT    NOT NULL
+        )
+        """
+    )
+
+    # Backfill 'updated' column for databases created before it was added.
+    for table in ("vehicles", "commanders"):
+        if table not in _ALLOWED_TABLES:
+            raise ValueError(f"Unexpected table name in migration: {table!r}")
+        cur = conn.execute(f"PRAGMA table_info({table})")
+        columns = [row[1] for row in cur.fetchall()]
+        if "updated" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN updated TEXT DEFAULT NULL")
+
+
+@migration(2, "Incremental auto-vacuum", transactional=False)
+def _incremental_auto_vacuum(conn: sqlite3.Connection) -> None:
+    # Lets the maintenance scheduler return pages freed by the purge to the OS.
+    # Changing the mode on an existing file needs a full VACUUM.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+
+
+@migration(3, "Per-entity version column for compare-and-set status updates")
+def _entity_version(conn: sqlite3.Connection) -> None:
+    for table in ("vehicles", "commanders"):
+        if table not in _ALLOWED_TABLES:
+            raise ValueError(f"Unexpected table name in migration: {table!r}")
+        conn.execute(
+            f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+@migration(4, "Index on events.event_type for per-type counts")
+def _events_type_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type)")
+
+
+@migration(5, "Hourly and daily activity rollups, backfilled from events")
+def _activity_rollups(conn: sqlite3.Connection) -> None:
+    # Event counts per hour / day × entity_type × event_type, kept up to date
+    # by Database and outliving the purge of the raw events.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS activity_hourly (
+            hour        TEXT    NOT NULL,
+            entity_type TEXT    NOT NULL,
+            event_type  TEXT    NOT NULL,
+            count       INTEGER NOT NULL,
+            PRIMARY KEY (hour, entity_type, event_type)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS activity_daily (
+            day         TEXT    NOT NULL,
+            entity_type TEXT    NOT NULL,
+            event_type  TEXT    NOT NULL,
+            count       INTEGER NOT NULL,
+            PRIMARY KEY (day, entity_type, event_type)
+        ) WITHOUT ROWID
+        """
+    )
+    # One GROUP BY over the retained events; the step commits together with
+    # the new tables, so no status change can be counted twice.
+    conn.execute(
+        "INSERT INTO activity_hourly (hour, entity_type, event_type, count) "
+        "SELECT substr(ts, 1, 13), entity_type, event_type, COUNT(*) FROM events "
+        "GROUP BY 1, 2, 3"
+    )
+    conn.execute(
+        "INSERT INTO activity_daily (day, entity_type, event_type, count) "
+        "SELECT substr(hour, 1, 10), entity_type, event_type, SUM(count) "
+        "FROM activity_hourly GROUP BY 1, 2, 3"
+    )
+
+
+@migration(6, "Presence intervals with an R*Tree index")
+def _presence_intervals(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS presence (
+            id          INTEGER PRIMARY KEY,
+            entity_type TEXT    NOT NULL,
+            entity_id   INTEGER NOT NULL,
+            entity_name TEXT    NOT NULL,
+            arrived     TEXT    NOT NULL,
+            departed    TEXT    DEFAULT NULL
+        )
+        """
+    )
+    # At most one open stay per entity; also the lookup that closes it.
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_presence_open "
+        "ON presence (entity_type, entity_id) WHERE departed IS NULL"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_departed ON presence (departed)"
+    )
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS presence_index "
+        "USING rtree_i32(id, arrived, departed)"
+    )
+
+
+@data_migration(
+    PRESENCE_BACKFILL, "Backfill presence intervals from events", background=True
+)
+def _presence_backfill(conn: sqlite3.Connection, checkpoint: str) -> str | None:
+    # Replays the log in id order; the checkpoint is the last replayed id.
+    # Status changes made meanwhile are not recorded live (see
+    # Database._record_presence); their events come after the checkpoint,
+    # so the replay reaches them too.
+    rows = conn.execute(
+        "SELECT id, entity_type, entity_id, entity_name, event_type, ts FROM events "
+        "WHERE id > ? ORDER BY id LIMIT ?",
+        (int(checkpoint or 0), _PRESENCE_BACKFILL_CHUNK),
+    ).fetchall()
+    for row in rows:
+        presence.record(conn, *tuple(row)[1:])
+    if rows:
+        return str(rows[-1][0])
+
+    # The purge may have removed the arrival of an entity that is still on
+    # site; its 'updated' is the time of that arrival.
+    for table, col, entity_type in (
+        ("vehicles", "number", "vehicle"),
+        ("commanders", "name", "commander"),
+    ):
+        if table not in _ALLOWED_TABLES:
+            raise ValueError(f"Unexpected table name in migration: {table!r}")
+        arrived = conn.execute(
+            f"SELECT id, {col}, updated FROM {table} "
+            "WHERE status = 'arrived' AND updated IS NOT NULL"
+        ).fetchall()
+        for eid, name, updated in arrived:
+            presence.record(conn, entity_type, eid, name, "arrived", updated)
+    return None
+
+
+@migration(8, "Event log generation, bumped whenever events are deleted")
+def _event_log_state(conn: sqlite3.Connection) -> None:
+    # Lets copies of the log (the event cache) tell a purge from new rows.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_log_state (
+            id         INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("INSERT OR IGNORE INTO event_log_state VALUES (1, 0)")
+
+
+@migration(9, "Index on presence (entity_type, entity_id, departed)")
+def _presence_entity_index(conn: sqlite3.Connection) -> None:
+    # One entity's stays in order of departure: its last departure before a
+    # moment is a single seek (the duty report's opening states).
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_entity "
+        "ON presence (entity_type, entity_id, departed)"
+    )
@@ -0,0 +1,69 @@
+"""Presence intervals: arrived → departed pairs per entity.
+
+The presence table holds one row per stay on site. A stay is opened by an
+'arrived' event and closed by the next 'departed' (or 'deleted') event of
+the same entity; an open stay has departed = NULL. presence_index is an
+R*Tree over the same rows, in whole minutes, so point-in-time and overlap
+lookups only visit the stays that match.
+
+Database and the backfill migration both write stays through record(), so
+a backfilled table is the same as one kept up to date from the start.
+"""
+
+import calendar
+import math
+import sqlite3
+from datetime import datetime
+
+# presence_index end of a stay that has not ended yet (rtree_i32 maximum).
+OPEN_END = 2**31 - 1
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def minutes(ts: str, round_up: bool = False) -> int:
+    """Whole minutes from the epoch to a stored 'YYYY-MM-DD HH:MM:SS'.
+
+    Stored timestamps are local time; they are read as if they were UTC,
+    which keeps the scale monotonic across DST changes.
+    """
+    seconds = calendar.timegm(datetime.strptime(ts, _TS_FORMAT).timetuple())
+    return math.ceil(seconds / 60) if round_up else seconds // 60
+
+
+def record(
+    conn: sqlite3.Connection,
+    entity_type: str,
+    entity_id: int,
+    entity_name: str,
+    event_type: str,
+    ts: str,
+) -> None:
+    """Apply one event to the presence table, without committing.
+
+    'arrived' opens a stay unless one is already open; 'departed', 'idle'
+    and 'deleted' close the open stay, if any. 'created' changes nothing.
+    """
+    if event_type == "arrived":
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO presence "
+            "(entity_type, entity_id, entity_name, arrived) VALUES (?, ?, ?, ?)",
+            (entity_type, entity_id, entity_name, ts),
+        )
+        if cur.rowcount:
+            conn.execute(
+                "INSERT INTO presence_index (id, arrived, departed) VALUES (?, ?, ?)",
+                (cur.lastrowid, minutes(ts), OPEN_END),
+            )
+    elif event_type in ("departed", "idle", "deleted"):
+        row = conn.execute(
+            "SELECT id FROM presence "
+            "WHERE entity_type = ? AND entity_id = ? AND departed IS NULL",
+            (entity_type, entity_id),
+        ).fetchone()
+        if row is not None:
+            conn.execute("UPDATE presence SET departed = ? WHERE id = ?", (ts, row[0]))
+            conn.execute(
+                "UPDATE presence_index SET departed = ? WHERE id = ?",
+                (minutes(ts, round_up=True), row[0]),
+            )
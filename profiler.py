@@ -0,0 +1,115 @@
+"""On-demand cProfile captures inside the running application.
+
+A ProfileSession is started and stopped from the app (Ctrl+Shift+P), or
+runs from launch with `main.py --profile` / RASKHOD_PROFILE=1. Stopping it
+writes two files to PROFILE_DIR, next to the database:
+
+    profile-20260301-080001.pstats   for pstats / snakeviz
+    profile-20260301-080001.txt      flat top-N tables, readable as is
+
+The text summary starts with the database size and entity counts, so a
+profile sent in from the field says what load it was taken under.
+
+cProfile only sees the thread that started it — the Tk loop thread, where
+the UI freezes that users report happen.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import platform
+import pstats
+import sys
+import time
+from datetime import datetime
+
+from config import PROFILE_DIR, PROFILE_TOP_N
+from database import Database, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileSession:
+    """One cProfile capture at a time, written out by stop()."""
+
+    def __init__(self, out_dir: str = PROFILE_DIR, top: int = PROFILE_TOP_N):
+        self.out_dir = out_dir
+        self.top = top
+        self._profile: cProfile.Profile | None = None
+        self._started: datetime | None = None
+        self._t0 = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> bool:
+        """Start profiling the calling thread; return False if that is not possible."""
+        if self._profile is not None:
+            return True
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:  # another profiler is already active
+            logger.warning("Cannot start profiling: %s", e)
+            return False
+        self._profile = profile
+        self._started = datetime.now()
+        self._t0 = time.perf_counter()
+        return True
+
+    def stop(self, db: Database | None = None) -> tuple[str, str] | None:
+        """Stop profiling and write the capture; return (pstats path, summary path).
+
+        db, if given, is only queried after the profiler is off, for the
+        size and counts in the summary header. Returns None if no session
+        was running or the files could not be written.
+        """
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return None
+        profile.disable()
+        seconds = time.perf_counter() - self._t0
+
+        base = os.path.join(self.out_dir, f"profile-{self._started:%Y%m%d-%H%M%S}")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            profile.dump_stats(base + ".pstats")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(self._summary(profile, seconds, db))
+        except OSError as e:
+            logger.warning("Cannot write profile %s: %s", base, e)
+            return None
+        logger.info("Profile written to %s.pstats", base)
+        return base + ".pstats", base + ".txt"
+
+    def _summary(self, profile: cProfile.Profile, seconds: float, db) -> str:
+        out = io.StringIO()
+        out.write(f"Profile {self._started:%Y-%m-%d %H:%M:%S}, {seconds:.1f} s\n")
+        out.write(
+            f"Python {platform.python_version()} on {platform.platform()}"
+            f"{', frozen build' if getattr(sys, 'frozen', False) else ''}\n"
+        )
+        out.write(_database_tags(db) + "\n")
+        for sort, title in (("tottime", "own time"), ("cumulative", "cumulative time")):
+            out.write(f"\nTop {self.top} by {title}\n")
+            stats = pstats.Stats(profile, stream=out)
+            stats.strip_dirs().sort_stats(sort).print_stats(self.top)
+        return out.getvalue()
+
+
+def _database_tags(db: Database | None) -> str:
+    """One line with the database's size and contents, or why it is missing."""
+    if db is None:
+        return "Database: not opened"
+    try:
+        info = db.storage_info()
+        counts = db.stats()
+    except DatabaseError as e:
+        return f"Database: unavailable ({e})"
+    return (
+        f"Database: {info['file_size'] / 1e6:.1f} MB + WAL {info['wal_size'] / 1e6:.1f} MB, "
+        f"{counts['vehicles']} vehicles, {counts['commanders']} commanders, "
+        f"{counts['total_events']} events"
+    )
@@ -0,0 +1,701 @@
+"""Reports over the event log: movement by period and the daily duty report.
+
+build_movement_report() splits a date range into month or week shards.
+Each shard is aggregated by its own read-only SQLite connection: arrivals
+and departures per day, and per entity the counts and the first and last
+event. The partial results are then merged. With workers > 1 the shards
+run in a ProcessPoolExecutor, one SQLite connection per process, so the
+GROUP BY work spreads over the cores; with workers=1 they run one after
+another in the calling process.
+
+write_movement_csv() and write_movement_html() save a report for Excel and
+for printing.
+
+The PyInstaller build excludes concurrent and multiprocessing, so the app
+itself can only use workers=1; the parallel engine is for running this
+module from a Python install.
+
+write_duty_report() writes the daily duty report ("суточный расход") for
+one period: the journal of every event, per entity the moves and the
+status at the start and end, and the entities still away at the end. It
+streams the events in time order, so it stays fast and small on a busy
+day. The History tab writes it for the last duty day.
+
+    python reports.py movement 2026-01-01 2026-03-31 --by month --workers 4
+    python reports.py duty                 # the last full duty day
+    python reports.py duty 2026-03-02 --days 7
+"""
+
+import argparse
+import csv
+import html
+import logging
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+import migrations
+import presence
+from config import (
+    DB_PATH,
+    DUTY_DAY_START_HOUR,
+    EVENT_LABELS,
+    REPORT_WORKERS,
+    REPORTS_DIR,
+    STATUS_MAP,
+    TYPE_LABELS,
+)
+from database import IncompleteError
+
+logger = logging.getLogger(__name__)
+
+SHARD_KINDS = ("month", "week")
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Shard(NamedTuple):
+    start: date
+    end: date  # exclusive
+
+
+class EntitySummary(NamedTuple):
+    entity_type: str
+    entity_id: int
+    entity_name: str
+    arrivals: int
+    departures: int
+    first: str  # ts of the first event in the range
+    last: str  # ts of the last event in the range
+
+
+class ShardResult(NamedTuple):
+    # day → (entity_type, event_type) → count
+    daily: dict[str, dict[tuple[str, str], int]]
+    entities: dict[tuple[str, int], EntitySummary]
+
+
+class MovementReport(NamedTuple):
+    start: date
+    end: date  # inclusive
+    daily: dict[str, dict[tuple[str, str], int]]  # every day of the range
+    entities: list[EntitySummary]  # by type, then name
+
+
+def shards(start: date, end: date, by: str = "month") -> list[Shard]:
+    """Split start..end (inclusive) at month or week (Monday) boundaries."""
+    if by not in SHARD_KINDS:
+        raise ValueError(f"Unknown shard kind: {by!r}")
+    if end < start:
+        raise ValueError(f"end {end} is before start {start}")
+    result = []
+    stop = end + timedelta(days=1)
+    first = start
+    while first < stop:
+        if by == "month":
+            nxt = (first.replace(day=1) + timedelta(days=32)).replace(day=1)
+        else:
+            nxt = first + timedelta(days=7 - first.weekday())
+        result.append(Shard(first, min(nxt, stop)))
+        first = nxt
+    return result
+
+
+def _connect_ro(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def aggregate_shard(path: str, shard: Shard) -> ShardResult:
+    """Aggregate one shard on a read-only connection of its own.
+
+    Both queries run in one read transaction and reach the shard's rows
+    through idx_events_ts. Runs in worker processes, so it takes a path
+    rather than a Database.
+    """
+    conn = _connect_ro(path)
+    try:
+        conn.execute("BEGIN")
+        bounds = (shard.start.isoformat(), shard.end.isoformat())
+        daily: dict[str, dict[tuple[str, str], int]] = {}
+        for day, entity_type, event_type, count in conn.execute(
+            "SELECT substr(ts, 1, 10), entity_type, event_type, COUNT(*) "
+            "FROM events WHERE ts >= ? AND ts < ? GROUP BY 1, 2, 3",
+            bounds,
+        ):
+            daily.setdefault(day, {})[(entity_type, event_type)] = count
+        entities = {
+            (row[0], row[1]): EntitySummary(*row)
+            for row in conn.execute(
+                """
+                SELECT entity_type, entity_id, MAX(entity_name),
+                       SUM(event_type = 'arrived'), SUM(event_type = 'departed'),
+                       MIN(ts), MAX(ts)
+                FROM events WHERE ts >= ? AND ts < ?
+                GROUP BY entity_type, entity_id
+                """,
+                bounds,
+            )
+        }
+        return ShardResult(daily, entities)
+    finally:
+        conn.close()
+
+
+def merge(results: list[ShardResult]) -> ShardResult:
+    """Combine shard results; days never overlap, entities may."""
+    daily: dict[str, dict[tuple[str, str], int]] = {}
+    entities: dict[tuple[str, int], EntitySummary] = {}
+    for part in results:
+        daily.update(part.daily)
+        for key, e in part.entities.items():
+            seen = entities.get(key)
+            if seen is not None:
+                e = seen._replace(
+                    arrivals=seen.arrivals + e.arrivals,
+                    departures=seen.departures + e.departures,
+                    first=min(seen.first, e.first),
+                    last=max(seen.last, e.last),
+                )
+            entities[key] = e
+    return ShardResult(daily, entities)
+
+
+def build_movement_report(
+    start: date,
+    end: date,
+    by: str = "month",
+    workers: int = REPORT_WORKERS,
+    path: str = DB_PATH,
+) -> MovementReport:
+    """Aggregate the events of start..end (inclusive) into a MovementReport.
+
+    workers=0 uses one process per CPU; workers=1 runs in this process.
+
+    Raises:
+        ValueError:    For an unknown shard kind or end < start.
+        sqlite3.Error: If the database cannot be read.
+    """
+    parts = shards(start, end, by)
+    workers = min(workers or os.cpu_count() or 1, len(parts))
+    t0 = time.perf_counter()
+    if workers <= 1:
+        results = [aggregate_shard(path, shard) for shard in parts]
+    else:
+        # Imported here: the app's build does not include it.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(aggregate_shard, [path] * len(parts), parts))
+    merged = merge(results)
+    logger.info(
+        "Movement report %s..%s: %d %s shards, %d workers, %.2f s",
+        start,
+        end,
+        len(parts),
+        by,
+        workers,
+        time.perf_counter() - t0,
+    )
+
+    daily = {}
+    day = start
+    while day <= end:
+        daily[day.isoformat()] = merged.daily.get(day.isoformat(), {})
+        day += timedelta(days=1)
+    entities = sorted(
+        merged.entities.values(), key=lambda e: (e.entity_type, e.entity_name)
+    )
+    return MovementReport(start, end, daily, entities)
+
+
+# Output
+
+_DAILY_COLUMNS = [
+    (entity_type, event_type)
+    for entity_type in ("vehicle", "commander")
+    for event_type in ("arrived", "departed")
+]
+_EVENT_HEADERS = {"arrived": "прибытий", "departed": "убытий"}
+
+
+def _daily_header() -> list[str]:
+    return ["Дата"] + [
+        f"{TYPE_LABELS[t]}: {_EVENT_HEADERS[e]}" for t, e in _DAILY_COLUMNS
+    ]
+
+
+def _daily_rows(report: MovementReport) -> list[list]:
+    return [
+        [day] + [counts.get(col, 0) for col in _DAILY_COLUMNS]
+        for day, counts in report.daily.items()
+    ]
+
+
+_ENTITY_HEADER = ["Тип", "Наименование", "Прибытий", "Убытий", "Первое", "Последнее"]
+
+
+def _entity_rows(report: MovementReport) -> list[list]:
+    return [
+        [
+            TYPE_LABELS.get(e.entity_type, e.entity_type),
+            e.entity_name,
+            e.arrivals,
+            e.departures,
+            e.first,
+            e.last,
+        ]
+        for e in report.entities
+    ]
+
+
+def _report_name(report: MovementReport) -> str:
+    return f"movement-{report.start:%Y%m%d}-{report.end:%Y%m%d}"
+
+
+def write_csv(path: str, header: list[str], rows) -> None:
+    """Write rows as CSV that Excel opens with the right encoding."""
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_movement_csv(
+    report: MovementReport, directory: str = REPORTS_DIR
+) -> list[str]:
+    """Write <name>-daily.csv and <name>-entities.csv; return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, _report_name(report))
+    paths = [base + "-daily.csv", base + "-entities.csv"]
+    write_csv(paths[0], _daily_header(), _daily_rows(report))
+    write_csv(paths[1], _ENTITY_HEADER, _entity_rows(report))
+    return paths
+
+
+_HTML_STYLE = """
+body { font-family: sans-serif; font-size: 11pt; margin: 2em; }
+h1 { font-size: 16pt; } h2 { font-size: 13pt; margin-top: 2em; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #999; padding: 2px 8px; text-align: left; }
+td.n { text-align: right; }
+@media print { h2 { break-before: page; } thead { display: table-header-group; } }
+"""
+
+
+def html_row(row) -> str:
+    """One <tr> of an HTML table; numbers are right-aligned."""
+    cells = "".join(
+        (
+            f'<td class="n">{v}</td>'
+            if isinstance(v, (int, float))
+            else f"<td>{html.escape(str(v))}</td>"
+        )
+        for v in row
+    )
+    return f"<tr>{cells}</tr>"
+
+
+def html_table(header: list[str], rows) -> list[str]:
+    """Lines of an HTML table."""
+    out = ["<table>", "<thead><tr>"]
+    out += [f"<th>{html.escape(h)}</th>" for h in header]
+    out.append("</tr></thead><tbody>")
+    out += [html_row(row) for row in rows]
+    out.append("</tbody></table>")
+    return out
+
+
+def html_page(title: str, body: list[str]) -> str:
+    return "\n".join([_html_head(title), *body, _HTML_END])
+
+
+def _html_head(title: str) -> str:
+    return "\n".join(
+        [
+            "<!DOCTYPE html>",
+            '<html lang="ru"><head><meta charset="utf-8">',
+            f"<title>{html.escape(title)}</title>",
+            f"<style>{_HTML_STYLE}</style></head><body>",
+            f"<h1>{html.escape(title)}</h1>",
+        ]
+    )
+
+
+_HTML_END = "</body></html>"
+
+
+def write_movement_html(report: MovementReport, directory: str = REPORTS_DIR) -> str:
+    """Write a printable <name>.html and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _report_name(report) + ".html")
+    title = f"Движение за {report.start:%d.%m.%Y} – {report.end:%d.%m.%Y}"
+    body = ["<h2>По дням</h2>", *html_table(_daily_header(), _daily_rows(report))]
+    body += ["<h2>По объектам</h2>", *html_table(_ENTITY_HEADER, _entity_rows(report))]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html_page(title, body))
+    return path
+
+
+# Daily duty report ("суточный расход")
+
+
+class DutyEntity(NamedTuple):
+    entity_type: str
+    entity_id: int
+    entity_name: str
+    opening: str | None  # status at the start; None if not known
+    closing: str | None  # status at the end; 'deleted' if deleted meanwhile
+    arrivals: int
+    departures: int
+    since: str | None  # ts of the last departure if closing is 'departed'
+
+
+class DutyReport(NamedTuple):
+    start: datetime
+    end: datetime  # exclusive
+    events: int
+    entities: list[DutyEntity]  # with events in the period, by type and name
+    absent: list[DutyEntity]  # departed at the end, longest away first
+    paths: list[str]  # journal CSV, entities CSV, absent CSV, HTML
+
+
+class _DutyState:
+    """One entity's status while the period's events stream by."""
+
+    __slots__ = ("name", "opening", "status", "since", "arrivals", "departures")
+
+    def __init__(self, name: str, status: str | None = None, since=None):
+        self.name = name
+        self.opening = self.status = status
+        self.since = since
+        self.arrivals = self.departures = 0
+
+    def summary(self, key: tuple[str, int]) -> DutyEntity:
+        return DutyEntity(
+            *key,
+            self.name,
+            self.opening,
+            self.status,
+            self.arrivals,
+            self.departures,
+            self.since if self.status == "departed" else None,
+        )
+
+
+_STATUS_AFTER = {
+    "arrived": "arrived",
+    "departed": "departed",
+    "created": "idle",
+    "deleted": "deleted",
+}
+
+
+def _opening_states(conn: sqlite3.Connection, start: str) -> dict:
+    """Status of every known entity just before `start`.
+
+    An entity unchanged since before `start` has its current status then.
+    For the others the presence table decides: on site if a stay covers
+    `start`, otherwise away since its last departure before it, which
+    idx_presence_entity finds with one seek per entity. Entities created
+    after `start` or deleted before it are left out.
+
+    Raises:
+        IncompleteError: While the presence backfill of an upgraded
+                         database is still running in the background.
+    """
+    if migrations.is_pending(conn, migrations.PRESENCE_BACKFILL):
+        raise IncompleteError("Presence intervals are still being backfilled.")
+    states = {}
+    changed = {}
+    for etype, eid, name, status, created, updated in conn.execute(
+        "SELECT 'vehicle', id, number, status, created, updated FROM vehicles "
+        "UNION ALL "
+        "SELECT 'commander', id, name, status, created, updated FROM commanders"
+    ):
+        if created >= start:
+            continue
+        if updated is None or updated < start:
+            states[(etype, eid)] = _DutyState(name, status, updated)
+        else:
+            changed[(etype, eid)] = name
+    # An entity deleted since `start` still existed then.
+    for etype, eid, name in conn.execute(
+        "SELECT entity_type, entity_id, entity_name FROM events "
+        "WHERE event_type = 'deleted' AND ts >= ?",
+        (start,),
+    ):
+        changed.setdefault((etype, eid), name)
+    on_site = set(
+        conn.execute(
+            """
+            SELECT p.entity_type, p.entity_id
+            FROM presence_index AS r JOIN presence AS p ON p.id = r.id
+            WHERE r.arrived <= :m AND r.departed >= :m
+              AND p.arrived < :ts AND (p.departed IS NULL OR p.departed >= :ts)
+            """,
+            {"ts": start, "m": presence.minutes(start)},
+        )
+    )
+    for key, name in changed.items():
+        if key in on_site:
+            states[key] = _DutyState(name, "arrived")
+            continue
+        since = conn.execute(
+            "SELECT MAX(departed) FROM presence "
+            "WHERE entity_type = ? AND entity_id = ? AND departed < ?",
+            (*key, start),
+        ).fetchone()[0]
+        states[key] = _DutyState(name, "departed" if since else None, since)
+    return states
+
+
+_JOURNAL_HEADER = ["Время", "Тип", "Наименование", "Событие", "№ перемещения"]
+
+
+def _journal(conn: sqlite3.Connection, start: str, end: str):
+    """Yield (event row, journal row) for the period, in ts order.
+
+    The journal row numbers each entity's moves in the period, so one
+    entity's sequence can be followed through the day.
+    """
+    moves: dict[tuple[str, int], int] = {}
+    for row in conn.execute(
+        "SELECT ts, entity_type, entity_id, entity_name, event_type FROM events "
+        "WHERE ts >= ? AND ts < ? ORDER BY ts, id",
+        (start, end),
+    ):
+        ts, etype, eid, name, event = row
+        number = ""
+        if event in ("arrived", "departed"):
+            number = moves[(etype, eid)] = moves.get((etype, eid), 0) + 1
+        yield row, [
+            ts,
+            TYPE_LABELS.get(etype, etype),
+            name,
+            EVENT_LABELS.get(event, event),
+            number,
+        ]
+
+
+def _status_label(status: str | None) -> str:
+    if status in STATUS_MAP:
+        return STATUS_MAP[status][2]
+    return EVENT_LABELS.get(status, "—")
+
+
+_DUTY_ENTITY_HEADER = [
+    "Тип",
+    "Наименование",
+    "На начало",
+    "Прибытий",
+    "Убытий",
+    "На конец",
+]
+_ABSENT_HEADER = ["Тип", "Наименование", "Убыл", "Отсутствует, ч"]
+
+
+def _duty_entity_rows(entities: list[DutyEntity]) -> list[list]:
+    return [
+        [
+            TYPE_LABELS.get(e.entity_type, e.entity_type),
+            e.entity_name,
+            _status_label(e.opening),
+            e.arrivals,
+            e.departures,
+            _status_label(e.closing),
+        ]
+        for e in entities
+    ]
+
+
+def _absent_rows(absent: list[DutyEntity], end: datetime) -> list[list]:
+    rows = []
+    for e in absent:
+        hours = ""
+        if e.since:
+            away = end - datetime.strptime(e.since, _TS_FORMAT)
+            hours = round(away.total_seconds() / 3600, 1)
+        rows.append(
+            [
+                TYPE_LABELS.get(e.entity_type, e.entity_type),
+                e.entity_name,
+                e.since or "",
+                hours,
+            ]
+        )
+    return rows
+
+
+def _duty_name(start: datetime, end: datetime) -> str:
+    if start.time() == end.time() == datetime.min.time():
+        last = end - timedelta(days=1)
+        if last.date() == start.date():
+            return f"duty-{start:%Y%m%d}"
+        return f"duty-{start:%Y%m%d}-{last:%Y%m%d}"
+    return f"duty-{start:%Y%m%d%H%M}-{end:%Y%m%d%H%M}"
+
+
+def write_duty_report(
+    start: datetime,
+    end: datetime,
+    directory: str = REPORTS_DIR,
+    path: str = DB_PATH,
+) -> DutyReport:
+    """Write the duty report for start <= ts < end and return its summary.
+
+    Writes <name>-journal.csv (every event, in time order),
+    <name>-entities.csv (per entity: status at the start and end and the
+    number of moves), <name>-absent.csv (entities away at the end) and a
+    printable <name>.html with all three.
+
+    Everything is read in one read transaction on a read-only connection,
+    so the files agree with each other. Events are streamed through
+    idx_events_ts twice (once for the CSV journal, once for the HTML one,
+    which comes after the summary tables), so memory depends on the number
+    of entities, not of events.
+
+    Raises:
+        ValueError:      If end <= start.
+        IncompleteError: While the presence backfill of an upgraded
+                         database is still running in the background.
+        sqlite3.Error:   If the database cannot be read.
+        OSError:         If the files cannot be written.
+    """
+    if end <= start:
+        raise ValueError(f"end {end} is not after start {start}")
+    t0 = time.perf_counter()
+    a, b = start.strftime(_TS_FORMAT), end.strftime(_TS_FORMAT)
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, _duty_name(start, end))
+    paths = [base + s for s in ("-journal.csv", "-entities.csv", "-absent.csv")]
+    paths.append(base + ".html")
+
+    conn = _connect_ro(path)
+    try:
+        conn.execute("BEGIN")
+        states = _opening_states(conn, a)
+        moved = set()
+        events = 0
+        with open(paths[0], "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(_JOURNAL_HEADER)
+            for (ts, etype, eid, name, event), row in _journal(conn, a, b):
+                writer.writerow(row)
+                events += 1
+                key = (etype, eid)
+                st = states.get(key)
+                if st is None:
+                    st = states[key] = _DutyState(name)
+                st.name = name
+                st.status = _STATUS_AFTER.get(event, st.status)
+                if event == "arrived":
+                    st.arrivals += 1
+                elif event == "departed":
+                    st.departures += 1
+                    st.since = ts
+                moved.add(key)
+
+        entities = sorted(
+            (states[key].summary(key) for key in moved),
+            key=lambda e: (e.entity_type, e.entity_name),
+        )
+        absent = sorted(
+            (st.summary(key) for key, st in states.items() if st.status == "departed"),
+            key=lambda e: (e.since or "", e.entity_type, e.entity_name),
+        )
+        write_csv(paths[1], _DUTY_ENTITY_HEADER, _duty_entity_rows(entities))
+        write_csv(paths[2], _ABSENT_HEADER, _absent_rows(absent, end))
+
+        title = f"Суточный расход: {start:%d.%m.%Y %H:%M} – {end:%d.%m.%Y %H:%M}"
+        with open(paths[3], "w", encoding="utf-8") as f:
+            f.write(_html_head(title) + "\n")
+            f.write(
+                f"<p>Событий: {events}. Объектов с движением: {len(entities)}. "
+                f"Отсутствуют на конец периода: {len(absent)}.</p>\n"
+            )
+            f.write("<h2>Отсутствуют на конец периода</h2>\n")
+            f.write("\n".join(html_table(_ABSENT_HEADER, _absent_rows(absent, end))))
+            f.write("\n<h2>По объектам</h2>\n")
+            f.write(
+                "\n".join(html_table(_DUTY_ENTITY_HEADER, _duty_entity_rows(entities)))
+            )
+            f.write("\n<h2>Журнал</h2>\n")
+            head, tail = html_table(_JOURNAL_HEADER, [])[:-1], "</tbody></table>"
+            f.write("\n".join(head) + "\n")
+            for _event, row in _journal(conn, a, b):
+                f.write(html_row(row) + "\n")
+            f.write(tail + "\n" + _HTML_END)
+    finally:
+        conn.close()
+
+    logger.info(
+        "Duty report %s..%s: %d events, %d absent, %.2f s",
+        a,
+        b,
+        events,
+        len(absent),
+        time.perf_counter() - t0,
+    )
+    return DutyReport(start, end, events, entities, absent, paths)
+
+
+def duty_period(day: date, days: int = 1) -> tuple[datetime, datetime]:
+    """The duty period of `days` days that starts on `day` at
+    DUTY_DAY_START_HOUR."""
+    start = datetime.combine(day, datetime.min.time()).replace(hour=DUTY_DAY_START_HOUR)
+    return start, start + timedelta(days=days)
+
+
+def last_duty_period(now: datetime | None = None) -> tuple[datetime, datetime]:
+    """The last full duty day before `now`."""
+    now = now or datetime.now()
+    start, end = duty_period(now.date() - timedelta(days=1))
+    if end > now:
+        start, end = duty_period(now.date() - timedelta(days=2))
+    return start, end
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Отчёты по журналу событий")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--out", default=REPORTS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    movement = commands.add_parser("movement", help="движение за период")
+    movement.add_argument("start", type=date.fromisoformat, help="YYYY-MM-DD")
+    movement.add_argument("end", type=date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    movement.add_argument("--by", choices=SHARD_KINDS, default="month")
+    movement.add_argument("--workers", type=int, default=REPORT_WORKERS)
+
+    duty = commands.add_parser("duty", help="суточный расход")
+    duty.add_argument(
+        "day",
+        type=date.fromisoformat,
+        nargs="?",
+        help="YYYY-MM-DD, the last by default",
+    )
+    duty.add_argument("--days", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "movement":
+        report = build_movement_report(
+            args.start, args.end, args.by, args.workers, args.db
+        )
+        paths = write_movement_csv(report, args.out)
+        paths.append(write_movement_html(report, args.out))
+    else:
+        if args.day is None:
+            start, end = last_duty_period()
+        else:
+            start, end = duty_period(args.day, args.days)
+        paths = write_duty_report(start, end, args.out, args.db).paths
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Snapshot of the accounting grids, painted at startup before the database is read.
+
+On exit the app saves what the accounting tab shows — id, name, status,
+displayed timestamp and version of every vehicle and commander — to
+UI_SNAPSHOT. At the next start the grids are painted from it at once, and
+the database is read on a worker thread and reconciled against them (see
+CardGridModel.reconcile), so a large fleet is on screen before the first
+query finishes.
+
+The snapshot is only a cache: a missing, unreadable or outdated file is
+ignored and the grids are filled from the database as usual.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Iterable
+
+from config import UI_SNAPSHOT
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1  # bump when the row layout changes
+
+# (id, name, status, displayed timestamp, version), as drawn by the card grid
+Row = tuple[int, str, str, str, int]
+
+
+def save(sections: dict[str, Iterable[Row]], path: str = UI_SNAPSHOT) -> None:
+    """Write the rows of every section, replacing the old snapshot atomically."""
+    data = {
+        "format": SNAPSHOT_FORMAT,
+        "saved": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sections": {
+            name: [list(row) for row in rows] for name, rows in sections.items()
+        },
+    }
+    part = path + ".part"
+    try:
+        with open(part, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(part, path)
+    except OSError as e:
+        logger.warning("Cannot write UI snapshot %s: %s", path, e)
+
+
+def load(path: str = UI_SNAPSHOT) -> dict[str, list[Row]]:
+    """Return the saved rows per section, or {} if there is no usable snapshot."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable UI snapshot %s: %s", path, e)
+        return {}
+    try:
+        if data["format"] != SNAPSHOT_FORMAT:
+            return {}
+        return {
+            name: [
+                (int(eid), str(entity), str(status), str(ts), int(version))
+                for eid, entity, status, ts, version in rows
+            ]
+            for name, rows in data["sections"].items()
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("Ignoring malformed UI snapshot %s: %s", path, e)
+        return {}
@@ -0,0 +1,52 @@
+"""Startup timeline: when each phase of application start finished.
+
+main.py imports this module before anything else, so times are measured
+from (almost) process start. The app calls mark() as each phase ends —
+imports, database open, migrations, first paint, fully interactive — and
+write() appends the launch as one line to STARTUP_LOG:
+
+    2026-03-01 08:00:01  import=0.412  db_open=0.455  migrate=0.470 ...
+
+so startup regressions can be compared across versions and machines.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime
+
+from config import STARTUP_LOG, STARTUP_LOG_KEEP
+
+logger = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()
+_marks: list[tuple[str, float]] = []
+
+
+def mark(phase: str) -> None:
+    """Record that a phase finished now, in seconds since process start."""
+    _marks.append((phase, time.perf_counter() - _T0))
+
+
+def marks() -> list[tuple[str, float]]:
+    return list(_marks)
+
+
+def format_line(when: datetime | None = None) -> str:
+    stamp = (when or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    phases = "  ".join(f"{name}={seconds:.3f}" for name, seconds in _marks)
+    return f"{stamp}  {phases}"
+
+
+def write(path: str = STARTUP_LOG, keep: int = STARTUP_LOG_KEEP) -> None:
+    """Append this launch to the log, keeping only the newest `keep` lines."""
+    try:
+        lines: list[str] = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        lines.append(format_line())
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines[-keep:]) + "\n")
+    except OSError as e:
+        logger.warning("Cannot write startup log %s: %s", path, e)
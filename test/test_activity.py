@@ -0,0 +1,314 @@
+"""Tests for the activity rollups and Database.activity_series().
+
+What it checks
+--------------
+1.  Incremental counts — every status change and create/delete adds one to
+    its hourly and daily rollup row, with the event's own timestamp; a
+    rejected compare-and-set update counts nothing.
+2.  Series — day, week and month buckets sum the daily rollups, include
+    empty buckets with zeros, clip the first and last bucket to the range
+    and filter by entity type; bad arguments raise ValueError.
+3.  Rebuild — rebuild_activity_rollups() restores the counts from the event
+    log, keeps hours whose events were purged, and clear_events() empties
+    the rollups too.
+4.  Migration — upgrading a database that predates the rollups backfills
+    them from the events already in it.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, ".")
+
+import migrations  # noqa: E402
+from database import ConflictError, Database  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+# (entity_type, event_type, ts) of the events written by _insert_events().
+_EVENTS = [
+    ("vehicle", "arrived", "2026-03-02 08:10:00"),  # Monday
+    ("vehicle", "departed", "2026-03-02 08:40:00"),
+    ("vehicle", "arrived", "2026-03-02 17:00:00"),
+    ("commander", "arrived", "2026-03-04 09:00:00"),
+    ("vehicle", "departed", "2026-03-08 23:59:59"),  # Sunday
+    ("vehicle", "arrived", "2026-03-09 00:00:00"),  # next Monday
+    ("commander", "departed", "2026-03-31 12:00:00"),
+    ("vehicle", "arrived", "2026-04-01 06:00:00"),
+]
+
+
+def _insert_events(db: Database) -> None:
+    """Write _EVENTS straight into the log, bypassing the rollups."""
+    db._conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES (?, 1, 'x', ?, ?)",
+        _EVENTS,
+    )
+    db._conn.commit()
+
+
+def _rollup(db: Database, table: str) -> dict[tuple[str, str, str], int]:
+    return {
+        (r[0], r[1], r[2]): r[3]
+        for r in db._conn.execute(f"SELECT * FROM {table}").fetchall()
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — incremental counts
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_incremental_counts() -> None:
+    section("TEST 1 · Writes update the rollups in the same transaction")
+
+    db = Database(":memory:")
+    vid = db.add_vehicle("А001АА")
+    version = db.update_status_and_log("vehicle", vid, "А001АА", "arrived").version
+    db.update_status_and_log("vehicle", vid, "А001АА", "departed")
+    try:
+        db.update_status_and_log(
+            "vehicle", vid, "А001АА", "arrived", expected_version=version
+        )
+    except ConflictError:
+        pass
+    db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+
+    expected: dict[tuple[str, str, str], int] = {}
+    expected_daily: dict[tuple[str, str, str], int] = {}
+    for ev in db._conn.execute("SELECT * FROM events").fetchall():
+        hour = (ev["ts"][:13], ev["entity_type"], ev["event_type"])
+        day = (ev["ts"][:10], ev["entity_type"], ev["event_type"])
+        expected[hour] = expected.get(hour, 0) + 1
+        expected_daily[day] = expected_daily.get(day, 0) + 1
+
+    all_ok = check(
+        _rollup(db, "activity_hourly") == expected,
+        "Hourly rollup matches the event log",
+        f"{_rollup(db, 'activity_hourly')} != {expected}",
+    )
+    all_ok &= check(
+        _rollup(db, "activity_daily") == expected_daily,
+        "Daily rollup matches the event log",
+    )
+    all_ok &= check(
+        sum(expected.values()) == 4,
+        "Created + 3 status changes counted; the conflicting update is not",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — activity_series
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_series() -> None:
+    section("TEST 2 · activity_series() buckets")
+
+    db = Database(":memory:")
+    _insert_events(db)
+    db.rebuild_activity_rollups()
+
+    days = db.activity_series(date(2026, 3, 1), date(2026, 3, 9), "day")
+    all_ok = check(len(days) == 9, "One item per day, empty days included")
+    all_ok &= check(
+        days[1] == {
+            "start": date(2026, 3, 2), "arrived": 2, "departed": 1,
+            "created": 0, "deleted": 0,
+        },
+        "2 March: both hours summed",
+        str(days[1]),
+    )  # fmt: skip
+    all_ok &= check(days[0]["arrived"] == 0, "Empty day has zeros")
+
+    weeks = db.activity_series(date(2026, 3, 4), date(2026, 3, 31), "week")
+    starts = [w["start"] for w in weeks]
+    all_ok &= check(
+        starts == [date(2026, 3, d) for d in (2, 9, 16, 23, 30)],
+        "Weeks start on Monday",
+        str(starts),
+    )
+    all_ok &= check(
+        (weeks[0]["arrived"], weeks[0]["departed"]) == (1, 1),
+        "First week only counts days inside the range",
+        str(weeks[0]),
+    )
+    all_ok &= check(weeks[1]["arrived"] == 1, "Monday 00:00 opens the next week")
+
+    months = db.activity_series(date(2026, 2, 15), date(2026, 4, 30), "month")
+    all_ok &= check(
+        [(m["start"], m["arrived"], m["departed"]) for m in months]
+        == [(date(2026, 2, 1), 0, 0), (date(2026, 3, 1), 4, 3),
+            (date(2026, 4, 1), 1, 0)],
+        "Month buckets",
+        str(months),
+    )  # fmt: skip
+
+    commanders = db.activity_series(
+        date(2026, 3, 1), date(2026, 3, 31), "month", "commander"
+    )
+    all_ok &= check(
+        (commanders[0]["arrived"], commanders[0]["departed"]) == (1, 1),
+        "Entity type filter",
+    )
+
+    for label, args in (
+        ("Unknown bucket", (date(2026, 3, 1), date(2026, 3, 2), "year")),
+        ("Unknown entity type", (date(2026, 3, 1), date(2026, 3, 2), "day", "x")),
+        ("End before start", (date(2026, 3, 2), date(2026, 3, 1), "day")),
+    ):
+        try:
+            db.activity_series(*args)
+            all_ok &= check(False, f"{label} raises ValueError")
+        except ValueError:
+            all_ok &= check(True, f"{label} raises ValueError")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — rebuild and clear
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_rebuild() -> None:
+    section("TEST 3 · Rebuild keeps purged history; clear empties it")
+
+    db = Database(":memory:")
+    _insert_events(db)
+    db.rebuild_activity_rollups()
+    full = _rollup(db, "activity_hourly")
+
+    db._conn.execute("UPDATE activity_hourly SET count = 99")
+    db._conn.commit()
+    db.rebuild_activity_rollups()
+    all_ok = check(
+        _rollup(db, "activity_hourly") == full, "Corrupted counts are restored"
+    )
+
+    # Purge everything before 9 March, then rebuild from what is left.
+    db._conn.execute("DELETE FROM events WHERE ts < '2026-03-09'")
+    db._conn.commit()
+    db.rebuild_activity_rollups()
+    all_ok &= check(
+        _rollup(db, "activity_hourly") == full, "Purged hours keep their counts"
+    )
+    march = db.activity_series(date(2026, 3, 1), date(2026, 3, 31), "month")
+    all_ok &= check(
+        (march[0]["arrived"], march[0]["departed"]) == (4, 3),
+        "Series still reaches the purged days",
+    )
+
+    db.clear_events()
+    all_ok &= check(
+        not _rollup(db, "activity_hourly") and not _rollup(db, "activity_daily"),
+        "clear_events() empties both rollups",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — migration backfill
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_migration_backfill() -> None:
+    section("TEST 4 · Upgrade backfills the rollups")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        conn = sqlite3.connect(path)
+        before = [m for m in migrations.MIGRATIONS if m.version < 5]
+        migrations.upgrade(conn, before)
+        conn.executemany(
+            "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+            "VALUES (?, 1, 'x', ?, ?)",
+            _EVENTS,
+        )
+        conn.commit()
+        conn.close()
+
+        db = Database(path)
+        reference = Database(":memory:")
+        _insert_events(reference)
+        reference.rebuild_activity_rollups()
+        all_ok = check(
+            _rollup(db, "activity_hourly") == _rollup(reference, "activity_hourly"),
+            "Hourly rollup backfilled",
+        )
+        all_ok &= check(
+            _rollup(db, "activity_daily") == _rollup(reference, "activity_daily"),
+            "Daily rollup backfilled",
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Activity rollup tests                       ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_incremental_counts,
+        test_series,
+        test_rebuild,
+        test_migration_backfill,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Tests for the overdue alert scheduler (alerts.py).
+
+What it checks
+--------------
+1.  Deadlines — a departure is due exactly its type's allowance later;
+    due() fires nothing before that and each entity once; types with no
+    allowance are never tracked.
+2.  Status changes — arriving or deleting cancels a pending deadline and
+    clears an overdue entity; the same departure tracked again changes
+    nothing; a new departure replaces the old deadline.
+3.  Load — loading a type's rows tracks its departed entities, clears
+    those that came back and forgets those that are gone, leaving the
+    other type alone.
+4.  Heap size — after many status changes the heap holds at most a
+    constant factor more entries than the entities it watches.
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from alerts import OverdueScheduler  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+T0 = datetime(2026, 3, 1, 8, 0, 0)
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _ts(at: datetime) -> str:
+    return at.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ids(alerts) -> list[int]:
+    return [a.entity_id for a in alerts]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — deadlines
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_deadlines() -> None:
+    section("TEST 1 · Deadlines fire once, after the allowance")
+
+    s = OverdueScheduler({"vehicle": 2, "commander": 0})
+    s.track("vehicle", 1, "А001АА", "departed", _ts(T0))
+    s.track("vehicle", 2, "В002ВВ", "departed", _ts(T0 + timedelta(minutes=30)))
+    s.track("commander", 1, "Иванов", "departed", _ts(T0))
+
+    all_ok = check(len(s) == 2, "A type with allowance 0 is not tracked")
+    all_ok &= check(
+        s.next_deadline() == T0 + timedelta(hours=2), "The earliest deadline is next"
+    )
+    all_ok &= check(
+        s.due(T0 + timedelta(hours=2) - timedelta(seconds=1)) == [],
+        "Nothing is due a second early",
+    )
+    fired = s.due(T0 + timedelta(hours=2))
+    all_ok &= check(_ids(fired) == [1], "Due at the deadline", str(fired))
+    all_ok &= check(s.due(T0 + timedelta(hours=2)) == [], "An entity fires only once")
+    fired = s.due(T0 + timedelta(days=1))
+    all_ok &= check(_ids(fired) == [2], "The next one fires later")
+    all_ok &= check(
+        _ids(s.overdue()) == [1, 2] and s.overdue_ids("vehicle") == {1, 2},
+        "Both are overdue, longest first",
+    )
+    all_ok &= check(s.next_deadline() is None, "No deadline left")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — status changes
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_status_changes() -> None:
+    section("TEST 2 · Status changes cancel and replace deadlines")
+
+    s = OverdueScheduler({"vehicle": 1})
+    s.track("vehicle", 1, "А001АА", "departed", _ts(T0))
+    s.track("vehicle", 2, "В002ВВ", "departed", _ts(T0))
+    s.track("vehicle", 3, "Е003ЕЕ", "departed", _ts(T0))
+    all_ok = check(
+        s.track("vehicle", 1, "А001АА", "arrived", _ts(T0 + timedelta(minutes=5)))
+        is False,
+        "Arriving before the deadline clears nothing",
+    )
+    s.track("vehicle", 2, "В002ВВ", "deleted", None)
+    all_ok &= check(
+        _ids(s.due(T0 + timedelta(hours=1))) == [3],
+        "Arrived and deleted entities do not fire",
+    )
+
+    all_ok &= check(
+        s.track("vehicle", 3, "Е003ЕЕ", "departed", _ts(T0)) is False
+        and s.overdue_ids("vehicle") == {3},
+        "The same departure tracked again changes nothing",
+    )
+    later = T0 + timedelta(hours=3)
+    all_ok &= check(
+        s.track("vehicle", 3, "Е003ЕЕ", "departed", _ts(later)) is True
+        and s.overdue() == [],
+        "A new departure clears the overdue flag",
+    )
+    all_ok &= check(
+        s.next_deadline() == later + timedelta(hours=1),
+        "… and sets a new deadline",
+    )
+    s.due(later + timedelta(hours=1))
+    all_ok &= check(
+        s.track("vehicle", 3, "Е003ЕЕ", "arrived", _ts(later + timedelta(hours=2)))
+        is True
+        and len(s) == 0,
+        "Arriving clears an overdue entity",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — load
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_load() -> None:
+    section("TEST 3 · Loading a type's rows")
+
+    s = OverdueScheduler({"vehicle": 1, "commander": 1})
+    s.track("commander", 1, "Иванов", "departed", _ts(T0))
+    rows = [
+        (1, "А001АА", "departed", _ts(T0), 3),
+        (2, "В002ВВ", "arrived", _ts(T0), 2),
+        (3, "Е003ЕЕ", "departed", _ts(T0 + timedelta(hours=5)), 1),
+        (4, "К004КК", "idle", _ts(T0), 0),
+    ]
+    all_ok = check(s.load("vehicle", rows) == set(), "Nothing to clear at first")
+    fired = s.due(T0 + timedelta(hours=1))
+    all_ok &= check(
+        sorted((a.entity_type, a.entity_id) for a in fired)
+        == [("commander", 1), ("vehicle", 1)],
+        "Departed rows are tracked",
+        str(fired),
+    )
+
+    rows = [
+        (1, "А001АА", "arrived", _ts(T0 + timedelta(hours=2)), 4),
+        (2, "В002ВВ", "arrived", _ts(T0), 2),
+    ]
+    all_ok &= check(
+        s.load("vehicle", rows) == {1}, "A returned entity is reported as cleared"
+    )
+    all_ok &= check(
+        s.next_deadline() is None and s.overdue_ids("commander") == {1},
+        "Entities gone from the rows are forgotten; other types are kept",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — heap size
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_heap_size() -> None:
+    section("TEST 4 · Stale entries do not pile up")
+
+    s = OverdueScheduler({"vehicle": 12})
+    n = 1000
+    for step in range(20):
+        at = _ts(T0 + timedelta(minutes=step))
+        for eid in range(n):
+            s.track("vehicle", eid, "x", "departed", at)
+    all_ok = check(len(s) == n, f"{n} entities watched")
+    all_ok &= check(
+        len(s._heap) <= 2 * n + 64,
+        f"Heap holds {len(s._heap)} entries after {20 * n} departures",
+    )
+    all_ok &= check(
+        s.next_deadline() == T0 + timedelta(minutes=19, hours=12),
+        "Only the latest departure of each entity counts",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Overdue alert tests                         ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_deadlines, test_status_changes, test_load, test_heap_size]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
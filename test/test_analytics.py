@@ -0,0 +1,298 @@
+"""Tests for the NumPy analytics module (analytics.py).
+
+Skipped when NumPy is not installed; the app itself does not need it.
+
+What it checks
+--------------
+1.  Loading — load_events() returns every event, or only the range asked
+    for, as int64/int8 columns ordered by entity and time.
+2.  Hand-made log — dwell times, occupancy levels and peaks, absences and
+    the heatmap of a small log with repeats, a first departure, a deletion
+    and same-second events match values worked out by hand.
+3.  Synthetic log — on bench/synthetic.py data every result matches a
+    plain Python replay of the same events.
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+import analytics  # noqa: E402
+from bench.synthetic import generate  # noqa: E402
+from database import Database  # noqa: E402
+
+np = analytics.np
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _skip() -> bool:
+    if analytics.AVAILABLE:
+        return False
+    ok("NumPy is not installed — skipped")
+    return True
+
+
+# (entity_type, entity_id, event_type, ts) on 2 March 2026, a Monday.
+_EVENTS = [
+    ("vehicle", 1, "departed", "2026-03-02 06:00:00"),  # on site before
+    ("vehicle", 1, "arrived", "2026-03-02 08:00:00"),
+    ("vehicle", 1, "departed", "2026-03-02 10:00:00"),
+    ("vehicle", 2, "created", "2026-03-02 08:30:00"),
+    ("vehicle", 2, "arrived", "2026-03-02 09:00:00"),
+    ("vehicle", 2, "arrived", "2026-03-02 09:30:00"),  # repeat
+    ("vehicle", 2, "departed", "2026-03-02 12:00:00"),
+    ("vehicle", 2, "arrived", "2026-03-02 12:00:00"),  # same second
+    ("vehicle", 2, "deleted", "2026-03-02 13:00:00"),
+    ("commander", 1, "arrived", "2026-03-02 07:00:00"),
+    ("commander", 3, "departed", "2026-03-02 05:00:00"),
+    ("commander", 3, "arrived", "2026-03-02 20:00:00"),
+]
+
+
+def _db(events: list[tuple]) -> Database:
+    db = Database(":memory:")
+    db._conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES (?, ?, 'x', ?, ?)",
+        events,
+    )
+    db._conn.commit()
+    return db
+
+
+def _replay(db: Database, start: int, end: int, step: int, until: int) -> dict:
+    """The analytics results computed event by event, as the reference."""
+    rows = sorted(
+        (r["entity_type"], r["entity_id"], analytics.epoch(
+            datetime.strptime(r["ts"], "%Y-%m-%d %H:%M:%S")), r["id"],
+         r["event_type"])
+        for r in db._conn.execute("SELECT * FROM events").fetchall()
+    )  # fmt: skip
+    dwell, absences, changes = [], [], []
+    heat = [[0] * 24 for _ in range(7)]
+    state: dict[tuple, tuple[str, int]] = {}
+    baseline = 0
+    deleted = set()
+    for etype, eid, ts, _id, event in rows:
+        if event == "arrived":
+            day = datetime(1970, 1, 1) + timedelta(seconds=ts)
+            heat[day.weekday()][day.hour] += 1
+        if event not in ("arrived", "departed", "deleted"):
+            continue
+        if event == "deleted":
+            deleted.add((etype, eid))
+        here = event == "arrived"
+        prev = state.get((etype, eid))
+        if prev is None and not here:
+            baseline += 1
+        if prev is not None and prev[0] == here:
+            continue
+        if prev is not None and prev[0] and not here:
+            dwell.append(ts - prev[1])
+        if prev is not None and not prev[0] and here:
+            absences.append((ts - prev[1], etype, eid, prev[1], ts))
+        state[(etype, eid)] = (here, ts)
+        changes.append((ts, 1 if here else -1))
+    for (etype, eid), (here, ts) in state.items():
+        if not here and (etype, eid) not in deleted:
+            absences.append((until - ts, etype, eid, ts, None))
+
+    changes.sort(key=lambda c: c[0])
+    level, peak = [], []
+    for b in range(start, end, step):
+        now = baseline + sum(d for t, d in changes if t < b)
+        top = now
+        for t, d in changes:
+            if b <= t < b + step:
+                now += d
+                top = max(top, now)
+        level.append(baseline + sum(d for t, d in changes if t < b))
+        peak.append(top)
+    return {
+        "dwell": sorted(dwell),
+        "absences": sorted(a[0] for a in absences),
+        "level": level,
+        "peak": peak,
+        "heat": heat,
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — loading
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_load() -> None:
+    section("TEST 1 · load_events() columns")
+    if _skip():
+        return
+
+    db = _db(_EVENTS)
+    cols = analytics.load_events(db)
+    all_ok = check(len(cols.id) == len(_EVENTS), f"{len(_EVENTS)} events loaded")
+    all_ok &= check(
+        cols.ts.dtype == np.int64 and cols.event.dtype == np.int8,
+        "int64 times, int8 codes",
+    )
+    order = np.lexsort((cols.id, cols.ts, cols.entity_id, cols.entity_type))
+    all_ok &= check(
+        bool((order == np.arange(len(order))).all()), "Ordered by entity, then time"
+    )
+    start, end = datetime(2026, 3, 2, 8), datetime(2026, 3, 2, 12)
+    part = analytics.load_events(db, start, end)
+    inside = (part.ts >= analytics.epoch(start)) & (part.ts < analytics.epoch(end))
+    all_ok &= check(
+        len(part.id) == 5 and bool(inside.all()),
+        "Range loads only start <= ts < end",
+        str(len(part.id)),
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — hand-made log
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_hand_made() -> None:
+    section("TEST 2 · Results on a hand-made log")
+    if _skip():
+        return
+
+    cols = analytics.load_events(_db(_EVENTS))
+    hour = 3600
+    day = analytics.epoch(datetime(2026, 3, 2))
+
+    dwell = sorted(analytics.dwell_times(cols).tolist())
+    all_ok = check(
+        dwell == [hour, 2 * hour, 3 * hour], "Dwell times: 1 h, 2 h, 3 h", str(dwell)
+    )
+
+    occ = analytics.occupancy(cols, day, day + 24 * hour, hour)
+    all_ok &= check(
+        occ.level[:14].tolist() == [2, 2, 2, 2, 2, 2, 1, 0, 1, 2, 3, 2, 2, 2],
+        "Levels at 00:00–13:00",
+        str(occ.level.tolist()),
+    )
+    all_ok &= check(
+        occ.peak[5] == 2 and occ.peak[12] == 2 and occ.peak[20] == 2,
+        "Peaks: 05:00 and 12:00 hold, commander 3 returns at 20:00",
+        str(occ.peak.tolist()),
+    )
+
+    absences = analytics.longest_absences(cols, 2, until=day + 24 * hour)
+    all_ok &= check(
+        [(a.entity_type, a.entity_id, a.seconds) for a in absences]
+        == [("commander", 3, 15 * hour), ("vehicle", 1, 14 * hour)],
+        "Longest absences; the deleted vehicle is not absent",
+        str(absences),
+    )
+    closed = analytics.longest_absences(cols, 10)
+    all_ok &= check(
+        [a.returned is not None for a in closed] == [True, True, True],
+        "Without `until` only ended absences",
+        str(closed),
+    )
+
+    heat = analytics.hourly_heatmap(cols)
+    all_ok &= check(
+        int(heat.sum()) == 6 and heat[0, 9] == 2 and heat[0, 20] == 1,
+        "Heatmap: Monday row, arrivals per hour",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — synthetic log against a replay
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_against_replay() -> None:
+    section("TEST 3 · Synthetic log matches an event-by-event replay")
+    if _skip():
+        return
+
+    db = Database(":memory:")
+    end = datetime(2026, 3, 1)
+    generate(db, vehicles=40, commanders=10, months=1, end=end)
+    cols = analytics.load_events(db)
+    start = analytics.epoch(end) - 30 * 86400
+    until = analytics.epoch(end)
+    ref = _replay(db, start, until, 6 * 3600, until)
+
+    all_ok = check(
+        sorted(analytics.dwell_times(cols).tolist()) == ref["dwell"],
+        f"Dwell times ({len(ref['dwell'])} stays)",
+    )
+    occ = analytics.occupancy(cols, start, until, 6 * 3600)
+    all_ok &= check(occ.level.tolist() == ref["level"], "Occupancy levels")
+    all_ok &= check(occ.peak.tolist() == ref["peak"], "Occupancy peaks")
+    absences = analytics.longest_absences(cols, 10**6, until=until)
+    all_ok &= check(
+        sorted(a.seconds for a in absences) == ref["absences"],
+        f"Absences ({len(ref['absences'])})",
+    )
+    all_ok &= check(analytics.hourly_heatmap(cols).tolist() == ref["heat"], "Heatmap")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Analytics tests                             ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_load, test_hand_made, test_against_replay]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
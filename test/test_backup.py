@@ -0,0 +1,233 @@
+"""Tests for the online backups (backup.py).
+
+What it checks
+--------------
+1.  Output — run_once() writes a gzip file that decompresses to a copy of
+    the database with every row, or a plain .db with compress=False.
+2.  Rotation — after a backup only the `keep` newest files remain.
+3.  Verification — a copy that fails quick_check raises BackupError and
+    leaves neither the copy nor its .part file behind.
+4.  Lifecycle — start() removes the .part file of a backup that never
+    finished but keeps one that is still being written, and stop() ends
+    the worker.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+import backup  # noqa: E402
+from backup import BackupError, BackupManager  # noqa: E402
+from database import Database  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _db(tmp: str, vehicles: int = 50) -> Database:
+    db = Database(os.path.join(tmp, "database.db"))
+    for i in range(vehicles):
+        db.add_vehicle(f"А{i:03d}АА")
+    return db
+
+
+class _CorruptCopy:
+    """Stands in for Database: backup() writes a copy with a damaged header.
+
+    The freelist page count (offset 36) is made wrong; the file still opens,
+    and quick_check reports the mismatch.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def backup(self, dest: str) -> None:
+        self.db.backup(dest)
+        with open(dest, "r+b") as f:
+            f.seek(36)
+            f.write(struct.pack(">I", 7))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — output
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_output() -> None:
+    section("TEST 1 · Compressed and plain backups")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(tmp)
+        out = os.path.join(tmp, "backups")
+        info = BackupManager(db, out).run_once()
+
+        all_ok = check(info.path.endswith(".db.gz"), "Compressed by default")
+        restored = os.path.join(tmp, "restored.db")
+        with gzip.open(info.path, "rb") as src, open(restored, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        conn = sqlite3.connect(restored)
+        count = conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+        conn.close()
+        all_ok &= check(count == 50, "The gzip holds every row", f"{count} rows")
+        all_ok &= check(
+            info.size == os.path.getsize(info.path), "size is the file on disk"
+        )
+
+        plain = BackupManager(db, os.path.join(tmp, "plain"), compress=False)
+        all_ok &= check(
+            plain.run_once().path.endswith(".db"), "compress=False keeps a .db"
+        )
+        leftovers = [n for n in os.listdir(out) if n.endswith(".part")]
+        all_ok &= check(not leftovers, "No .part files left", str(leftovers))
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — rotation
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_rotation() -> None:
+    section("TEST 2 · Rotation keeps the newest backups")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(tmp, vehicles=1)
+        out = os.path.join(tmp, "backups")
+        os.makedirs(out)
+        old = [
+            os.path.join(out, f"database-2020010{i}-000000.db.gz") for i in (1, 2, 3, 4)
+        ]
+        for path in old:
+            open(path, "wb").close()
+
+        info = BackupManager(db, out, keep=3).run_once()
+        left = BackupManager(db, out).list_backups()
+        all_ok = check(len(left) == 3, "keep=3 files remain", str(left))
+        all_ok &= check(
+            left == old[2:] + [info.path], "The oldest ones were removed", str(left)
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — verification
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_failed_check() -> None:
+    section("TEST 3 · A damaged copy is rejected")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(tmp)
+        out = os.path.join(tmp, "backups")
+        manager = BackupManager(_CorruptCopy(db), out)
+        try:
+            manager.run_once()
+            error = ""
+        except BackupError as e:
+            error = str(e)
+        all_ok = check("failed quick_check" in error, "BackupError raised", error)
+        all_ok &= check(os.listdir(out) == [], "Neither the copy nor .part is kept")
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — start and stop
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_lifecycle() -> None:
+    section("TEST 4 · start() cleans up, stop() ends the worker")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(tmp, vehicles=1)
+        out = os.path.join(tmp, "backups")
+        os.makedirs(out)
+        stale = os.path.join(out, "database-20200101-000000.db.part")
+        fresh = os.path.join(out, "database-20200102-000000.db.gz.part")
+        for path in (stale, fresh):
+            open(path, "wb").close()
+        hour_ago = time.time() - 3600
+        os.utime(stale, (hour_ago, hour_ago))
+
+        manager = BackupManager(db, out, interval_hours=0)
+        manager.start()
+        thread = manager._thread
+        all_ok = check(not os.path.exists(stale), "An abandoned .part is removed")
+        all_ok &= check(
+            os.path.exists(fresh),
+            f"A .part written in the last {backup._STALE_PART_AGE:.0f} s is kept",
+        )
+        manager.stop()
+        all_ok &= check(not thread.is_alive(), "stop() ends the worker")
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║                     Backup tests                         ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_output, test_rotation, test_failed_check, test_lifecycle]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
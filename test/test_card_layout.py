@@ -0,0 +1,699 @@
+"""Headless tests for the card grid model (ui/cardlayout.py).
+
+Every test drives CardGridModel against a RecordingCanvas, so no window
+or display is needed. Besides checking what ends up on the canvas, the
+tests hold each action to a budget of canvas calls.
+
+What it checks
+--------------
+1.  Geometry — every card's centre hits that card, gaps and the area past
+    the last card hit nothing.
+2.  Populate — one card is five items, drawn in name order, within
+    5·N + 1 canvas calls.
+3.  Toggle — update() repaints one card in O(1) calls, the same number
+    for 100 cards as for 10 000.
+4.  Hover — moving the highlight costs at most two calls.
+5.  Resize and delete — existing items are moved with coords(), never
+    recreated; delete moves only the cards after the removed one and
+    leaves no canvas items of it behind.
+6.  Adaptive columns — the column count follows the canvas width and
+    hit-testing stays correct after a relayout.
+7.  Progressive fill — load() can draw only the first cards; the rest
+    are drawn by draw_more(), and cards not drawn yet cannot be hit but
+    keep updates and deletes made in the meantime.
+8.  Memory — loading 20 000 cards straight from Database.iter_entities()
+    stays within a per-card budget, both retained and at the peak.
+9.  Reconcile — fresh rows applied to a grid painted from the startup
+    snapshot change only what differs: no calls when nothing changed,
+    O(1) per changed status, new and deleted cards move only the cards
+    after them, and stale rows are ignored. The result matches a grid
+    loaded from the fresh rows.
+10. Overdue — set_overdue() repaints one departed card in the overdue
+    colours within the toggle budget; the flag survives load() and
+    reconcile() and is dropped by a status change or a delete.
+"""
+
+import sys
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from bench.synthetic import vehicle_number  # noqa: E402
+from database import Database  # noqa: E402
+from ui.cardlayout import (  # noqa: E402
+    CARD_OVERDUE_COLORS,
+    CARD_STATUS_COLORS,
+    CardGridModel,
+    RecordingCanvas,
+)
+from ui.components import fmt_timestamp  # noqa: E402
+
+# Canvas-call budgets per action.
+ITEMS_PER_CARD = 5
+TOGGLE_BUDGET = 8
+HOVER_BUDGET = 2
+RELAYOUT_PER_CARD = 6  # five coords() plus the name's wrap width
+
+# Python heap per loaded card: the record, its name and timestamp strings,
+# canvas item ids and the lookup structures.
+CARD_MEMORY_BUDGET = 640  # bytes
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _cards(n: int) -> list[tuple[int, str, str, str, int]]:
+    """n cards in reverse name order, cycling through all three statuses."""
+    statuses = ("idle", "arrived", "departed")
+    return [
+        (i + 1, f"А{n - i:05d}АА", statuses[i % 3], "08:00 01.03.2026", 0)
+        for i in range(n)
+    ]
+
+
+def _model(n: int, width: int = 900) -> tuple[CardGridModel, RecordingCanvas]:
+    canvas = RecordingCanvas()
+    model = CardGridModel(canvas, "vehicle")
+    model.resize(width)
+    model.load(_cards(n))
+    canvas.reset_calls()
+    return model, canvas
+
+
+def _toggle_cost(n: int) -> int:
+    """Worst canvas-call count of one update() over a full status cycle."""
+    model, canvas = _model(n)
+    eid = model.order[n // 2]
+    worst = 0
+    for version, status in enumerate(("arrived", "departed", "idle", "arrived"), 1):
+        canvas.reset_calls()
+        model.update(eid, status, f"{8 + version:02d}:00 01.03.2026", version)
+        worst = max(worst, canvas.total_calls())
+    return worst
+
+
+class _IdCanvas:
+    """Canvas that only hands out item ids, as tk.Canvas does from Python's
+    point of view: the items themselves live in Tk, outside the heap."""
+
+    def __init__(self):
+        self._next_id = 0
+
+    def _create(self, *_args, **_kw) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    create_rectangle = create_text = _create
+
+    def itemconfigure(self, *_args, **_kw) -> None:
+        pass
+
+    def coords(self, *_args) -> None:
+        pass
+
+    def delete(self, *_args) -> None:
+        pass
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — geometry and hit-testing
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_geometry() -> None:
+    section("TEST 1 · Geometry and hit-testing")
+
+    model, canvas = _model(10, width=560)
+    geo = model.geometry
+    all_ok = True
+
+    hits = []
+    for idx, eid in enumerate(model.order):
+        x1, y1, x2, y2 = geo.card_rect(idx)
+        hits.append(model.hit_test((x1 + x2) // 2, (y1 + y2) // 2) == eid)
+    all_ok &= check(all(hits), "Every card centre hits its own card")
+
+    x1, y1, x2, _y2 = geo.card_rect(0)
+    all_ok &= check(
+        model.hit_test(x2 + geo.pad // 2, y1 + 5) == -1,
+        "Gap between columns hits nothing",
+    )
+    all_ok &= check(model.hit_test(x1 + 5, 2) == -1, "Top padding hits nothing")
+    last = geo.card_rect(len(model) - 1)
+    all_ok &= check(
+        model.hit_test(last[2] + geo.pad + 5, last[1] + 5) == -1,
+        "Empty cell after the last card hits nothing",
+    )
+    all_ok &= check(
+        model.total_height() == geo.pad + 4 * (geo.card_h + geo.pad),
+        "10 cards in 3 columns are 4 rows tall",
+        f"got {model.total_height()}",
+    )
+    all_ok &= check(
+        canvas.total_calls() == 0,
+        "Hit-testing makes no canvas calls",
+        f"{canvas.total_calls()} calls",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — populate
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_populate() -> None:
+    section("TEST 2 · Populate")
+
+    n = 1000
+    canvas = RecordingCanvas()
+    model = CardGridModel(canvas, "vehicle")
+    model.resize(900)
+    model.load(_cards(n))
+    all_ok = True
+
+    names = [model.items[eid].name for eid in model.order]
+    all_ok &= check(names == sorted(names), "Cards are in name order")
+    idle = sum(1 for eid in model.order if model.items[eid].status == "idle")
+    expected_items = ITEMS_PER_CARD * n - idle  # idle cards have no timestamp line
+    all_ok &= check(
+        len(canvas.items) == expected_items,
+        f"{n} cards drew {expected_items} canvas items",
+        f"got {len(canvas.items)}",
+    )
+    all_ok &= check(
+        canvas.total_calls() <= ITEMS_PER_CARD * n + 1,
+        f"Populate within {ITEMS_PER_CARD}·N + 1 canvas calls",
+        f"{canvas.total_calls()} calls",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — toggle is O(1)
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_toggle_constant() -> None:
+    section("TEST 3 · Toggle repaints one card in O(1) canvas calls")
+
+    small, large = _toggle_cost(100), _toggle_cost(10_000)
+    all_ok = check(
+        large <= TOGGLE_BUDGET,
+        f"Toggle within {TOGGLE_BUDGET} canvas calls",
+        f"{large} calls",
+    )
+    all_ok &= check(
+        small == large,
+        "Toggle cost does not grow with the grid",
+        f"100 cards: {small} calls, 10 000 cards: {large} calls",
+    )
+
+    model, canvas = _model(30)
+    eid = next(e for e in model.order if model.items[e].status == "idle")
+    model.update(eid, "arrived", "09:15 01.03.2026", 1)
+    item = model.items[eid]
+    sub2 = canvas.items[item.tag_sub2]["options"]
+    all_ok &= check(
+        sub2["text"] == "09:15 01.03.2026",
+        "Idle → arrived adds the timestamp line",
+    )
+    all_ok &= check(
+        canvas.items[item.tag_bg]["options"]["fill"]
+        == CARD_STATUS_COLORS["arrived"]["bg"],
+        "Card background switches to the arrived colour",
+    )
+    model.update(eid, "idle", "09:20 01.03.2026", 2)
+    all_ok &= check(
+        canvas.items[item.tag_sub2]["options"]["state"] == "hidden",
+        "Back to idle hides the timestamp line",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — hover
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_hover() -> None:
+    section("TEST 4 · Hover")
+
+    model, canvas = _model(100)
+    a, b = model.order[3], model.order[4]
+    all_ok = True
+
+    model.hover(a)
+    canvas.reset_calls()
+    moved = model.hover(b)
+    all_ok &= check(
+        moved and canvas.total_calls() <= HOVER_BUDGET,
+        f"Moving the highlight costs at most {HOVER_BUDGET} calls",
+        f"{canvas.total_calls()} calls",
+    )
+    canvas.reset_calls()
+    all_ok &= check(
+        not model.hover(b) and canvas.total_calls() == 0,
+        "Hovering the same card again makes no calls",
+    )
+    border = canvas.items[model.items[b].tag_border]["options"]["fill"]
+    status = model.items[b].status
+    all_ok &= check(
+        border == CARD_STATUS_COLORS[status]["text"],
+        "Hovered card border is highlighted",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 5 — resize and delete
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_resize_and_delete() -> None:
+    section("TEST 5 · Resize and delete move items instead of recreating them")
+
+    n = 1000
+    model, canvas = _model(n, width=900)
+    all_ok = True
+
+    all_ok &= check(
+        not model.resize(900) and canvas.total_calls() == 0,
+        "Resize to the same width makes no calls",
+    )
+    items_before = set(canvas.items)
+    model.resize(1300)
+    created = canvas.calls["create_rectangle"] + canvas.calls["create_text"]
+    all_ok &= check(
+        created == 0 and canvas.calls["delete"] == 0,
+        "Resize creates and deletes no items",
+        f"{created} created, {canvas.calls['delete']} deletes",
+    )
+    all_ok &= check(
+        set(canvas.items) == items_before, "Every card keeps its canvas items"
+    )
+    all_ok &= check(
+        canvas.total_calls() <= RELAYOUT_PER_CARD * n,
+        f"Resize within {RELAYOUT_PER_CARD}·N canvas calls",
+        f"{canvas.total_calls()} calls",
+    )
+    rects_ok = all(
+        canvas.items[model.items[eid].tag_border]["coords"]
+        == list(model.geometry.card_rect(idx))
+        for idx, eid in enumerate(model.order)
+    )
+    all_ok &= check(rects_ok, "Cards follow the new width")
+
+    victim = model.order[-10]
+    canvas.reset_calls()
+    model.remove(victim)
+    all_ok &= check(
+        victim not in model.items and victim not in model.order,
+        "Removed card is gone from the model",
+    )
+    all_ok &= check(
+        not any(f"c{victim}" in it["tags"] for it in canvas.items.values()),
+        "Removed card left no canvas items",
+    )
+    all_ok &= check(
+        canvas.total_calls() <= 1 + ITEMS_PER_CARD * 9,
+        "Delete near the end moves only the 9 cards after it",
+        f"{canvas.total_calls()} calls",
+    )
+    rects_ok = all(
+        canvas.items[model.items[eid].tag_border]["coords"]
+        == list(model.geometry.card_rect(idx))
+        for idx, eid in enumerate(model.order)
+    )
+    all_ok &= check(rects_ok, "Cards after the gap moved up one slot")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 6 — adaptive column count
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_adaptive_columns() -> None:
+    section("TEST 6 · Column count follows the width")
+
+    model, canvas = _model(50, width=300)
+    all_ok = True
+    cols = {}
+    for width in (100, 300, 560, 900, 1900):
+        model.resize(width)
+        cols[width] = model.geometry.cols
+    all_ok &= check(
+        cols[100] == 1 and cols[300] == 1, "Narrow canvas falls back to one column"
+    )
+    all_ok &= check(
+        cols[560] < cols[900] < cols[1900],
+        "Wider canvas fits more columns",
+        f"{cols}",
+    )
+    all_ok &= check(
+        model.geometry.cell_w() >= model.geometry.min_w,
+        "Cards never get narrower than the minimum",
+        f"cell width {model.geometry.cell_w()}",
+    )
+
+    geo = model.geometry
+    hits = []
+    for idx, eid in enumerate(model.order):
+        x1, y1, x2, y2 = geo.card_rect(idx)
+        hits.append(model.hit_test((x1 + x2) // 2, (y1 + y2) // 2) == eid)
+    all_ok &= check(all(hits), "Hit-testing matches the new layout")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 7 — progressive fill
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_progressive_fill() -> None:
+    section("TEST 7 · First screenful now, the rest in chunks")
+
+    n = 1000
+    canvas = RecordingCanvas()
+    model = CardGridModel(canvas, "vehicle")
+    model.resize(900)
+    first = model.geometry.capacity(900, 700)
+    model.load(_cards(n), first=first)
+    all_ok = check(
+        model.drawn == first and canvas.calls["delete"] == 1,
+        f"load(first={first}) drew only the first screenful",
+        f"drawn={model.drawn}",
+    )
+    tail = model.order[-1]
+    x1, y1, x2, y2 = model.geometry.card_rect(n - 1)
+    all_ok &= check(
+        model.hit_test((x1 + x2) // 2, (y1 + y2) // 2) == -1,
+        "A card that is not drawn yet cannot be hit",
+    )
+    model.update(tail, "departed", "12:00 01.03.2026", 5)
+    model.remove(model.order[-2])
+    model.remove(model.order[0])
+
+    chunks = 0
+    while model.draw_more(300):
+        chunks += 1
+    all_ok &= check(
+        model.drawn == len(model) == n - 2,
+        f"draw_more() finished the grid in {chunks + 1} chunks",
+        f"drawn={model.drawn} of {len(model)}",
+    )
+    card = model.items[tail]
+    all_ok &= check(
+        canvas.items[card.tag_sub2]["options"]["text"] == "12:00 01.03.2026",
+        "An update made before the card was drawn shows up when it is",
+    )
+    rects_ok = all(
+        canvas.items[model.items[eid].tag_border]["coords"]
+        == list(model.geometry.card_rect(idx))
+        for idx, eid in enumerate(model.order)
+    )
+    all_ok &= check(rects_ok, "Every card is in its slot after deletes mid-fill")
+    all_ok &= check(
+        len(canvas.items) == sum(len(c.canvas_items()) for c in model.items.values()),
+        "No stray canvas items",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 8 — memory per card
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_memory_budget() -> None:
+    section("TEST 8 · Memory per card")
+
+    n = 20_000
+    db = Database(path=":memory:")
+    statuses = ("idle", "arrived", "departed")
+    with db._conn:
+        db._conn.executemany(
+            "INSERT INTO vehicles (number, status, created, updated) "
+            "VALUES (?, ?, '2026-03-01 08:00:00', ?)",
+            [
+                (vehicle_number(i), statuses[i % 3], f"2026-03-01 09:{i % 60:02d}:00")
+                for i in range(n)
+            ],
+        )
+    model = CardGridModel(_IdCanvas(), "vehicle")
+    model.resize(900)
+
+    tracemalloc.start()
+    try:
+        model.load(
+            (eid, name, status, fmt_timestamp(ts), version)
+            for eid, name, status, ts, version in db.iter_entities("vehicle")
+        )
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    all_ok = check(len(model) == n, f"{n} cards loaded from the cursor")
+    all_ok &= check(
+        current / n <= CARD_MEMORY_BUDGET,
+        f"Retained memory within {CARD_MEMORY_BUDGET} B per card",
+        f"{current / n:.0f} B per card",
+    )
+    all_ok &= check(
+        peak / n <= CARD_MEMORY_BUDGET,
+        f"Peak memory within {CARD_MEMORY_BUDGET} B per card",
+        f"{peak / n:.0f} B per card",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 9 — reconciling a snapshot with fresh rows
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def _layout(model: CardGridModel, canvas: RecordingCanvas) -> list:
+    """What the grid shows: per card in order, its slot and visible texts."""
+    shown = []
+    for eid in model.order[: model.drawn]:
+        card = model.items[eid]
+        texts = [
+            canvas.items[item]["options"].get("text")
+            for item in card.canvas_items()[2:]
+            if canvas.items[item]["options"].get("state") != "hidden"
+        ]
+        shown.append((eid, canvas.items[card.tag_border]["coords"], texts))
+    return shown
+
+
+def test_reconcile() -> None:
+    section("TEST 9 · Reconcile a snapshot with fresh rows")
+
+    n = 10_000
+    saved = _cards(n)
+    model, canvas = _model(n)
+    all_ok = check(
+        model.reconcile(saved) == 0 and canvas.total_calls() == 0,
+        "Unchanged rows: no changes and no canvas calls",
+        f"{canvas.total_calls()} calls",
+    )
+
+    fresh = list(saved)
+    for i in (10, 500, 9000):
+        eid, name, _status, _ts, version = fresh[i]
+        fresh[i] = (eid, name, "departed", "09:30 01.03.2026", version + 1)
+    canvas.reset_calls()
+    changes = model.reconcile(fresh)
+    all_ok &= check(
+        changes == 3 and canvas.total_calls() <= 3 * TOGGLE_BUDGET,
+        f"Three status changes repaint three cards ({canvas.total_calls()} calls)",
+        f"{changes} changes",
+    )
+
+    eid, name, status, ts, version = fresh[10]
+    stale = list(fresh)
+    stale[10] = (eid, name, "arrived", "08:00 01.03.2026", version - 1)
+    canvas.reset_calls()
+    all_ok &= check(
+        model.reconcile(stale) == 0 and canvas.total_calls() == 0,
+        "A row older than its card is ignored",
+    )
+
+    # A new card with the fifth-highest name and a deleted one just before
+    # it: only the few cards after them move.
+    fresh.append((n + 1, f"А{n - 5:05d}БА", "arrived", "10:00 01.03.2026", 0))
+    gone = model.order[-7]
+    fresh = [row for row in fresh if row[0] != gone]
+    canvas.reset_calls()
+    changes = model.reconcile(fresh)
+    budget = 2 * ITEMS_PER_CARD + 7 * RELAYOUT_PER_CARD
+    all_ok &= check(
+        changes == 2 and canvas.total_calls() <= budget,
+        f"Add and delete near the end: {canvas.total_calls()} calls "
+        f"(budget {budget})",
+        f"{changes} changes",
+    )
+
+    reference, ref_canvas = _model(0)
+    reference.load(fresh)
+    all_ok &= check(
+        _layout(model, canvas) == _layout(reference, ref_canvas),
+        "The grid matches one loaded from the fresh rows",
+    )
+    all_ok &= check(
+        len(canvas.items) == sum(len(c.canvas_items()) for c in model.items.values()),
+        "No stray canvas items",
+    )
+
+    # Mid-fill: only the drawn part gets items, draw_more() continues.
+    canvas = RecordingCanvas()
+    model = CardGridModel(canvas, "vehicle")
+    model.resize(900)
+    model.load(saved, first=100)
+    fresh = [(0, "А00000АА", "idle", "08:00 01.03.2026", 0)] + saved[:-1]
+    model.reconcile(fresh)
+    drawn_items = sum(
+        len(model.items[eid].canvas_items()) for eid in model.order[: model.drawn]
+    )
+    all_ok &= check(
+        model.drawn == 100 and len(canvas.items) == drawn_items,
+        "While the grid is filling, the drawn part keeps its size",
+        f"drawn={model.drawn}, {len(canvas.items)} items for {drawn_items}",
+    )
+    while model.draw_more(300):
+        pass
+    reference, ref_canvas = _model(0)
+    reference.load(fresh)
+    all_ok &= check(
+        _layout(model, canvas) == _layout(reference, ref_canvas),
+        "After the fill the grid matches one loaded from the fresh rows",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 10 — overdue highlight
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_overdue() -> None:
+    section("TEST 10 · Overdue cards are highlighted")
+
+    def bg(model: CardGridModel, canvas: RecordingCanvas, eid: int) -> str:
+        return canvas.items[model.items[eid].tag_bg]["options"]["fill"]
+
+    model, canvas = _model(10_000)
+    eid = next(e for e in model.order if model.items[e].status == "departed")
+    model.set_overdue(eid, True)
+    all_ok = check(
+        bg(model, canvas, eid) == CARD_OVERDUE_COLORS["bg"]
+        and canvas.total_calls() <= TOGGLE_BUDGET,
+        f"Flagging repaints one card ({canvas.total_calls()} calls)",
+    )
+    canvas.reset_calls()
+    model.set_overdue(eid, True)
+    all_ok &= check(canvas.total_calls() == 0, "Flagging again costs nothing")
+
+    rows = _cards(10_000)
+    model.reconcile(rows)
+    all_ok &= check(
+        bg(model, canvas, eid) == CARD_OVERDUE_COLORS["bg"],
+        "The flag survives reconcile()",
+    )
+    model.load(rows)
+    all_ok &= check(
+        bg(model, canvas, eid) == CARD_OVERDUE_COLORS["bg"],
+        "The flag survives load()",
+    )
+    model.update(eid, "arrived", "10:00 01.03.2026", 1)
+    all_ok &= check(
+        eid not in model.overdue
+        and bg(model, canvas, eid) == CARD_STATUS_COLORS["arrived"]["bg"],
+        "A status change drops the flag",
+    )
+    model.update(eid, "departed", "11:00 01.03.2026", 2)
+    all_ok &= check(
+        bg(model, canvas, eid) == CARD_STATUS_COLORS["departed"]["bg"],
+        "Departing again starts unflagged",
+    )
+    model.set_overdue(eid, True)
+    model.set_overdue(eid, False)
+    all_ok &= check(
+        bg(model, canvas, eid) == CARD_STATUS_COLORS["departed"]["bg"],
+        "Unflagging restores the departed colours",
+    )
+    model.set_overdue(eid, True)
+    model.remove(eid)
+    all_ok &= check(eid not in model.overdue, "A deleted card is unflagged")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║            Card grid model headless tests                ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_geometry,
+        test_populate,
+        test_toggle_constant,
+        test_hover,
+        test_resize_and_delete,
+        test_adaptive_columns,
+        test_progressive_fill,
+        test_memory_budget,
+        test_reconcile,
+        test_overdue,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
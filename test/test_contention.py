@@ -0,0 +1,242 @@
+"""Tests for write retries under lock contention (Database._retrying).
+
+What it checks
+--------------
+1.  Busy, then success — a write that fails with 'database is locked' is
+    rolled back and retried with backoff until it succeeds.
+2.  Other errors — an OperationalError that is not a busy error is raised
+    at once, without a retry.
+3.  Giving up — after max_retries extra attempts the last busy error is
+    raised unchanged.
+4.  A real lock — a status change waits for another connection's write
+    transaction to end, and fails with DatabaseError if it never does.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+from database import ContentionPolicy, Database, DatabaseError  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+# Short backoff so the retries do not slow the suite down.
+_FAST = ContentionPolicy(busy_timeout_ms=0, max_retries=3, base_delay=0.001)
+
+
+def _flaky_write(db: Database, failures: list[Exception], attempts: list[bool]):
+    """Build a write() that inserts a row, then raises the next of `failures`.
+
+    attempts records, per call, whether a transaction was already open when
+    the attempt started, i.e. whether the previous one was not rolled back.
+    """
+
+    def write() -> str:
+        attempts.append(db._conn.in_transaction)
+        db._conn.execute(
+            "INSERT INTO vehicles (number, status, created) "
+            "VALUES (?, 'idle', '2026-01-01 00:00:00')",
+            (f"А{len(attempts):03d}АА",),
+        )
+        if failures:
+            raise failures.pop(0)
+        db._conn.commit()
+        return "done"
+
+    return write
+
+
+def _vehicles(db: Database) -> int:
+    return db._conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — busy, then success
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_retry_then_success() -> None:
+    section("TEST 1 · A busy write is rolled back and retried")
+
+    db = Database(":memory:", policy=_FAST)
+    attempts: list[bool] = []
+    busy = [sqlite3.OperationalError("database is locked") for _ in range(2)]
+    result = db._retrying(_flaky_write(db, busy, attempts))
+
+    all_ok = check(result == "done", "The third attempt's result is returned")
+    all_ok &= check(len(attempts) == 3, "Two retries", f"{len(attempts)} attempts")
+    all_ok &= check(
+        not any(attempts),
+        "Every attempt starts outside a transaction (rolled back in between)",
+        str(attempts),
+    )
+    all_ok &= check(_vehicles(db) == 1, "Only the successful attempt's row is kept")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — other errors are not retried
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_other_error_not_retried() -> None:
+    section("TEST 2 · Other OperationalErrors are raised at once")
+
+    db = Database(":memory:", policy=_FAST)
+    attempts: list[bool] = []
+    error = sqlite3.OperationalError("no such table: vehicles_old")
+    try:
+        db._retrying(_flaky_write(db, [error], attempts))
+        raised = None
+    except sqlite3.OperationalError as e:
+        raised = e
+    db._conn.rollback()
+    all_ok = check(raised is error, "The error is raised unchanged")
+    all_ok &= check(len(attempts) == 1, "No retry", f"{len(attempts)} attempts")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — the last busy error is raised
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_gives_up() -> None:
+    section("TEST 3 · The last busy error is raised after max_retries")
+
+    db = Database(":memory:", policy=_FAST)
+    attempts: list[bool] = []
+    busy = [sqlite3.OperationalError(f"database is locked ({i})") for i in range(9)]
+    last = busy[_FAST.max_retries]
+    try:
+        db._retrying(_flaky_write(db, busy, attempts))
+        raised = None
+    except sqlite3.OperationalError as e:
+        raised = e
+    db._conn.rollback()
+    all_ok = check(
+        len(attempts) == _FAST.max_retries + 1,
+        f"{_FAST.max_retries} retries after the first attempt",
+        f"{len(attempts)} attempts",
+    )
+    all_ok &= check(raised is last, "The last busy error is raised", repr(raised))
+    all_ok &= check(_vehicles(db) == 0, "Nothing was written")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — a lock held by another connection
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_real_lock() -> None:
+    section("TEST 4 · Waiting out another connection's write lock")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        policy = ContentionPolicy(busy_timeout_ms=0, max_retries=4, base_delay=0.05)
+        db = Database(path, policy=policy)
+        vid = db.add_vehicle("А001АА")
+        before = db.get_entity("vehicle", vid)["version"]
+        other = sqlite3.connect(path, check_same_thread=False)
+
+        other.execute("BEGIN IMMEDIATE")
+        release = threading.Timer(0.1, other.commit)
+        release.start()
+        version = db.update_status_and_log("vehicle", vid, "А001АА", "arrived").version
+        release.join()
+        all_ok = check(
+            version == before + 1, "The change went through once the lock ended"
+        )
+
+        other.execute("BEGIN IMMEDIATE")
+        t0 = time.perf_counter()
+        try:
+            db.update_status_and_log("vehicle", vid, "А001АА", "departed")
+            all_ok &= check(False, "A lock that is never released fails the write")
+        except DatabaseError:
+            all_ok &= check(True, "A lock that is never released fails the write")
+        elapsed = time.perf_counter() - t0
+        other.rollback()
+        all_ok &= check(
+            elapsed < 2.0, "It gives up after the backoff", f"{elapsed:.2f} s"
+        )
+        row = db.get_entity("vehicle", vid)
+        all_ok &= check(
+            row["status"] == "arrived" and row["version"] == version,
+            "The failed change left the row as it was",
+        )
+        other.close()
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║               Write contention tests                     ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_retry_then_success,
+        test_other_error_not_retried,
+        test_gives_up,
+        test_real_lock,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Tests for the memory-mapped event cache (eventcache.py).
+
+Skipped when NumPy is not installed; the app itself does not need it.
+
+What it checks
+--------------
+1.  Build and append — the first refresh caches every event; later ones
+    append only events above the watermark; columns are memmaps equal to
+    Database.iter_event_codes(), and names resolve through the table.
+2.  Deletions — after the purge or clear_events() the cache is compacted
+    to the events still in the log; a replaced log is cached again.
+3.  Reopen — a new EventCache reads the files back without touching
+    SQLite; a torn tail after an interrupted append and a corrupt
+    meta.json are both recovered from.
+4.  Analytics — load_events() with the cache returns the same columns as
+    without it, for the whole log and for a range.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, ".")
+
+import analytics  # noqa: E402
+from bench.synthetic import generate  # noqa: E402
+from database import Database  # noqa: E402
+
+np = analytics.np
+if np is not None:
+    from eventcache import EventCache  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _skip() -> bool:
+    if analytics.AVAILABLE:
+        return False
+    ok("NumPy is not installed — skipped")
+    return True
+
+
+def _matches(db: Database, cache: "EventCache") -> bool:
+    """True if the cached rows equal the log, names included."""
+    expected = list(db.iter_event_codes(names=True))
+    c = cache.columns(refresh=False)
+    names = cache.names()
+    got = list(
+        zip(
+            c.id.tolist(),
+            c.ts.tolist(),
+            c.entity_type.tolist(),
+            c.entity_id.tolist(),
+            c.event.tolist(),
+            [names[i] for i in c.name.tolist()],
+        )
+    )
+    return got == expected
+
+
+def _add_events(db: Database, events: list[tuple[str, str]]) -> None:
+    """Insert (name, ts) arrivals straight into the log."""
+    db._conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES ('vehicle', 1, ?, 'arrived', ?)",
+        events,
+    )
+    db._conn.commit()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — build and append
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_build_and_append() -> None:
+    section("TEST 1 · First refresh builds, later ones append")
+    if _skip():
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "test.db"))
+        generate(db, vehicles=20, commanders=5, months=1, end=datetime(2026, 3, 1))
+        cache = EventCache(db, os.path.join(tmp, "cache"))
+        total = len(list(db.iter_event_ids(10**9)))
+
+        all_ok = check(cache.refresh() == total, f"First refresh caches {total} rows")
+        all_ok &= check(_matches(db, cache), "Cached rows equal the log")
+        all_ok &= check(
+            isinstance(cache.columns(refresh=False).ts, np.memmap),
+            "Columns are memory-mapped",
+        )
+
+        vid = db.add_vehicle("Новый 1")
+        db.update_status_and_log("vehicle", vid, "Новый 1", "arrived")
+        _add_events(db, [('Имя\nс "переводом"', "2026-03-01 10:00:00")])
+        all_ok &= check(cache.refresh() == 3, "Next refresh appends only new rows")
+        all_ok &= check(cache.refresh() == 0, "Nothing to append when up to date")
+        all_ok &= check(
+            _matches(db, cache), "Still equal, including names with a newline"
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — deletions
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_deletions() -> None:
+    section("TEST 2 · Purge and clear_events() compact the cache")
+    if _skip():
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "test.db"))
+        vid = db.add_vehicle("А001АА")
+        db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+        _add_events(db, [("А001АА", "2020-01-01 08:00:00")] * 5)
+        cache = EventCache(db, os.path.join(tmp, "cache"))
+        cache.refresh()
+        before = cache.rows
+
+        # The next status change purges the 2020 events.
+        db.update_status_and_log("vehicle", vid, "А001АА", "departed")
+        cache.refresh()
+        all_ok = check(
+            cache.rows == before - 5 + 1, "Purged rows dropped, new row appended"
+        )
+        all_ok &= check(_matches(db, cache), "Cached rows equal the log")
+        sets = {e.split(".")[1] for e in os.listdir(cache._dir) if e.endswith(".bin")}
+        all_ok &= check(len(sets) == 1, "Old file set removed after compaction")
+
+        db.clear_events()
+        cache.refresh()
+        all_ok &= check(cache.rows == 0, "clear_events() empties the cache")
+        db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+        cache.refresh()
+        all_ok &= check(_matches(db, cache), "Appends resume after clearing")
+        db._conn.close()
+
+        # Another database in the same place: the max id is below the watermark.
+        os.remove(os.path.join(tmp, "test.db"))
+        other = Database(os.path.join(tmp, "test.db"))
+        other.add_commander("Иванов")
+        cache._db = other
+        cache.refresh()
+        all_ok &= check(_matches(other, cache), "A replaced log is cached again")
+        other._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — reopen and recovery
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_reopen() -> None:
+    section("TEST 3 · Reopen, torn tail and corrupt meta")
+    if _skip():
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "test.db"))
+        _add_events(db, [(f"Имя {i}", "2026-03-01 08:00:00") for i in range(50)])
+        directory = os.path.join(tmp, "cache")
+        EventCache(db, directory).refresh()
+
+        cache = EventCache(db, directory)
+        all_ok = check(
+            cache.rows == 50 and _matches(db, cache), "Reopened without SQLite"
+        )
+
+        # An append that wrote data but died before meta.json.
+        set_no = cache._meta["set"]
+        with open(os.path.join(directory, f"ts.{set_no}.bin"), "ab") as f:
+            f.write(b"\xff" * 24)
+        with open(os.path.join(directory, "names.txt"), "a", encoding="utf-8") as f:
+            f.write('"оборвано"\n')
+        _add_events(db, [("Имя 50", "2026-03-01 09:00:00")])
+        cache = EventCache(db, directory)
+        all_ok &= check(cache.refresh() == 1, "Torn tail ignored; one row appended")
+        all_ok &= check(_matches(db, cache), "Cached rows equal the log")
+
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            f.write("{not json")
+        cache = EventCache(db, directory)
+        all_ok &= check(
+            cache.refresh() == 51 and _matches(db, cache), "Corrupt meta: rebuilt"
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — analytics through the cache
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_analytics() -> None:
+    section("TEST 4 · load_events() with and without the cache")
+    if _skip():
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "test.db"))
+        generate(db, vehicles=20, commanders=5, months=1, end=datetime(2026, 3, 1))
+        cache = EventCache(db, os.path.join(tmp, "cache"))
+
+        all_ok = True
+        for label, args in (
+            ("Whole log", ()),
+            ("Range", (datetime(2026, 2, 10), datetime(2026, 2, 20))),
+        ):
+            direct = analytics.load_events(db, *args)
+            cached = analytics.load_events(db, *args, cache=cache)
+            all_ok &= check(
+                all(np.array_equal(a, b) for a, b in zip(direct, cached)),
+                f"{label}: same columns ({len(direct.id)} rows)",
+            )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Event cache tests                           ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_build_and_append, test_deletions, test_reopen, test_analytics]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Tests for the slicing timestamp formatter (ui.components.fmt_timestamp).
+
+What it checks
+--------------
+1.  Same output as strptime/strftime — for a spread of valid stored
+    timestamps and for empty, short and malformed values.
+2.  Cache and batch — the LRU cache is bounded, and fmt_timestamps()
+    matches formatting every value one by one.
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from ui.components import _TS_CACHE_SIZE, fmt_timestamp, fmt_timestamps  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _reference(raw) -> str:
+    """The strptime/strftime formatter the slicing version replaced."""
+    try:
+        dt = datetime.strptime(raw[:16], "%Y-%m-%d %H:%M")
+        return dt.strftime("%H:%M %d.%m.%Y")
+    except (ValueError, TypeError):
+        return raw[:16] if raw else "—"
+
+
+def _stored(n: int) -> list[str]:
+    rnd = random.Random(7)
+    start = datetime(2024, 1, 1)
+    return [
+        (start + timedelta(seconds=rnd.randrange(3 * 365 * 86400))).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        for _ in range(n)
+    ]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — same output as the strptime formatter
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_matches_strptime() -> None:
+    section("TEST 1 · Same output as strptime/strftime")
+
+    valid = _stored(5000)
+    odd = [
+        "",
+        None,
+        "garbage",
+        "2026-03-01",
+        "2026-03-01 08:05",
+        "2026-03-01T08:05:00",
+        "abcd-ef-gh ij:kl:mn",
+        "2026-03-01 08:05:09.123456",
+    ]
+    mismatches = [v for v in valid if fmt_timestamp(v) != _reference(v)]
+    all_ok = check(
+        not mismatches,
+        f"{len(valid)} stored timestamps format identically",
+        f"first mismatch: {mismatches[:1]}",
+    )
+    mismatches = [v for v in odd if fmt_timestamp(v) != _reference(v)]
+    all_ok &= check(
+        not mismatches,
+        "Empty, short and malformed values are shown as before",
+        f"mismatches: {mismatches}",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — bounded cache and batch formatting
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_cache_and_batch() -> None:
+    section("TEST 2 · Bounded cache and batch formatting")
+
+    values = _stored(_TS_CACHE_SIZE + 1000)
+    fmt_timestamp.cache_clear()
+    batch = fmt_timestamps(values)
+    all_ok = check(
+        batch == [fmt_timestamp(v) for v in values],
+        "fmt_timestamps() matches formatting one by one",
+    )
+    info = fmt_timestamp.cache_info()
+    all_ok &= check(
+        info.currsize <= _TS_CACHE_SIZE,
+        f"Cache holds at most {_TS_CACHE_SIZE} entries",
+        f"{info.currsize} entries",
+    )
+    fmt_timestamp.cache_clear()
+    fmt_timestamps(values[:100])
+    fmt_timestamps(values[:100])
+    all_ok &= check(
+        fmt_timestamp.cache_info().hits == 100,
+        "A rebuild of the same rows is served from the cache",
+        f"{fmt_timestamp.cache_info()}",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Timestamp formatting tests                  ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_matches_strptime, test_cache_and_batch]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
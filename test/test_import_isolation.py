@@ -0,0 +1,182 @@
+"""Import-time check: the data layer must not load the GUI toolkit.
+
+Database, the retention settings and DB_PATH are used by backups,
+maintenance, benchmarks and command-line tools that run without a
+display. Each module below is imported in a fresh interpreter, and the
+test fails if that import pulls in tkinter or customtkinter.
+
+What it checks
+--------------
+1.  Data layer — config, database, migrations, presence, analytics,
+    eventcache, reports, alerts, backup, maintenance, startup, snapshot,
+    instrumentation, watchdog and profiler import without any GUI module.
+2.  Headless tools — bench.synthetic and ui.cardlayout (the Tk-free card
+    grid model) import without any GUI module either.
+3.  UI still themed — importing ui.app does load customtkinter, and the
+    theme is no longer applied as a side effect of importing config.
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, ".")
+
+DATA_LAYER = [
+    "config",
+    "database",
+    "migrations",
+    "presence",
+    "analytics",
+    "eventcache",
+    "reports",
+    "alerts",
+    "backup",
+    "maintenance",
+    "startup",
+    "snapshot",
+    "instrumentation",
+    "watchdog",
+    "profiler",
+]
+HEADLESS_TOOLS = ["bench.synthetic", "ui.cardlayout"]
+GUI_MODULES = ("tkinter", "_tkinter", "customtkinter")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _loaded_after(code: str) -> list[str]:
+    """Run code in a fresh interpreter; return the GUI modules it loaded."""
+    probe = (
+        f"import sys\n{code}\n"
+        f"print(' '.join(m for m in {GUI_MODULES!r} if m in sys.modules))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"probe failed:\n{result.stderr}")
+    return result.stdout.split()
+
+
+def _check_imports(modules: list[str]) -> bool:
+    all_ok = True
+    for module in modules:
+        loaded = _loaded_after(f"import {module}")
+        all_ok &= check(
+            not loaded,
+            f"import {module} loads no GUI module",
+            f"loaded: {', '.join(loaded)}",
+        )
+    return all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — data layer
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_data_layer() -> None:
+    section("TEST 1 · Data layer imports without tkinter")
+    assert _check_imports(DATA_LAYER)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — headless tools
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_headless_tools() -> None:
+    section("TEST 2 · Headless tools import without tkinter")
+    assert _check_imports(HEADLESS_TOOLS)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — the UI still gets its theme
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_ui_theme() -> None:
+    section("TEST 3 · Theme is applied by the UI, not by config")
+
+    all_ok = check(
+        "customtkinter" in _loaded_after("import ui.app"),
+        "import ui.app loads customtkinter",
+    )
+    loaded = _loaded_after(
+        "import config, customtkinter as ctk\n"
+        "assert ctk.ThemeManager._currently_loaded_theme != 'dark-blue'\n"
+        "from ui.theme import apply_theme\n"
+        "apply_theme()\n"
+        "assert ctk.ThemeManager._currently_loaded_theme == 'dark-blue'"
+    )
+    all_ok &= check(
+        "customtkinter" in loaded,
+        "apply_theme() sets the dark-blue theme; importing config does not",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Import isolation tests                      ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_data_layer, test_headless_tools, test_ui_theme]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Tests for the Database latency instrumentation (instrumentation.py).
+
+What it checks
+--------------
+1.  Histogram accuracy — every value maps to a bucket whose reported value
+    is within 1/64 of it, and p50/p95/p99 of a known distribution match the
+    exact percentiles to that precision.
+2.  Recording — attached, every INSTRUMENTED method is timed with its call
+    and row counts, errors are counted, and each call keeps the SQL it ran,
+    including the nested purge's DELETE inside a status change. Generator
+    methods are timed until they are exhausted or closed.
+3.  Off means off — before attach() and after detach() the Database runs
+    its own methods with no wrapper and no trace callback; detach() keeps
+    the data until reset().
+4.  Query plans — Database.explain() returns the plan of a recorded
+    statement.
+"""
+
+import random
+import sys
+
+sys.path.insert(0, ".")
+
+from database import ConflictError, Database  # noqa: E402
+from instrumentation import (  # noqa: E402
+    INSTRUMENTED,
+    Instrumentation,
+    LatencyHistogram,
+)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _db() -> Database:
+    db = Database(path=":memory:")
+    for i in range(20):
+        db.add_vehicle(f"А{i:03d}АА")
+    return db
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — histogram accuracy
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_histogram_accuracy() -> None:
+    section("TEST 1 · HDR histogram precision")
+
+    rnd = random.Random(3)
+    values = list(range(2000)) + [rnd.randrange(1 << 32) for _ in range(20_000)]
+    worst = max(
+        (LatencyHistogram.highest_equivalent(LatencyHistogram.index(v)) - v) / max(v, 1)
+        for v in values
+    )
+    all_ok = check(
+        worst <= 1 / 64,
+        f"Bucket values within 1/64 of the recorded value (worst {worst:.4f})",
+    )
+
+    hist = LatencyHistogram()
+    samples = [int(rnd.lognormvariate(7, 1.2)) for _ in range(50_000)]
+    for us in samples:
+        hist.record(us)
+    samples.sort()
+    for p in (50, 95, 99):
+        exact = samples[-(-len(samples) * p // 100) - 1]
+        got = hist.percentile(p)
+        all_ok &= check(
+            exact <= got <= exact * (1 + 1 / 64) + 1,
+            f"p{p} = {got} µs (exact {exact} µs)",
+        )
+    all_ok &= check(
+        hist.count == len(samples)
+        and hist.max_us == samples[-1]
+        and hist.percentile(100) == samples[-1],
+        "Count and maximum are exact",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — recording calls
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_recording() -> None:
+    section("TEST 2 · Calls, rows, errors and SQL are recorded")
+
+    db = _db()
+    probe = Instrumentation()
+    probe.attach(db)
+    for _ in range(5):
+        db.get_entities("vehicle")
+    version = db.update_status_and_log("vehicle", 1, "А000АА", "arrived").version
+    try:
+        db.update_status_and_log(
+            "vehicle", 1, "А000АА", "departed", expected_version=version + 5
+        )
+    except ConflictError:
+        pass
+    db.get_events()
+    db.stats()
+    rows = list(db.iter_entities("vehicle"))
+    for _ in db.iter_entities("vehicle"):
+        break
+    db.read_entities()
+
+    ops = {op.name: op for op in probe.summary()}
+    all_ok = check(
+        ops["get_entities"].calls == 5 and ops["get_entities"].rows == 5 * 20,
+        "get_entities: 5 calls, 100 rows",
+        f"{ops.get('get_entities')}",
+    )
+    all_ok &= check(
+        len(rows) == 20
+        and ops["iter_entities"].calls == 2
+        and ops["iter_entities"].rows == 20 + 1,
+        "iter_entities: recorded when exhausted and when closed early",
+        f"{ops.get('iter_entities')}",
+    )
+    grid = next(c for c in probe.slowest(100) if c.name == "iter_entities")
+    all_ok &= check(
+        any("FROM vehicles" in sql for sql in grid.statements),
+        "iter_entities keeps the query its cursor ran",
+    )
+    all_ok &= check(
+        ops["read_entities"].calls == 1 and ops["read_entities"].rows == 20,
+        "read_entities: 1 call, rows of every type",
+        f"{ops.get('read_entities')}",
+    )
+    all_ok &= check(
+        ops["update_status_and_log"].calls == 2
+        and ops["update_status_and_log"].errors == 1,
+        "update_status_and_log: 2 calls, the conflict counted as an error",
+        f"{ops.get('update_status_and_log')}",
+    )
+    all_ok &= check(
+        ops["_purge_old_events"].calls == 1,
+        "The purge inside the status change is timed on its own",
+    )
+    all_ok &= check(
+        all(op.p50_ms <= op.p95_ms <= op.p99_ms <= op.max_ms for op in ops.values()),
+        "Percentiles are ordered for every operation",
+    )
+
+    change = next(
+        c
+        for c in probe.slowest(100)
+        if c.name == "update_status_and_log" and not c.error
+    )
+    sql = " ".join(change.statements)
+    all_ok &= check(
+        "UPDATE vehicles" in sql
+        and "INSERT INTO events" in sql
+        and "DELETE FROM events" in sql,
+        f"The status change kept its {len(change.statements)} statements, "
+        "the purge included",
+    )
+    durations = [c.duration_us for c in probe.slowest(100)]
+    all_ok &= check(
+        durations == sorted(durations, reverse=True) and len(durations) == 13,
+        "slowest() lists the recent calls slowest first",
+        f"{len(durations)} calls",
+    )
+    probe.detach()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — nothing left behind when off
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_detached_is_untouched() -> None:
+    section("TEST 3 · No wrappers while instrumentation is off")
+
+    db = _db()
+    probe = Instrumentation()
+    unwrapped = all(name not in vars(db) for name in INSTRUMENTED)
+    all_ok = check(unwrapped, "A fresh Database has no wrappers")
+
+    probe.attach(db)
+    all_ok &= check(
+        all(name in vars(db) for name in INSTRUMENTED),
+        f"attach() wraps all {len(INSTRUMENTED)} methods",
+    )
+    db.get_events()
+    probe.detach()
+    all_ok &= check(
+        all(name not in vars(db) for name in INSTRUMENTED)
+        and db.get_events.__func__ is Database.get_events,
+        "detach() restores the class methods",
+    )
+    statements: list[str] = []
+    db.set_trace(statements.append)
+    db.get_events()
+    db.set_trace(None)
+    all_ok &= check(
+        probe.summary()[0].calls == 1 and bool(statements),
+        "Data survives detach(); set_trace() is free for others again",
+    )
+    probe.reset()
+    all_ok &= check(
+        not probe.summary() and not probe.slowest(), "reset() clears everything"
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — query plans of recorded statements
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_explain() -> None:
+    section("TEST 4 · EXPLAIN QUERY PLAN of a recorded call")
+
+    db = _db()
+    probe = Instrumentation()
+    probe.attach(db)
+    db.get_entity("vehicle", 3)
+    probe.detach()
+    (call,) = probe.slowest()
+    plan = db.explain(call.statements[0])
+    all_ok = check(
+        any("vehicles" in line and "PRIMARY KEY" in line for line in plan),
+        "get_entity() is a primary-key lookup",
+        f"{plan}",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Database instrumentation tests              ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_histogram_accuracy,
+        test_recording,
+        test_detached_is_untouched,
+        test_explain,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
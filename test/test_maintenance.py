@@ -0,0 +1,216 @@
+"""Tests for idle-time maintenance (maintenance.py) and the Database steps it uses.
+
+What it checks
+--------------
+1.  Idle gate — the worker skips its pass while this process has written
+    within idle_seconds, and runs it once the database has been idle.
+2.  Vacuum and checkpoint — on a file with free pages a pass returns them
+    to the OS in incremental_vacuum steps and TRUNCATE-checkpoints the WAL,
+    so the file shrinks and the -wal file is empty afterwards.
+3.  Stopping — stop() wakes the worker at once, and a pass stops vacuuming
+    after one step once a stop was requested.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from database import Database  # noqa: E402
+from maintenance import MaintenanceScheduler  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _fragmented(path: str) -> Database:
+    """A file database whose deleted rows left a few hundred free pages."""
+    db = Database(path)
+    padding = "х" * 500
+    ids = [db.add_vehicle(f"А{i:04d}АА {padding}") for i in range(1500)]
+    for vid in ids:
+        db.delete_vehicle(vid)
+    return db
+
+
+def _make_idle(db: Database, seconds: float = 3600) -> None:
+    db._last_write = time.monotonic() - seconds
+
+
+def _wait_for(cond, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — idle gate
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_idle_gate() -> None:
+    section("TEST 1 · A pass runs only once the database is idle")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "test.db"))
+        db.add_vehicle("А001АА")
+        scheduler = MaintenanceScheduler(db, poll_seconds=0.01, idle_seconds=60)
+        scheduler.start()
+        time.sleep(0.1)
+        all_ok = check(scheduler.last_report() is None, "No pass right after a write")
+        _make_idle(db)
+        all_ok &= check(
+            _wait_for(lambda: scheduler.last_report() is not None),
+            "A pass runs once idle_seconds have passed",
+        )
+        scheduler.stop()
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — vacuum and checkpoint
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_vacuum_and_checkpoint() -> None:
+    section("TEST 2 · Free pages are returned and the WAL is truncated")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        db = _fragmented(path)
+        # Bring the file up to date first, so the shrink shows in its size.
+        db.checkpoint("TRUNCATE")
+        free = db.storage_info()["freelist_count"]
+
+        scheduler = MaintenanceScheduler(
+            db, idle_seconds=60, truncate_bytes=0, vacuum_pages=64, vacuum_steps=100
+        )
+        _make_idle(db)
+        report = scheduler.run_once()
+        before, after = report["before"], report["after"]
+
+        all_ok = check(free > 100, "The deletes left free pages", f"{free} pages")
+        all_ok &= check(
+            report["pages_freed"] == free and after["freelist_count"] == 0,
+            "Every free page was reclaimed",
+            f"{report['pages_freed']} of {free}",
+        )
+        all_ok &= check(
+            after["file_size"] < before["file_size"],
+            "The file shrank",
+            f"{before['file_size']} → {after['file_size']} bytes",
+        )
+        all_ok &= check(
+            report["checkpoint_mode"] == "TRUNCATE" and after["wal_size"] == 0,
+            "TRUNCATE checkpoint emptied the -wal file",
+            f"{report['checkpoint_mode']}, {after['wal_size']} bytes",
+        )
+
+        db.add_vehicle("А001АА")
+        busy, frames, done = db.checkpoint("PASSIVE")
+        all_ok &= check(
+            busy == 0 and frames > 0 and done == frames,
+            "checkpoint() copies every frame back when nothing is reading",
+            f"{(busy, frames, done)}",
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — stopping
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_stop() -> None:
+    section("TEST 3 · stop() ends the worker and cuts a pass short")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _fragmented(os.path.join(tmp, "test.db"))
+
+        scheduler = MaintenanceScheduler(db, poll_seconds=60)
+        scheduler.start()
+        thread = scheduler._thread
+        t0 = time.perf_counter()
+        scheduler.stop()
+        elapsed = time.perf_counter() - t0
+        all_ok = check(
+            not thread.is_alive() and elapsed < 1.0,
+            "stop() wakes a sleeping worker",
+            f"{elapsed:.2f} s",
+        )
+
+        _make_idle(db)
+        report = scheduler.run_once()
+        all_ok &= check(
+            report["pages_freed"] == scheduler.vacuum_pages,
+            "After stop() a pass vacuums one step and no more",
+            f"{report['pages_freed']} pages",
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║                  Maintenance tests                       ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_idle_gate, test_vacuum_and_checkpoint, test_stop]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Smoke-tests for the versioned migration engine (migrations.py).
+
+Every test works on a temporary or in-memory SQLite database, so your real
+database.db is never touched.
+
+What it checks
+--------------
+1.  Fresh database — all migrations are applied and user_version is latest.
+2.  Legacy database — a file created before versioning (no 'updated'
+    column, user_version 0) is upgraded in place without losing rows.
+3.  Current database — reopening runs no schema statements at all.
+4.  Crash and resume — a chunked data migration that fails halfway keeps
+    its committed chunks and checkpoint and finishes on the next run,
+    touching every row exactly once.
+5.  Background data migrations — left pending by upgrade() and finished
+    later, stopping cleanly when asked to.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, ".")
+
+import migrations  # noqa: E402
+from database import Database  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _tables(conn) -> set[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {r[0] for r in rows}
+
+
+def _rewrite_migration(
+    version: int, fail_at_chunk: int | None, seen: list[int], background=False
+):
+    """Build a data migration that upper-cases entity_name 10 rows at a time."""
+    calls = {"n": 0}
+
+    def chunk(conn, checkpoint: str):
+        calls["n"] += 1
+        if fail_at_chunk is not None and calls["n"] == fail_at_chunk:
+            raise sqlite3.OperationalError("simulated crash")
+        last_id = int(checkpoint or 0)
+        rows = conn.execute(
+            "SELECT id FROM events WHERE id > ? ORDER BY id LIMIT 10", (last_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        ids = [r[0] for r in rows]
+        seen.extend(ids)
+        conn.executemany(
+            "UPDATE events SET entity_name = upper(entity_name) WHERE id = ?",
+            [(i,) for i in ids],
+        )
+        return str(ids[-1])
+
+    return migrations.Migration(
+        version, "upper-case names", chunk=chunk, background=background
+    )
+
+
+def _seed_events(conn, n: int) -> None:
+    conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES ('vehicle', 1, ?, 'arrived', '2026-01-01 00:00:00')",
+        [(f"a{i}",) for i in range(n)],
+    )
+    conn.commit()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — fresh database
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_fresh_database() -> None:
+    section("TEST 1 · Fresh database reaches the latest version")
+
+    db = Database(path=":memory:")
+    version = migrations.current_version(db._conn)
+    latest = migrations.latest_version()
+    all_ok = check(version == latest, f"user_version = {version} (latest {latest})")
+    missing = {"vehicles", "commanders", "events", "migration_progress"} - _tables(
+        db._conn
+    )
+    all_ok &= check(not missing, "All base tables exist", f"missing: {missing}")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — legacy database without versioning
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_legacy_upgrade() -> None:
+    section("TEST 2 · Legacy database is upgraded in place")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "database.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE vehicles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, number TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL DEFAULT 'idle', created TEXT NOT NULL
+            );
+            CREATE TABLE commanders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL DEFAULT 'idle', created TEXT NOT NULL
+            );
+            INSERT INTO vehicles (number, created) VALUES ('А001АА', '2025-01-01');
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        db = Database(path=path)
+        cols = [r[1] for r in db._conn.execute("PRAGMA table_info(vehicles)")]
+        all_ok = check("updated" in cols, "'updated' column was added")
+        rows = db.get_vehicles()
+        all_ok &= check(
+            len(rows) == 1 and rows[0]["number"] == "А001АА", "Existing row kept"
+        )
+        all_ok &= check(
+            migrations.current_version(db._conn) == migrations.latest_version(),
+            "user_version is latest",
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — current database skips straight to open
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_current_is_noop() -> None:
+    section("TEST 3 · Current database opens without schema work")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "database.db")
+        Database(path=path)._conn.close()
+
+        conn = sqlite3.connect(path)
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        migrations.upgrade(conn)
+        conn.close()
+
+    schema = [
+        s
+        for s in statements
+        if not s.lstrip().upper().startswith(("PRAGMA USER_VERSION", "SELECT"))
+    ]
+    all_ok = check(
+        not schema, f"{len(statements)} statements, none of them DDL", str(schema)
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — chunked data migration resumes after a crash
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_resume_after_crash() -> None:
+    section("TEST 4 · Data migration resumes from its checkpoint")
+
+    conn = sqlite3.connect(":memory:")
+    base = [m for m in migrations.MIGRATIONS if m.version == 1]
+    migrations.upgrade(conn, base)
+    _seed_events(conn, 35)
+
+    seen: list[int] = []
+    crashing = base + [_rewrite_migration(100, fail_at_chunk=3, seen=seen)]
+    try:
+        migrations.upgrade(conn, crashing)
+        fail("Expected the simulated crash")
+        assert False
+    except sqlite3.OperationalError:
+        ok("First run crashed on chunk 3")
+
+    checkpoint = conn.execute(
+        "SELECT checkpoint FROM migration_progress WHERE version = 100"
+    ).fetchone()
+    all_ok = check(
+        checkpoint is not None and checkpoint[0] == str(seen[-1]),
+        f"Checkpoint kept at id {checkpoint[0] if checkpoint else None}",
+    )
+    all_ok &= check(
+        migrations.current_version(conn) == 100, "user_version bumped before data"
+    )
+
+    resumed = base + [_rewrite_migration(100, fail_at_chunk=None, seen=seen)]
+    migrations.upgrade(conn, resumed)
+
+    all_ok &= check(
+        sorted(seen) == list(range(1, 36)), "Every row processed exactly once"
+    )
+    upper = conn.execute(
+        "SELECT COUNT(*) FROM events WHERE entity_name = upper(entity_name)"
+    ).fetchone()[0]
+    all_ok &= check(upper == 35, f"All 35 rows rewritten (got {upper})")
+    left = conn.execute("SELECT COUNT(*) FROM migration_progress").fetchone()[0]
+    all_ok &= check(left == 0, "Progress row removed when finished")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 5 — background data migrations
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_background_migration() -> None:
+    section("TEST 5 · Background data migration is deferred and stoppable")
+
+    conn = sqlite3.connect(":memory:")
+    base = [m for m in migrations.MIGRATIONS if m.version == 1]
+    migrations.upgrade(conn, base)
+    _seed_events(conn, 25)
+
+    seen: list[int] = []
+    bg = _rewrite_migration(100, fail_at_chunk=None, seen=seen, background=True)
+    pending = migrations.upgrade(conn, base + [bg])
+    all_ok = check(pending == [bg] and not seen, "upgrade() left it pending")
+
+    stop = threading.Event()
+    stop.set()
+    finished = migrations.run_data_migration(conn, bg, stop)
+    all_ok &= check(not finished and not seen, "Stops before the first chunk")
+
+    finished = migrations.run_data_migration(conn, bg)
+    all_ok &= check(finished and len(seen) == 25, "Finishes when run again")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║               Migration engine smoke-tests               ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_fresh_database,
+        test_legacy_upgrade,
+        test_current_is_noop,
+        test_resume_after_crash,
+        test_background_migration,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
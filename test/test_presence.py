@@ -0,0 +1,323 @@
+"""Tests for the presence intervals (presence.py) and Database.present_at().
+
+What it checks
+--------------
+1.  Live updates — update_status_and_log() opens a stay on arrival and
+    closes it on departure; a second arrival keeps the open stay, and
+    deleting an entity closes it.
+2.  Queries — present_at() includes the arrival instant and excludes the
+    departure instant; present_between() returns every stay that overlaps
+    the range, open stays included.
+3.  Backfill — upgrading a database that predates the table replays the
+    event log in chunks, in the background, into the same stays the live
+    code would keep, and opens a stay for entities whose arrival was
+    already purged. Until it finishes present_at() raises IncompleteError,
+    and status changes made meanwhile end up in the stays all the same.
+4.  Cleanup — the purge drops stays that ended before the cutoff, and
+    clear_events() keeps the stays that are still open.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, ".")
+
+import migrations  # noqa: E402
+from database import Database, IncompleteError  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+# (entity_type, entity_id, entity_name, event_type, ts) replayed by the backfill.
+_EVENTS = [
+    ("vehicle", 1, "А001АА", "created", "2026-03-01 08:00:00"),
+    ("vehicle", 1, "А001АА", "arrived", "2026-03-01 20:00:00"),
+    ("commander", 1, "Иванов", "arrived", "2026-03-02 03:00:00"),
+    ("vehicle", 1, "А001АА", "arrived", "2026-03-02 03:30:00"),  # repeated
+    ("vehicle", 1, "А001АА", "departed", "2026-03-02 03:40:00"),
+    ("vehicle", 2, "В002ВВ", "arrived", "2026-03-02 03:40:30"),
+    ("commander", 1, "Иванов", "departed", "2026-03-02 09:00:00"),
+    ("vehicle", 2, "В002ВВ", "deleted", "2026-03-03 10:00:00"),
+    ("vehicle", 1, "А001АА", "arrived", "2026-03-04 07:00:00"),
+]
+
+
+def _ts(text: str) -> datetime:
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+
+def _names(rows) -> list[str]:
+    return [r["entity_name"] for r in rows]
+
+
+def _stays(db: Database) -> list[tuple]:
+    return [
+        tuple(r)
+        for r in db._conn.execute(
+            "SELECT entity_type, entity_id, entity_name, arrived, departed "
+            "FROM presence ORDER BY arrived"
+        ).fetchall()
+    ]
+
+
+def _upgraded(path: str, events: list[tuple], arrived_vehicle: str = "") -> Database:
+    """Create a database at version 5 with `events`, then open it with Database."""
+    conn = sqlite3.connect(path)
+    migrations.upgrade(conn, [m for m in migrations.MIGRATIONS if m.version < 6])
+    conn.execute(
+        "INSERT INTO vehicles (id, number, status, created, updated) "
+        "VALUES (1, 'А001АА', ?, '2026-03-01 08:00:00', ?)",
+        ("arrived" if arrived_vehicle else "idle", arrived_vehicle or None),
+    )
+    conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES (?, ?, ?, ?, ?)",
+        events,
+    )
+    conn.commit()
+    conn.close()
+    return Database(path)
+
+
+def _backfilled(path: str, events: list[tuple], arrived_vehicle: str = "") -> Database:
+    """_upgraded(), with the background presence backfill run to the end."""
+    db = _upgraded(path, events, arrived_vehicle)
+    db.migrate_in_background().join()
+    return db
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — live updates
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_live_updates() -> None:
+    section("TEST 1 · Status changes open and close stays")
+
+    db = Database(":memory:")
+    vid = db.add_vehicle("А001АА")
+    cid = db.add_commander("Иванов")
+    db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+    db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+    db.update_status_and_log("commander", cid, "Иванов", "arrived")
+
+    stays = _stays(db)
+    all_ok = check(len(stays) == 2, "One open stay per arrived entity", str(stays))
+    all_ok &= check(all(s[4] is None for s in stays), "Stays are open while on site")
+
+    db.update_status_and_log("vehicle", vid, "А001АА", "departed")
+    db.delete_commander(cid)
+    stays = _stays(db)
+    all_ok &= check(
+        len(stays) == 2 and all(s[4] is not None for s in stays),
+        "Departure and deletion close the stays",
+        str(stays),
+    )
+    index = db._conn.execute("SELECT COUNT(*) FROM presence_index").fetchone()[0]
+    all_ok &= check(index == 2, "presence_index has a row per stay")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — present_at / present_between
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_queries() -> None:
+    section("TEST 2 · present_at() and present_between()")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _backfilled(os.path.join(tmp, "test.db"), _EVENTS)
+
+        cases = [
+            ("2026-03-01 19:59:59", []),
+            ("2026-03-01 20:00:00", ["А001АА"]),
+            ("2026-03-02 03:39:59", ["Иванов", "А001АА"]),
+            ("2026-03-02 03:40:00", ["Иванов"]),
+            ("2026-03-02 03:40:30", ["Иванов", "В002ВВ"]),
+            ("2026-03-03 12:00:00", []),
+            ("2027-01-01 00:00:00", ["А001АА"]),
+        ]
+        # Rows come ordered by type (commanders first), then by name.
+        all_ok = True
+        for ts, expected in cases:
+            got = _names(db.present_at(_ts(ts)))
+            all_ok &= check(got == expected, f"present_at({ts}) → {expected}", str(got))
+
+        got = _names(
+            db.present_between(_ts("2026-03-02 03:40:00"), _ts("2026-03-04 07:00:00"))
+        )
+        all_ok &= check(
+            got == ["Иванов", "А001АА", "В002ВВ"],
+            "present_between() includes both ends' overlaps and open stays",
+            str(got),
+        )
+        try:
+            db.present_between(_ts("2026-03-02 00:00:00"), _ts("2026-03-01 00:00:00"))
+            all_ok &= check(False, "end < start raises ValueError")
+        except ValueError:
+            all_ok &= check(True, "end < start raises ValueError")
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — backfill
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_backfill() -> None:
+    section("TEST 3 · Backfill replays the log in chunks")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        whole = _backfilled(os.path.join(tmp, "whole.db"), _EVENTS)
+        chunk = migrations._PRESENCE_BACKFILL_CHUNK
+        migrations._PRESENCE_BACKFILL_CHUNK = 2
+        try:
+            chunked = _backfilled(os.path.join(tmp, "chunked.db"), _EVENTS)
+        finally:
+            migrations._PRESENCE_BACKFILL_CHUNK = chunk
+        expected = [
+            ("vehicle", 1, "А001АА", "2026-03-01 20:00:00", "2026-03-02 03:40:00"),
+            ("commander", 1, "Иванов", "2026-03-02 03:00:00", "2026-03-02 09:00:00"),
+            ("vehicle", 2, "В002ВВ", "2026-03-02 03:40:30", "2026-03-03 10:00:00"),
+            ("vehicle", 1, "А001АА", "2026-03-04 07:00:00", None),
+        ]
+        all_ok = check(_stays(whole) == expected, "Stays derived from the log")
+        all_ok &= check(
+            _stays(chunked) == expected, "Chunk size does not change the result"
+        )
+        all_ok &= check(
+            not migrations.pending_data_migrations(chunked._conn),
+            "Backfill finished by migrate_in_background()",
+        )
+
+        # A status change while the backfill is pending is replayed by it.
+        pending = _upgraded(os.path.join(tmp, "pending.db"), [])
+        try:
+            pending.present_at(_ts("2026-03-02 03:00:00"))
+            all_ok &= check(False, "present_at() raises IncompleteError meanwhile")
+        except IncompleteError:
+            all_ok &= check(True, "present_at() raises IncompleteError meanwhile")
+        pending.update_status_and_log("vehicle", 1, "А001АА", "arrived")
+        all_ok &= check(_stays(pending) == [], "Live writes leave presence to it")
+        pending.migrate_in_background().join()
+        all_ok &= check(
+            _names(pending.present_at(datetime.now())) == ["А001АА"],
+            "Backfill replays the change made while it was pending",
+            str(_stays(pending)),
+        )
+
+        # The arrival was purged; the entity is still 'arrived' since then.
+        purged = _backfilled(
+            os.path.join(tmp, "purged.db"),
+            [("vehicle", 1, "А001АА", "created", "2026-03-01 08:00:00")],
+            arrived_vehicle="2026-03-01 09:00:00",
+        )
+        all_ok &= check(
+            _stays(purged) == [("vehicle", 1, "А001АА", "2026-03-01 09:00:00", None)],
+            "Entity on site without its arrival event gets a stay from 'updated'",
+            str(_stays(purged)),
+        )
+        for db in (whole, chunked, pending, purged):
+            db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — purge and clear
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_cleanup() -> None:
+    section("TEST 4 · Purge and clear_events()")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # All _EVENTS are far older than the retention cutoff.
+        db = _backfilled(os.path.join(tmp, "test.db"), _EVENTS)
+        db._purge_old_events()
+        db._conn.commit()
+        all_ok = check(
+            _stays(db) == [("vehicle", 1, "А001АА", "2026-03-04 07:00:00", None)],
+            "Purge keeps only the open stay",
+            str(_stays(db)),
+        )
+        index = db._conn.execute("SELECT COUNT(*) FROM presence_index").fetchone()[0]
+        all_ok &= check(index == 1, "presence_index purged with it")
+        db._conn.close()
+
+    db = Database(":memory:")
+    vid = db.add_vehicle("А001АА")
+    cid = db.add_commander("Иванов")
+    db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+    db.update_status_and_log("commander", cid, "Иванов", "arrived")
+    db.update_status_and_log("commander", cid, "Иванов", "departed")
+    db.clear_events()
+    all_ok &= check(
+        _names(db.present_at(datetime.now())) == ["А001АА"] and len(_stays(db)) == 1,
+        "clear_events() keeps the open stay and drops the ended one",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Presence interval tests                     ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_live_updates, test_queries, test_backfill, test_cleanup]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
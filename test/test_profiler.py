@@ -0,0 +1,201 @@
+"""Tests for on-demand profiling captures (profiler.py).
+
+What it checks
+--------------
+1.  Capture — start()/stop() writes a loadable .pstats file and a text
+    summary next to each other, named after the start time, and the
+    profiled function shows up in both.
+2.  Tags — the summary header carries the database size and entity
+    counts, or says the database was not available.
+3.  Session state — stop() without start() does nothing and start()
+    twice keeps one session.
+"""
+
+import os
+import pstats
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+
+from database import Database  # noqa: E402
+from profiler import ProfileSession  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _busy_work() -> int:
+    return sum(i * i for i in range(200_000))
+
+
+def _db(path: str) -> Database:
+    db = Database(path)
+    for i in range(12):
+        vid = db.add_vehicle(f"А{i:03d}АА")
+        db.update_status_and_log("vehicle", vid, f"А{i:03d}АА", "arrived")
+    for i in range(3):
+        db.add_commander(f"Командир {i}")
+    return db
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — capture files
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_capture() -> None:
+    section("TEST 1 · .pstats and summary are written")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(os.path.join(tmp, "database.db"))
+        session = ProfileSession(out_dir=tmp, top=15)
+        session.start()
+        _busy_work()
+        paths = session.stop(db)
+        db._conn.close()
+
+        all_ok = check(paths is not None, "stop() returns the written paths")
+        if paths is None:
+            assert all_ok
+        stats_path, text_path = paths
+        name = os.path.basename(stats_path)
+        all_ok &= check(
+            name.startswith("profile-")
+            and name.endswith(".pstats")
+            and text_path == stats_path[: -len(".pstats")] + ".txt",
+            f"Files are {name} and its .txt summary, next to the database",
+        )
+        stats = pstats.Stats(stats_path)
+        profiled = {func for _file, _line, func in stats.stats}
+        all_ok &= check("_busy_work" in profiled, "The .pstats file loads in pstats")
+        with open(text_path, encoding="utf-8") as f:
+            text = f.read()
+        all_ok &= check(
+            "Top 15 by own time" in text
+            and "Top 15 by cumulative time" in text
+            and "_busy_work" in text,
+            "The summary has both top-15 tables",
+        )
+        all_ok &= check(not session.active, "The session is over")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — database tags
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_tags() -> None:
+    section("TEST 2 · Summary is tagged with the database size and counts")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(os.path.join(tmp, "database.db"))
+        session = ProfileSession(out_dir=tmp)
+        session.start()
+        _, text_path = session.stop(db)
+        db._conn.close()
+        with open(text_path, encoding="utf-8") as f:
+            header = f.read().splitlines()[:3]
+        all_ok = check(
+            any(
+                "MB" in line
+                and "12 vehicles" in line
+                and "3 commanders" in line
+                and "27 events" in line
+                for line in header
+            ),
+            "Size, vehicles, commanders and events in the header",
+            f"{header}",
+        )
+
+        session.start()
+        _, text_path = session.stop()
+        with open(text_path, encoding="utf-8") as f:
+            text = f.read()
+        all_ok &= check(
+            "Database: not opened" in text, "Without a database the header says so"
+        )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — session state
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_session_state() -> None:
+    section("TEST 3 · One session at a time")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session = ProfileSession(out_dir=tmp)
+        all_ok = check(
+            session.stop() is None and not os.listdir(tmp),
+            "stop() without start() writes nothing",
+        )
+        session.start()
+        all_ok &= check(session.start() and session.active, "start() twice is a no-op")
+        session.stop()
+        all_ok &= check(
+            len(os.listdir(tmp)) == 2, "One capture, two files", f"{os.listdir(tmp)}"
+        )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Profiling capture tests                     ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_capture, test_tags, test_session_state]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
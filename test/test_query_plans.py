@@ -0,0 +1,306 @@
+"""Query-plan regression guard for every statement Database issues.
+
+The test runs every public Database method against a populated database
+while a trace callback records the SQL, then runs EXPLAIN QUERY PLAN on
+each distinct statement.
+
+What it checks
+--------------
+1.  No full scans — a statement that SCANs events, vehicles or commanders
+    fails unless the (statement, scan) pair is on ALLOWED_SCANS with a
+    reason.
+2.  Plan snapshot — the plans must match test/query_plans.txt, so any
+    change in index usage shows up in review. After an intended change,
+    regenerate the snapshot with:
+
+        UPDATE_QUERY_PLANS=1 python -m pytest test/test_query_plans.py
+"""
+
+import difflib
+import os
+import re
+import sys
+from datetime import date, datetime
+
+sys.path.insert(0, ".")
+
+from database import ConflictError, Database  # noqa: E402
+
+SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_plans.txt")
+
+_GUARDED_TABLES = ("events", "vehicles", "commanders")
+
+# (statement fingerprint, plan detail) → why a full scan is acceptable there.
+ALLOWED_SCANS: dict[tuple[str, str], str] = {
+    (
+        "SELECT * FROM events WHERE entity_name LIKE ? OR event_type LIKE ? "
+        "OR entity_type LIKE ? ORDER BY id DESC LIMIT ?",
+        "SCAN events",
+    ): "Substring search cannot use an index; the newest-first rowid walk "
+    "stops at LIMIT.",
+    (
+        "SELECT * FROM events ORDER BY id DESC LIMIT ?",
+        "SCAN events",
+    ): "Newest-first rowid walk that stops at LIMIT.",
+    (
+        "SELECT * FROM vehicles WHERE number LIKE ? ORDER BY number",
+        "SCAN vehicles USING INDEX sqlite_autoindex_vehicles_1",
+    ): "Substring search on a small table, walked in name order to skip the sort.",
+    (
+        "SELECT * FROM commanders WHERE name LIKE ? ORDER BY name",
+        "SCAN commanders USING INDEX sqlite_autoindex_commanders_1",
+    ): "Substring search on a small table, walked in name order to skip the sort.",
+    (
+        "SELECT id, number, status, COALESCE(updated, created), version FROM "
+        "vehicles WHERE number LIKE ? ORDER BY number",
+        "SCAN vehicles USING INDEX sqlite_autoindex_vehicles_1",
+    ): "iter_entities(): the same substring search as get_entities().",
+    (
+        "SELECT id, name, status, COALESCE(updated, created), version FROM "
+        "commanders WHERE name LIKE ? ORDER BY name",
+        "SCAN commanders USING INDEX sqlite_autoindex_commanders_1",
+    ): "iter_entities(): the same substring search as get_entities().",
+    (
+        "SELECT (SELECT COUNT(*) FROM vehicles) AS vehicles, (SELECT COUNT(*) FROM "
+        "commanders) AS commanders, (SELECT COUNT(*) FROM events WHERE event_type "
+        "= ?) AS arrivals, (SELECT COUNT(*) FROM events WHERE event_type = ?) AS "
+        "departures, (SELECT COUNT(*) FROM events) AS total_events",
+        "SCAN vehicles USING COVERING INDEX sqlite_autoindex_vehicles_1",
+    ): "COUNT(*) of a small table.",
+    (
+        "SELECT (SELECT COUNT(*) FROM vehicles) AS vehicles, (SELECT COUNT(*) FROM "
+        "commanders) AS commanders, (SELECT COUNT(*) FROM events WHERE event_type "
+        "= ?) AS arrivals, (SELECT COUNT(*) FROM events WHERE event_type = ?) AS "
+        "departures, (SELECT COUNT(*) FROM events) AS total_events",
+        "SCAN commanders USING COVERING INDEX sqlite_autoindex_commanders_1",
+    ): "COUNT(*) of a small table.",
+    (
+        "SELECT (SELECT COUNT(*) FROM vehicles) AS vehicles, (SELECT COUNT(*) FROM "
+        "commanders) AS commanders, (SELECT COUNT(*) FROM events WHERE event_type "
+        "= ?) AS arrivals, (SELECT COUNT(*) FROM events WHERE event_type = ?) AS "
+        "departures, (SELECT COUNT(*) FROM events) AS total_events",
+        "SCAN events USING COVERING INDEX idx_events_type",
+    ): "Total COUNT(*) walks the smallest index; there is no cheaper way.",
+    (
+        "INSERT INTO activity_hourly (hour, entity_type, event_type, count) SELECT "
+        "substr(ts, ?, ?), entity_type, event_type, COUNT(*) FROM events GROUP BY "
+        "?, ?, ?",
+        "SCAN events",
+    ): "rebuild_activity_rollups() recounts the whole log by design; it only "
+    "runs on demand.",
+}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def fingerprint(sql: str) -> str:
+    """Replace literals with '?' and collapse whitespace."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return " ".join(sql.split())
+
+
+def _populate(db: Database) -> None:
+    for i in range(60):
+        db.add_vehicle(f"А{i:03d}АА")
+    for i in range(20):
+        db.add_commander(f"Командир {i:02d}")
+    rows = [
+        ("vehicle", 1 + i % 60, f"А{i % 60:03d}АА", ("arrived", "departed")[i % 2],
+         f"2026-0{1 + i % 3}-{1 + i % 28:02d} {i % 24:02d}:00:00")
+        for i in range(2000)
+    ]  # fmt: skip
+    db._conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    db._conn.commit()
+
+
+def _exercise(db: Database) -> None:
+    """Call every public Database method that reaches SQLite."""
+    vid = db.add_vehicle("Б999ББ")
+    cid = db.add_commander("Тестовый Т.Т.")
+    db.get_vehicles()
+    db.get_vehicles("99")
+    db.get_commanders("Тест")
+    db.get_entities("vehicle", "А0")
+    list(db.iter_entities("vehicle", "99"))
+    list(db.iter_entities("commander", "Тест"))
+    db.get_entity("vehicle", vid)
+    db.get_entity("commander", cid)
+    version = db.update_status_and_log("vehicle", vid, "Б999ББ", "arrived").version
+    db.update_status_and_log(
+        "vehicle", vid, "Б999ББ", "departed", expected_version=version
+    )
+    try:
+        db.update_status_and_log(
+            "commander", cid, "Тестовый Т.Т.", "arrived", expected_version=99
+        )
+    except ConflictError:
+        pass
+    db.get_events()
+    db.get_events("Б999")
+    db.recent_activity(10)
+    db.stats()
+    for bucket in ("day", "week", "month"):
+        db.activity_series(date(2026, 1, 1), date(2026, 3, 31), bucket)
+    db.activity_series(date(2026, 1, 1), date(2026, 1, 31), "day", "vehicle")
+    db.rebuild_activity_rollups()
+    db.present_at(datetime(2026, 2, 1, 3, 40))
+    db.present_between(datetime(2026, 2, 1), datetime(2026, 2, 8))
+    list(db.iter_event_codes())
+    list(db.iter_event_codes(datetime(2026, 2, 1), datetime(2026, 3, 1)))
+    list(db.iter_event_codes(after_id=1500, names=True))
+    list(db.iter_event_ids(1000))
+    db.event_log_version()
+    db._purge_old_events()
+    db._conn.commit()
+    db.delete_vehicle(vid)
+    db.delete_commander(cid)
+    db.clear_events()
+
+
+def collect_plans() -> dict[str, list[str]]:
+    """Return fingerprint → plan lines for every distinct DML statement."""
+    db = Database(path=":memory:")
+    _populate(db)
+    statements: list[str] = []
+    db.set_trace(statements.append)
+    _exercise(db)
+    db.set_trace(None)
+
+    plans: dict[str, list[str]] = {}
+    for sql in statements:
+        if (
+            not sql.lstrip()
+            .upper()
+            .startswith(("SELECT", "INSERT", "UPDATE", "DELETE"))
+        ):
+            continue
+        fp = fingerprint(sql)
+        if fp not in plans:
+            plans[fp] = db.explain(sql)
+    return plans
+
+
+def render(plans: dict[str, list[str]]) -> str:
+    out = [
+        "# Query plans of every statement Database issues.",
+        "# Generated by test/test_query_plans.py — regenerate with",
+        "#     UPDATE_QUERY_PLANS=1 python -m pytest test/test_query_plans.py",
+        "",
+    ]
+    for fp in sorted(plans):
+        out.append(fp)
+        out.extend("    " + line for line in plans[fp] or ["(no table access)"])
+        out.append("")
+    return "\n".join(out)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — no unexpected full scans
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_no_unexpected_scans() -> None:
+    section("TEST 1 · No full SCAN outside the allow-list")
+
+    all_ok = True
+    for fp, lines in collect_plans().items():
+        for line in lines:
+            detail = line.strip()
+            table = detail.split()[1] if detail.startswith("SCAN ") else None
+            if table not in _GUARDED_TABLES:
+                continue
+            if (fp, detail) in ALLOWED_SCANS:
+                ok(f"{detail}  (allowed)  ←  {fp[:60]}")
+            else:
+                fail(f"{detail}  ←  {fp}", "add an index or an ALLOWED_SCANS entry")
+                all_ok = False
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — plans match the reviewed snapshot
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_plan_snapshot() -> None:
+    section("TEST 2 · Plans match test/query_plans.txt")
+
+    current = render(collect_plans())
+    if os.environ.get("UPDATE_QUERY_PLANS"):
+        with open(SNAPSHOT, "w", encoding="utf-8") as f:
+            f.write(current)
+        ok(f"Snapshot rewritten: {SNAPSHOT}")
+        return
+
+    try:
+        with open(SNAPSHOT, encoding="utf-8") as f:
+            stored = f.read()
+    except FileNotFoundError:
+        fail("Snapshot missing", "run with UPDATE_QUERY_PLANS=1 to create it")
+        assert False
+
+    if current == stored:
+        ok("All plans unchanged")
+        return
+    diff = difflib.unified_diff(
+        stored.splitlines(), current.splitlines(), "snapshot", "current", lineterm=""
+    )
+    fail("Query plans changed", "\n       ".join(diff))
+    assert False
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║               Query-plan regression guard                ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_no_unexpected_scans, test_plan_snapshot]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
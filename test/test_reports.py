@@ -0,0 +1,439 @@
+"""Tests for the sharded movement report engine (reports.py).
+
+What it checks
+--------------
+1.  Shards — month and week shards cover the range exactly once, split at
+    the first of the month or at Monday, with an exclusive end.
+2.  Aggregation — month and week shards, serially and in a process pool,
+    give the same report, and it equals direct SQL counts over the range;
+    entities seen in several shards are merged.
+3.  Output — the CSV files open as UTF-8 with a BOM and hold one row per
+    day and per entity; the HTML page escapes names.
+4.  Duty report — the journal lists the period's events in time order with
+    each entity's moves numbered; statuses at the start come from the
+    entity tables and the presence table; entities away at the end are
+    listed, longest away first, and deleted ones are not; entities created
+    during the period have no status at the start; the last duty day is
+    the last full one.
+5.  Pending backfill — while the presence backfill of an upgraded database
+    is still running, the duty report raises IncompleteError and writes
+    no files.
+"""
+
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, ".")
+
+import migrations  # noqa: E402
+import reports  # noqa: E402
+from bench.synthetic import generate  # noqa: E402
+from database import Database, IncompleteError  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _direct_counts(db: Database, start: date, end: date) -> tuple[dict, dict]:
+    """Daily and per-entity counts straight from the events table."""
+    bounds = (start.isoformat(), (end + timedelta(days=1)).isoformat())
+    daily = {}
+    for day, etype, event, n in db._conn.execute(
+        "SELECT substr(ts, 1, 10), entity_type, event_type, COUNT(*) FROM events "
+        "WHERE ts >= ? AND ts < ? GROUP BY 1, 2, 3",
+        bounds,
+    ):
+        daily.setdefault(day, {})[(etype, event)] = n
+    entities = {
+        (etype, eid): (arrivals, departures)
+        for etype, eid, arrivals, departures in db._conn.execute(
+            "SELECT entity_type, entity_id, SUM(event_type = 'arrived'), "
+            "SUM(event_type = 'departed') FROM events "
+            "WHERE ts >= ? AND ts < ? GROUP BY 1, 2",
+            bounds,
+        )
+    }
+    return daily, entities
+
+
+# Before, during and after the duty day 2026-03-02.
+_VEHICLES = [
+    (1, "А001АА", "arrived", "2026-02-01 08:00:00", "2026-03-02 18:00:00"),
+    (2, "В002ВВ", "arrived", "2026-02-01 08:00:00", "2026-03-03 08:00:00"),
+    (3, "Е003ЕЕ", "departed", "2026-02-01 08:00:00", "2026-02-28 12:00:00"),
+    (6, "Т006ТТ", "idle", "2026-03-02 11:00:00", None),
+]
+_EVENTS = [
+    ("vehicle", 4, "К004КК", "arrived", "2026-02-27 08:00:00"),
+    ("vehicle", 4, "К004КК", "departed", "2026-02-27 13:00:00"),
+    ("vehicle", 4, "К004КК", "deleted", "2026-02-28 09:00:00"),
+    ("vehicle", 3, "Е003ЕЕ", "departed", "2026-02-28 12:00:00"),
+    ("vehicle", 2, "В002ВВ", "arrived", "2026-03-01 08:00:00"),
+    ("vehicle", 2, "В002ВВ", "departed", "2026-03-01 09:00:00"),
+    ("vehicle", 5, "М005ММ", "arrived", "2026-03-01 10:00:00"),
+    ("vehicle", 1, "А001АА", "arrived", "2026-03-01 20:00:00"),
+    ("commander", 1, "Иванов", "arrived", "2026-03-02 07:00:00"),
+    ("vehicle", 5, "М005ММ", "departed", "2026-03-02 09:00:00"),
+    ("vehicle", 1, "А001АА", "departed", "2026-03-02 10:00:00"),
+    ("vehicle", 6, "Т006ТТ", "created", "2026-03-02 11:00:00"),
+    ("vehicle", 5, "М005ММ", "deleted", "2026-03-02 12:00:00"),
+    ("vehicle", 1, "А001АА", "arrived", "2026-03-02 18:00:00"),
+    ("commander", 1, "Иванов", "departed", "2026-03-02 21:00:00"),
+    ("vehicle", 2, "В002ВВ", "arrived", "2026-03-03 08:00:00"),
+]
+
+
+def _history_db(path: str, backfill: bool = True) -> None:
+    """Create a database holding _EVENTS, with presence backfilled from them
+    unless backfill=False."""
+    conn = sqlite3.connect(path)
+    migrations.upgrade(conn, [m for m in migrations.MIGRATIONS if m.version < 7])
+    conn.executemany(
+        "INSERT INTO vehicles (id, number, status, created, updated) "
+        "VALUES (?, ?, ?, ?, ?)",
+        _VEHICLES,
+    )
+    conn.execute(
+        "INSERT INTO commanders (id, name, status, created, updated) "
+        "VALUES (1, 'Иванов', 'departed', '2026-02-01 08:00:00', "
+        "'2026-03-02 21:00:00')"
+    )
+    conn.executemany(
+        "INSERT INTO events (entity_type, entity_id, entity_name, event_type, ts) "
+        "VALUES (?, ?, ?, ?, ?)",
+        _EVENTS,
+    )
+    conn.commit()
+    conn.close()
+    db = Database(path)
+    if backfill:
+        db.migrate_in_background().join()
+    db._conn.close()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — shards
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_shards() -> None:
+    section("TEST 1 · Month and week shards cover the range")
+
+    months = reports.shards(date(2026, 1, 15), date(2026, 3, 10), "month")
+    all_ok = check(
+        months
+        == [
+            reports.Shard(date(2026, 1, 15), date(2026, 2, 1)),
+            reports.Shard(date(2026, 2, 1), date(2026, 3, 1)),
+            reports.Shard(date(2026, 3, 1), date(2026, 3, 11)),
+        ],
+        "Months split at the 1st, the last ends the day after `end`",
+        str(months),
+    )
+    weeks = reports.shards(date(2026, 1, 1), date(2026, 1, 31), "week")
+    all_ok &= check(
+        all(s.start.weekday() == 0 for s in weeks[1:])
+        and all(a.end == b.start for a, b in zip(weeks, weeks[1:]))
+        and weeks[0].start == date(2026, 1, 1)
+        and weeks[-1].end == date(2026, 2, 1),
+        f"Weeks start on Monday and are contiguous ({len(weeks)} shards)",
+    )
+    single = reports.shards(date(2026, 1, 5), date(2026, 1, 5), "week")
+    all_ok &= check(
+        single == [reports.Shard(date(2026, 1, 5), date(2026, 1, 6))],
+        "A one-day range is one shard",
+    )
+    for args, label in (
+        ((date(2026, 1, 2), date(2026, 1, 1), "month"), "end before start"),
+        ((date(2026, 1, 1), date(2026, 1, 2), "year"), "unknown shard kind"),
+    ):
+        try:
+            reports.shards(*args)
+            all_ok &= check(False, f"ValueError for {label}")
+        except ValueError:
+            all_ok &= check(True, f"ValueError for {label}")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — aggregation
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_aggregation() -> None:
+    section("TEST 2 · Shards merge into the same counts as direct SQL")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        db = Database(path)
+        generate(db, vehicles=30, commanders=10, months=3, end=datetime(2026, 3, 1))
+        start, end = date(2025, 12, 10), date(2026, 2, 20)
+        daily, entities = _direct_counts(db, start, end)
+
+        serial = reports.build_movement_report(start, end, "month", 1, path)
+        got = {
+            (e.entity_type, e.entity_id): (e.arrivals, e.departures)
+            for e in serial.entities
+        }
+        all_ok = check(
+            list(serial.daily)
+            == [
+                (start + timedelta(days=i)).isoformat()
+                for i in range((end - start).days + 1)
+            ],
+            "Every day of the range is listed, in order",
+        )
+        all_ok &= check(
+            {d: c for d, c in serial.daily.items() if c} == daily,
+            "Daily counts equal direct SQL",
+        )
+        all_ok &= check(got == entities, f"Counts of all {len(got)} entities match")
+        all_ok &= check(
+            all(e.first <= e.last for e in serial.entities)
+            and min(e.first for e in serial.entities) >= start.isoformat(),
+            "First and last events lie inside the range",
+        )
+
+        weekly = reports.build_movement_report(start, end, "week", 1, path)
+        all_ok &= check(weekly == serial, "Week shards give the same report")
+        parallel = reports.build_movement_report(start, end, "week", 3, path)
+        all_ok &= check(parallel == serial, "A pool of 3 workers gives the same")
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — output
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_output() -> None:
+    section("TEST 3 · CSV and HTML files")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        db = Database(path)
+        vid = db.add_vehicle("<А001АА>")
+        db.update_status_and_log("vehicle", vid, "<А001АА>", "arrived")
+        db.update_status_and_log("vehicle", vid, "<А001АА>", "departed")
+        today = date.today()
+        report = reports.build_movement_report(
+            today - timedelta(days=2), today, workers=1, path=path
+        )
+        out = os.path.join(tmp, "reports")
+        daily_csv, entities_csv = reports.write_movement_csv(report, out)
+
+        with open(daily_csv, "rb") as f:
+            all_ok = check(f.read(3) == b"\xef\xbb\xbf", "CSV starts with a BOM")
+        with open(daily_csv, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f, delimiter=";"))
+        all_ok &= check(
+            len(rows) == 4 and rows[-1][:3] == [today.isoformat(), "1", "1"],
+            "daily.csv: header plus 3 days, today's moves counted",
+            str(rows),
+        )
+        with open(entities_csv, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f, delimiter=";"))
+        all_ok &= check(
+            rows[1][:4] == ["ТС", "<А001АА>", "1", "1"], "entities.csv row", str(rows)
+        )
+
+        page_path = reports.write_movement_html(report, out)
+        with open(page_path, encoding="utf-8") as f:
+            page = f.read()
+        all_ok &= check(
+            "&lt;А001АА&gt;" in page and "<А001АА>" not in page,
+            "HTML escapes entity names",
+        )
+        all_ok &= check(page.count("<table>") == 2, "HTML has both tables")
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — duty report
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_duty_report() -> None:
+    section("TEST 4 · Daily duty report")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        _history_db(path)
+        start, end = reports.duty_period(date(2026, 3, 2))
+        report = reports.write_duty_report(start, end, tmp, path)
+
+        with open(report.paths[0], encoding="utf-8-sig", newline="") as f:
+            journal = list(csv.reader(f, delimiter=";"))[1:]
+        all_ok = check(
+            report.events == 7
+            and [r[0] for r in journal]
+            == sorted(e[4] for e in _EVENTS if e[4].startswith("2026-03-02")),
+            "Journal: the 7 events of the day, in time order",
+            str(journal),
+        )
+        all_ok &= check(
+            [r[4] for r in journal if r[2] == "А001АА"] == ["1", "2"]
+            and [r[4] for r in journal if r[2] == "М005ММ"] == ["1", ""],
+            "Moves are numbered per entity, other events are not",
+        )
+
+        summary = {e.entity_name: e for e in report.entities}
+        all_ok &= check(
+            set(summary) == {"Иванов", "А001АА", "М005ММ", "Т006ТТ"},
+            "Entities with events in the period are summarised",
+            str(sorted(summary)),
+        )
+        a = summary["А001АА"]
+        all_ok &= check(
+            (a.opening, a.closing, a.arrivals, a.departures)
+            == ("arrived", "arrived", 1, 1),
+            "On site at the start (from presence) and at the end",
+            str(a),
+        )
+        all_ok &= check(
+            summary["М005ММ"].closing == "deleted", "Deleted during the day"
+        )
+        t = summary["Т006ТТ"]
+        all_ok &= check(
+            (t.opening, t.closing) == (None, "idle"),
+            "Created during the day: no status at the start",
+            str(t),
+        )
+
+        absent = [(e.entity_name, e.since) for e in report.absent]
+        all_ok &= check(
+            absent
+            == [
+                ("Е003ЕЕ", "2026-02-28 12:00:00"),
+                ("В002ВВ", "2026-03-01 09:00:00"),
+                ("Иванов", "2026-03-02 21:00:00"),
+            ],
+            "Absent at the end: unchanged, changed later, left today; "
+            "deleted ones left out",
+            str(absent),
+        )
+
+        with open(report.paths[3], encoding="utf-8") as f:
+            page = f.read()
+        all_ok &= check(
+            page.count("<table>") == 3 and page.rstrip().endswith("</html>"),
+            "HTML has the absent, entity and journal tables",
+        )
+        all_ok &= check(
+            all(os.path.basename(p).startswith("duty-20260302") for p in report.paths),
+            "Files are named after the day",
+        )
+        try:
+            reports.write_duty_report(end, start, tmp, path)
+            all_ok &= check(False, "ValueError for an empty period")
+        except ValueError:
+            all_ok &= check(True, "ValueError for an empty period")
+
+    day_start = reports.duty_period(date(2026, 3, 3))[0]
+    all_ok &= check(
+        reports.last_duty_period(day_start + timedelta(hours=1))
+        == reports.duty_period(date(2026, 3, 2))
+        and reports.last_duty_period(day_start - timedelta(minutes=1))
+        == reports.duty_period(date(2026, 3, 1)),
+        "The last duty day is the last full one",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 5 — duty report while the presence backfill is pending
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_duty_report_pending() -> None:
+    section("TEST 5 · Duty report while the presence backfill is pending")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        _history_db(path, backfill=False)
+        out = os.path.join(tmp, "reports")
+        start, end = reports.duty_period(date(2026, 3, 2))
+        try:
+            reports.write_duty_report(start, end, out, path)
+            all_ok = check(False, "IncompleteError raised")
+        except IncompleteError:
+            all_ok = check(True, "IncompleteError raised")
+        all_ok &= check(os.listdir(out) == [], "No report files written")
+
+        db = Database(path)
+        db.migrate_in_background().join()
+        db._conn.close()
+        report = reports.write_duty_report(start, end, out, path)
+        all_ok &= check(report.events == 7, "Written once the backfill has finished")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Movement report tests                       ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_shards,
+        test_aggregation,
+        test_output,
+        test_duty_report,
+        test_duty_report_pending,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Tests for the startup snapshot (snapshot.py) and Database.read_entities().
+
+What it checks
+--------------
+1.  Round trip — saved rows load back unchanged, per section and in order,
+    and no .part file is left behind.
+2.  Unusable files — a missing, corrupt, malformed or older-format
+    snapshot loads as {}, so the app falls back to the database.
+3.  read_entities — returns the same rows as iter_entities() for every
+    type, on a file database (own connection) and in memory.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+
+import snapshot  # noqa: E402
+from database import Database  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _rows(n: int, prefix: str) -> list[tuple[int, str, str, str, int]]:
+    statuses = ("idle", "arrived", "departed")
+    return [
+        (i + 1, f"{prefix}{i:04d}", statuses[i % 3], "08:00 01.03.2026", i % 5)
+        for i in range(n)
+    ]
+
+
+def _fill(db: Database) -> None:
+    for i in range(30):
+        vid = db.add_vehicle(f"А{i:03d}ВС")
+        if i % 2:
+            db.update_status_and_log("vehicle", vid, f"А{i:03d}ВС", "arrived")
+    for i in range(10):
+        db.add_commander(f"Иванов {i}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — round trip
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_round_trip() -> None:
+    section("TEST 1 · Saved rows load back unchanged")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ui_snapshot.json")
+        sections = {"vehicle": _rows(500, "А"), "commander": _rows(20, "Петров ")}
+        snapshot.save(sections, path)
+        loaded = snapshot.load(path)
+        all_ok = check(loaded == sections, "Both sections round-trip in order")
+        all_ok &= check(
+            os.listdir(tmp) == ["ui_snapshot.json"], "No .part file is left behind"
+        )
+        snapshot.save({"vehicle": []}, path)
+        all_ok &= check(
+            snapshot.load(path) == {"vehicle": []},
+            "A new save replaces the previous snapshot",
+        )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — unusable snapshot files
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_unusable_files() -> None:
+    section("TEST 2 · Unusable snapshots are ignored")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ui_snapshot.json")
+        all_ok = check(snapshot.load(path) == {}, "Missing file")
+
+        cases = {
+            "Truncated JSON": '{"format": 1, "sections": {"vehicle": [[1, "А',
+            "Wrong row shape": '{"format": 1, "sections": {"vehicle": [[1, "А"]]}}',
+            "No sections": '{"format": 1}',
+            "Older format": json.dumps(
+                {"format": 0, "sections": {"vehicle": [[1, "А", "idle", "", 0]]}}
+            ),
+        }
+        for label, text in cases.items():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            all_ok &= check(snapshot.load(path) == {}, label)
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — Database.read_entities
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_read_entities() -> None:
+    section("TEST 3 · read_entities() matches iter_entities()")
+
+    all_ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, path in (
+            ("file database", os.path.join(tmp, "test.db")),
+            ("in-memory database", ":memory:"),
+        ):
+            db = Database(path)
+            _fill(db)
+            rows = db.read_entities()
+            expected = {t: list(db.iter_entities(t)) for t in ("vehicle", "commander")}
+            all_ok &= check(
+                rows == expected,
+                f"Same rows for both types ({label})",
+                f"{ {t: len(r) for t, r in rows.items()} }",
+            )
+            db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Startup snapshot tests                      ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [test_round_trip, test_unusable_files, test_read_entities]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
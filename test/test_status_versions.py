@@ -0,0 +1,229 @@
+"""Tests for compare-and-set status updates (update_status_and_log).
+
+What it checks
+--------------
+1.  Success — every status change returns the entity's version + 1, with
+    or without expected_version, and the timestamp it stored in 'updated'
+    and in the event.
+2.  Stale version — a change against an old version raises ConflictError
+    and leaves the row, the event log, the rollups and the stays as they
+    were, with the write lock released.
+3.  Missing entity — a change to a deleted entity raises NotFoundError
+    and writes no event.
+4.  Migration 3 — upgrading a database from before versioning adds the
+    version column, with 0 for the existing rows.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+
+import migrations  # noqa: E402
+from database import ConflictError, Database, NotFoundError  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+def _snapshot(db: Database, vid: int) -> tuple:
+    """The vehicle row and every table a status change writes to."""
+    conn = db._conn
+    return (
+        tuple(conn.execute("SELECT * FROM vehicles WHERE id = ?", (vid,)).fetchone()),
+        [tuple(r) for r in conn.execute("SELECT * FROM events ORDER BY id")],
+        [tuple(r) for r in conn.execute("SELECT * FROM activity_hourly")],
+        [tuple(r) for r in conn.execute("SELECT * FROM presence")],
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — success
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_success() -> None:
+    section("TEST 1 · Every change returns the next version")
+
+    db = Database(":memory:")
+    vid = db.add_vehicle("А001АА")
+    start = db.get_entity("vehicle", vid)["version"]
+
+    first = db.update_status_and_log("vehicle", vid, "А001АА", "arrived")
+    second = db.update_status_and_log(
+        "vehicle", vid, "А001АА", "departed", expected_version=first.version
+    )
+    all_ok = check(first.version == start + 1, "Without expected_version: version + 1")
+    all_ok &= check(
+        second.version == first.version + 1, "With the current version: version + 1"
+    )
+    row = db.get_entity("vehicle", vid)
+    all_ok &= check(
+        row["version"] == second.version and row["status"] == "departed",
+        "The returned version is the stored one",
+        str(tuple(row)),
+    )
+    event_ts = db._conn.execute("SELECT MAX(id), ts FROM events").fetchone()[1]
+    all_ok &= check(
+        second.ts == row["updated"] == event_ts,
+        "The returned ts is the stored 'updated' and the event's ts",
+        f"{second.ts} / {row['updated']} / {event_ts}",
+    )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — stale version
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_stale_version() -> None:
+    section("TEST 2 · A stale version raises ConflictError and writes nothing")
+
+    db = Database(":memory:")
+    vid = db.add_vehicle("А001АА")
+    stale = db.update_status_and_log("vehicle", vid, "А001АА", "arrived").version
+    db.update_status_and_log("vehicle", vid, "А001АА", "departed")  # elsewhere
+    before = _snapshot(db, vid)
+
+    try:
+        db.update_status_and_log(
+            "vehicle", vid, "А001АА", "arrived", expected_version=stale
+        )
+        all_ok = check(False, "ConflictError raised")
+    except ConflictError:
+        all_ok = check(True, "ConflictError raised")
+    all_ok &= check(
+        _snapshot(db, vid) == before,
+        "Row, events, rollups and presence unchanged",
+    )
+    all_ok &= check(not db._conn.in_transaction, "The write lock is released")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — missing entity
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_missing_entity() -> None:
+    section("TEST 3 · A deleted entity raises NotFoundError")
+
+    db = Database(":memory:")
+    vid = db.add_vehicle("А001АА")
+    version = db.get_entity("vehicle", vid)["version"]
+    db.delete_vehicle(vid)
+    events = db._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    all_ok = True
+    for expected in (None, version):
+        try:
+            db.update_status_and_log(
+                "vehicle", vid, "А001АА", "arrived", expected_version=expected
+            )
+            all_ok &= check(False, f"expected_version={expected}: NotFoundError")
+        except NotFoundError:
+            all_ok &= check(True, f"expected_version={expected}: NotFoundError")
+    after = db._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    all_ok &= check(after == events, "No event was written", f"{events} → {after}")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — migration 3 on an existing database
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_migration_adds_version() -> None:
+    section("TEST 4 · Migration 3 adds the version column")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.db")
+        conn = sqlite3.connect(path)
+        migrations.upgrade(conn, [m for m in migrations.MIGRATIONS if m.version < 3])
+        conn.execute(
+            "INSERT INTO vehicles (number, status, created) "
+            "VALUES ('А001АА', 'arrived', '2026-01-01 08:00:00')"
+        )
+        conn.commit()
+        conn.close()
+
+        db = Database(path)
+        cols = [r[1] for r in db._conn.execute("PRAGMA table_info(commanders)")]
+        all_ok = check("version" in cols, "commanders.version added")
+        row = db.get_vehicles()[0]
+        all_ok &= check(row["version"] == 0, "Existing rows start at version 0")
+        change = db.update_status_and_log(
+            "vehicle", row["id"], "А001АА", "departed", expected_version=0
+        )
+        all_ok &= check(
+            change.version == 1, "Compare-and-set works on the upgraded row"
+        )
+        db._conn.close()
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Status version tests                        ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_success,
+        test_stale_version,
+        test_missing_entity,
+        test_migration_adds_version,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
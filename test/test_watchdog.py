@@ -0,0 +1,241 @@
+"""Tests for the event-loop stall watchdog (watchdog.py).
+
+The tests drive StallWatchdog with a minimal after()-style loop running in
+the main thread, so no Tk window is needed.
+
+What it checks
+--------------
+1.  Healthy loop — a loop that keeps up with its heartbeat logs no stalls
+    and never samples a stack.
+2.  Stall — a callback that blocks the loop is logged with its duration,
+    and the sampled stacks name the blocking function.
+3.  Long stall — a stall longer than report_seconds is also logged while
+    it is still going on.
+4.  Rotation — the stall log is rotated at log_bytes, keeping log_backups
+    old files.
+"""
+
+import heapq
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from watchdog import StallWatchdog  # noqa: E402
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def ok(label: str) -> None:
+    print(f"  \033[32m✓\033[0m  {label}")
+
+
+def fail(label: str, detail: str = "") -> None:
+    print(f"  \033[31m✗\033[0m  {label}")
+    if detail:
+        print(f"       {detail}")
+
+
+def section(title: str) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"  {title}")
+    print(f"{'─' * 60}")
+
+
+def check(cond: bool, label: str, detail: str = "") -> bool:
+    if cond:
+        ok(label)
+    else:
+        fail(label, detail)
+    return cond
+
+
+class _Loop:
+    """Runs after() callbacks in the calling thread, like Tk's mainloop."""
+
+    def __init__(self):
+        self._queue: list = []
+        self._seq = itertools.count()
+
+    def after(self, ms: int, callback) -> None:
+        heapq.heappush(
+            self._queue, (time.monotonic() + ms / 1000, next(self._seq), callback)
+        )
+
+    def run(self, seconds: float) -> None:
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            if self._queue and self._queue[0][0] <= time.monotonic():
+                heapq.heappop(self._queue)[2]()
+            else:
+                time.sleep(0.002)
+
+
+def _watchdog(loop: _Loop, log_path: str, **kwargs) -> StallWatchdog:
+    options = dict(heartbeat_ms=50, threshold_ms=150, sample_ms=10)
+    options.update(kwargs)
+    return StallWatchdog(loop.after, log_path=log_path, **options)
+
+
+def _read(path: str) -> str:
+    if not os.path.exists(path):
+        return ""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _block_the_loop(seconds: float) -> None:
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sum(range(1000))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 1 — healthy loop
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_healthy_loop() -> None:
+    section("TEST 1 · No stalls on a healthy loop")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "stalls.log")
+        loop = _Loop()
+        dog = _watchdog(loop, log)
+        dog.start()
+        loop.after(200, lambda: _block_the_loop(0.05))  # short, under threshold
+        loop.run(1.0)
+        dog.stop()
+        all_ok = check(dog.stats() == (0, 0), "No stall logged, no stack sampled")
+        all_ok &= check(_read(log) == "", "The stall log stays empty")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 2 — a blocking callback
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_stall_logged() -> None:
+    section("TEST 2 · A blocking callback is logged with its stack")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "stalls.log")
+        loop = _Loop()
+        dog = _watchdog(loop, log)
+        dog.start()
+        loop.after(100, lambda: _block_the_loop(0.6))
+        loop.run(1.2)
+        dog.stop()
+
+        stalls, samples = dog.stats()
+        text = _read(log)
+        all_ok = check(stalls == 1, "Exactly one stall", f"{stalls} stalls")
+        all_ok &= check(samples >= 10, f"{samples} stack samples taken")
+        header = text.splitlines()[0] if text else ""
+        seconds = float(header.split(" stall ")[1].split(" s,")[0]) if header else 0
+        # The stall counts from when the heartbeat was due, at most 50 ms
+        # after the block began.
+        all_ok &= check(
+            0.4 <= seconds <= 0.8, f"Logged duration {seconds:.3f} s for a 0.6 s block"
+        )
+        all_ok &= check(
+            "_block_the_loop" in text and "test_watchdog.py" in text,
+            "The hot stack names the blocking function",
+            text[:300],
+        )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 3 — a long stall reported while ongoing
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_long_stall_reported() -> None:
+    section("TEST 3 · Long stalls are logged while they last")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "stalls.log")
+        loop = _Loop()
+        dog = _watchdog(loop, log, report_seconds=0.3)
+        dog.start()
+        loop.after(100, lambda: _block_the_loop(1.0))
+        loop.run(1.4)
+        dog.stop()
+        text = _read(log)
+        ongoing = text.count("ongoing stall")
+        all_ok = check(
+            ongoing >= 2, f"{ongoing} interim reports during a 1 s stall", text[:300]
+        )
+        all_ok &= check(dog.stats()[0] == 1, "Still counted as one stall")
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test 4 — log rotation
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def test_rotation() -> None:
+    section("TEST 4 · The stall log is rotated")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "stalls.log")
+        loop = _Loop()
+        dog = _watchdog(loop, log, threshold_ms=60, log_bytes=600, log_backups=2)
+        dog.start()
+        for i in range(8):
+            loop.after(100 + 300 * i, lambda: _block_the_loop(0.15))
+        loop.run(2.8)
+        dog.stop()
+        files = sorted(os.listdir(tmp))
+        all_ok = check(
+            files == ["stalls.log", "stalls.log.1", "stalls.log.2"],
+            f"{dog.stats()[0]} stalls rotated into {files}",
+        )
+    assert all_ok
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Runner
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    print("\n╔══════════════════════════════════════════════════════════╗")
+    print("║              Event-loop watchdog tests                   ║")
+    print("╚══════════════════════════════════════════════════════════╝")
+
+    tests = [
+        test_healthy_loop,
+        test_stall_logged,
+        test_long_stall_reported,
+        test_rotation,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError:
+            pass
+    total = len(tests)
+
+    print(f"\n{'═' * 60}")
+    if passed == total:
+        print(f"  \033[32m✓ All {total} tests passed\033[0m")
+    else:
+        print(f"  \033[31m✗ {total - passed} of {total} tests FAILED\033[0m")
+    print(f"{'═' * 60}\n")
+
+    sys.exit(0 if passed == total else 1)
+
+
+if __name__ == "__main__":
+    main()
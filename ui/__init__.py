@@ -1,14 +1,24 @@
-"""Пакет UI-компонентов."""
-
-from ui.app import App
-from ui.dialogs import InputDialog
-from ui.tabs import HistoryTab, StatsTab
-
-__all__ = [
-    "EntityTable",
-    "InputDialog",
-    "EntityTab",
-    "HistoryTab",
-    "StatsTab",
-    "App",
-]
+"""Пакет UI-компонентов.
+
+The exports are resolved lazily, so that Tk-free modules of the package
+(ui.cardlayout) can be imported by headless tools without loading
+customtkinter.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "App": "ui.app",
+    "InputDialog": "ui.dialogs",
+    "HistoryTab": "ui.tabs",
+    "StatsTab": "ui.tabs",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
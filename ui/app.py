@@ -3,12 +3,20 @@
 import sys
 from datetime import datetime
 from pathlib import Path
+from tkinter import messagebox
 
 import customtkinter as ctk
 
-from config import C
+import startup
+from backup import BackupManager
+from config import DIAGNOSTICS, WATCHDOG_ENABLED, C
 from database import Database
-from ui.tabs import AccountingTab, HistoryTab, StatsTab
+from instrumentation import Instrumentation
+from maintenance import MaintenanceScheduler
+from profiler import ProfileSession
+from ui.tabs import AccountingTab, DiagnosticsTab, HistoryTab, StatsTab
+from ui.theme import apply_theme
+from watchdog import StallWatchdog
 
 
 class App(ctk.CTk):
@@ -18,21 +26,53 @@ class App(ctk.CTk):
         ("accounting", "📋", "Учёт"),
         ("history", "🕒", "История"),
         ("stats", "📊", "Статистика"),
+        ("diagnostics", "🩺", "Диагностика"),
     ]
+    _TAB_CLASSES = {
+        "accounting": AccountingTab,
+        "history": HistoryTab,
+        "stats": StatsTab,
+        "diagnostics": DiagnosticsTab,
+    }
+    # Not in the sidebar until revealed with Ctrl+Shift+D (or RASKHOD_DIAGNOSTICS=1).
+    _HIDDEN_TABS = ("diagnostics",)
 
-    def __init__(self):
+    _TITLE = "Система контроля"
+
+    def __init__(self, profiler: ProfileSession | None = None):
+        """profiler may already be running, to include startup in the capture."""
+        apply_theme()
         super().__init__()
-        self.title("Система контроля")
+        self._profiler = profiler or ProfileSession()
+        self._update_title()
         self.geometry("1500x800")
         self.minsize(900, 600)
         self.configure(fg_color=C["bg"])
         self._set_icon()
 
-        self.db = Database()
+        self.db = Database(migrate=False)
+        startup.mark("db_open")
+        self.db.migrate()
+        startup.mark("migrate")
+        self.db.migrate_in_background()
+        self.instrumentation = Instrumentation()
+        if DIAGNOSTICS:
+            self.instrumentation.attach(self.db)
+        self._backups = BackupManager(self.db)
+        self._backups.start()
+        self._maintenance = MaintenanceScheduler(self.db)
+        self._maintenance.start()
         self._build()
+        if DIAGNOSTICS:
+            self._reveal_diagnostics()
+        self.bind("<Control-Shift-D>", lambda _e: self._on_diagnostics_hotkey())
+        self.bind("<Control-Shift-P>", lambda _e: self._on_profile_hotkey())
+        self._watchdog = StallWatchdog(self.after) if WATCHDOG_ENABLED else None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         # Defer maximise until after the initial geometry pass;
         # winfo_screenwidth() can return 1 on some platforms if called too early.
         self.after(0, self._maximize_window)
+        self.after_idle(self._on_first_paint)
 
     def _set_icon(self) -> None:
         """Set the window icon for both dev and PyInstaller frozen modes."""
@@ -44,6 +84,30 @@ class App(ctk.CTk):
         if icon_path.exists():
             self.iconbitmap(str(icon_path))
 
+    def _on_first_paint(self) -> None:
+        self.update_idletasks()
+        startup.mark("first_paint")
+        # Only now is the event loop running; startup is timed by startup.py.
+        if self._watchdog is not None:
+            self._watchdog.start()
+        self._poll_interactive()
+
+    def _poll_interactive(self) -> None:
+        """Wait for the accounting grids to finish drawing, then to be synced."""
+        if self._tabs["accounting"].filling():
+            self.after(50, self._poll_interactive)
+            return
+        startup.mark("interactive")
+        self._poll_synced()
+
+    def _poll_synced(self) -> None:
+        """Wait for the snapshot to be reconciled, then log the timeline."""
+        if self._tabs["accounting"].syncing():
+            self.after(50, self._poll_synced)
+            return
+        startup.mark("synced")
+        startup.write()
+
     def _maximize_window(self) -> None:
         """Maximise the window in a cross-platform way."""
         self.update_idletasks()
@@ -126,7 +190,8 @@ class App(ctk.CTk):
                 corner_radius=0,
                 command=lambda k=key: self._show_tab(k),
             )
-            btn.pack(fill="x", padx=0, pady=1)
+            if key not in self._HIDDEN_TABS:
+                btn.pack(fill="x", padx=0, pady=1)
             self._nav_buttons[key] = btn
 
         ctk.CTkFrame(sidebar, height=1, fg_color=C["border"]).pack(
@@ -138,25 +203,111 @@ class App(ctk.CTk):
             font=ctk.CTkFont(size=10),
             text_color=C["subtext"],
         ).pack(side="bottom", pady=8)
+        self._backup_btn = ctk.CTkButton(
+            sidebar,
+            text="  💾  Резервная копия",
+            font=ctk.CTkFont(size=12),
+            anchor="w",
+            fg_color="transparent",
+            hover_color=C["card"],
+            text_color=C["subtext"],
+            height=40,
+            corner_radius=0,
+            command=self._on_backup,
+        )
+        self._backup_btn.pack(fill="x", side="bottom", pady=1)
+
+    def _on_backup(self) -> None:
+        """Start a manual backup on the worker thread and poll for its result."""
+        self._backup_btn.configure(state="disabled", text="  💾  Копирование...")
+        self._backups.request()
+        self.after(200, self._poll_backup)
+
+    def _poll_backup(self) -> None:
+        busy, last, error = self._backups.state()
+        if busy:
+            self.after(200, self._poll_backup)
+            return
+        self._backup_btn.configure(state="normal", text="  💾  Резервная копия")
+        if error:
+            messagebox.showerror("Резервная копия", error, parent=self)
+        elif last:
+            messagebox.showinfo(
+                "Резервная копия", f"Копия сохранена:\n{last.path}", parent=self
+            )
+
+    def _reveal_diagnostics(self) -> None:
+        btn = self._nav_buttons["diagnostics"]
+        if not btn.winfo_manager():
+            btn.pack(fill="x", padx=0, pady=1)
+
+    def _on_diagnostics_hotkey(self) -> None:
+        """Show the diagnostics tab and start recording Database latencies."""
+        self._reveal_diagnostics()
+        self.instrumentation.attach(self.db)
+        self._show_tab("diagnostics")
+
+    def _update_title(self) -> None:
+        suffix = "  —  профилирование" if self._profiler.active else ""
+        self.title(self._TITLE + suffix)
+
+    def _on_profile_hotkey(self) -> None:
+        """Start a cProfile capture, or stop it and say where it was written."""
+        if not self._profiler.active:
+            self._profiler.start()
+            self._update_title()
+            return
+        paths = self._profiler.stop(self.db)
+        self._update_title()
+        if paths is None:
+            messagebox.showerror(
+                "Профилирование", "Не удалось сохранить профиль.", parent=self
+            )
+        else:
+            messagebox.showinfo(
+                "Профилирование", f"Профиль сохранён:\n{paths[1]}", parent=self
+            )
+
+    def _card_grids(self) -> dict:
+        accounting = self._tabs.get("accounting")
+        return accounting.card_grids() if accounting is not None else {}
+
+    def _on_close(self) -> None:
+        accounting = self._tabs.get("accounting")
+        if accounting is not None:
+            accounting.save_snapshot()
+        # Give a backup in progress a bounded time to finish; a .part file it
+        # leaves behind is removed when backups start on the next run.
+        self._backups.stop()
+        self._maintenance.stop()
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        if self._profiler.active:
+            self._profiler.stop(self.db)
+        self.destroy()
 
     def _build_content(self, parent: ctk.CTkFrame) -> None:
-        """Stack all tab frames in the same grid cell; tkraise() switches between them."""
-        content = ctk.CTkFrame(parent, fg_color=C["bg"])
-        content.grid(row=0, column=1, sticky="nsew")
-        content.grid_rowconfigure(0, weight=1)
-        content.grid_columnconfigure(0, weight=1)
-
-        self._tabs: dict[str, ctk.CTkFrame] = {
-            "accounting": AccountingTab(content, self.db),
-            "history": HistoryTab(content, self.db),
-            "stats": StatsTab(content, self.db),
-        }
-
-        for tab in self._tabs.values():
-            tab.grid(row=0, column=0, sticky="nsew")
+        """Stack tab frames in the same grid cell; tkraise() switches between them.
+
+        Tabs are built on their first visit (see _show_tab), so startup only
+        pays for the accounting tab.
+        """
+        self._content = ctk.CTkFrame(parent, fg_color=C["bg"])
+        self._content.grid(row=0, column=1, sticky="nsew")
+        self._content.grid_rowconfigure(0, weight=1)
+        self._content.grid_columnconfigure(0, weight=1)
+        self._tabs: dict[str, ctk.CTkFrame] = {}
 
     def _show_tab(self, key: str) -> None:
-        self._tabs[key].tkraise()
+        tab = self._tabs.get(key)
+        built = tab is None
+        if built:
+            # The tab's constructor loads its data, so no refresh is needed below.
+            tab = self._tabs[key] = self._TAB_CLASSES[key](
+                self._content, self.db, **self._tab_options(key)
+            )
+            tab.grid(row=0, column=0, sticky="nsew")
+        tab.tkraise()
 
         for k, btn in self._nav_buttons.items():
             if k == key:
@@ -164,6 +315,16 @@ class App(ctk.CTk):
             else:
                 btn.configure(fg_color="transparent", text_color=C["subtext"])
 
-        # History and stats tabs are refreshed on every visit to avoid stale data.
-        if key in ("history", "stats"):
-            self._tabs[key].refresh()
+        # History, stats and diagnostics are refreshed on every visit to avoid
+        # stale data.
+        if key in ("history", "stats", "diagnostics") and not built:
+            tab.refresh()
+
+    def _tab_options(self, key: str) -> dict:
+        """Constructor arguments a tab needs besides the database."""
+        if key == "diagnostics":
+            return {
+                "instrumentation": self.instrumentation,
+                "card_grids": self._card_grids,
+            }
+        return {}
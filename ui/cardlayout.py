@@ -0,0 +1,624 @@
+"""Tk-free layout, ordering and drawing model for EntityCardGrid.
+
+CardGridModel owns everything about the card grid except the widget
+itself: the card records, their sort order, the grid geometry, hit-testing
+and the canvas items of every card. It draws through any object that
+provides the small part of the tk.Canvas API described by CanvasLike, so
+the same code runs against the real canvas in the app and against
+RecordingCanvas in tests and benchmarks, where the canvas calls made per
+action can be counted without a display.
+"""
+
+from collections import Counter
+from typing import Any, Iterable, Protocol
+
+from config import C
+
+# Per-status visual theme for cards: background, border, text, and subdued text colors.
+CARD_STATUS_COLORS: dict[str, dict[str, str]] = {
+    "idle": {
+        "bg": "#1e2130",
+        "border": "#2a2d3e",
+        "text": C["text"],
+        "sub": C["subtext"],
+    },
+    "arrived": {
+        "bg": "#0d2318",
+        "border": "#3dd68c",
+        "text": C["arrived"],
+        "sub": "#2a9c65",
+    },
+    "departed": {
+        "bg": "#280f0f",
+        "border": "#f75f5f",
+        "text": C["departed"],
+        "sub": "#9c2a2a",
+    },
+}
+
+# A departed card past its allowance (alerts.py) is drawn with these instead.
+CARD_OVERDUE_COLORS: dict[str, str] = {
+    "bg": "#2b2208",
+    "border": C["yellow"],
+    "text": C["yellow"],
+    "sub": "#a88a2a",
+}
+
+# Status label text differs slightly between vehicles and commanders (grammatical gender).
+STATUS_LABEL: dict[str, dict[str, str]] = {
+    "vehicle": {
+        "idle": "В ожидании",
+        "arrived": "Прибыло в",
+        "departed": "Убыло в",
+    },
+    "commander": {
+        "idle": "В ожидании",
+        "arrived": "Прибыл(а) в",
+        "departed": "Убыл(а) в",
+    },
+}
+
+CARD_MIN_W = 170  # narrowest card; the column count follows the canvas width
+CARD_PAD = 10
+CARD_H = 82  # card height in pixels
+
+CARD_TEXT_PAD_X = 14  # horizontal inset from the left card edge
+CARD_NAME_Y = 20  # Y offset of the name label from the card top
+CARD_STATUS_Y_SINGLE = 54  # Y for the status line when there is only one line (idle)
+CARD_STATUS_Y_DOUBLE = 46  # Y for the status line when a timestamp follows below it
+CARD_TIME_Y = 62  # Y for the timestamp line
+
+_NAME_SHORT = 18  # names longer than this use the smaller name font
+
+# (eid, name, status, formatted timestamp, version) — what load() consumes.
+CardRow = tuple[int, str, str, str, int]
+
+
+class CanvasLike(Protocol):
+    """The subset of tk.Canvas that CardGridModel draws with."""
+
+    def create_rectangle(self, *args: Any, **kw: Any) -> int: ...
+
+    def create_text(self, *args: Any, **kw: Any) -> int: ...
+
+    def itemconfigure(self, item: Any, **kw: Any) -> Any: ...
+
+    def coords(self, item: Any, *args: Any) -> Any: ...
+
+    def delete(self, *items: Any) -> None: ...
+
+
+class GridGeometry:
+    """Card rectangles and hit-testing for a grid of fixed-height cards."""
+
+    def __init__(
+        self, min_w: int = CARD_MIN_W, pad: int = CARD_PAD, card_h: int = CARD_H
+    ):
+        self.min_w = min_w
+        self.pad = pad
+        self.card_h = card_h
+        self.width = 0
+        self.cols = 1
+
+    def set_width(self, width: int) -> None:
+        """Fit as many columns of at least min_w pixels as the width allows."""
+        self.width = width
+        self.cols = max(1, (width - self.pad) // (self.min_w + self.pad))
+
+    def cell_w(self) -> int:
+        w = max(self.width, self.cols * 30)
+        return (w - self.pad * (self.cols + 1)) // self.cols
+
+    def capacity(self, width: int, height: int) -> int:
+        """How many cards it takes to fill a width × height viewport."""
+        cols = max(1, (width - self.pad) // (self.min_w + self.pad))
+        return cols * (height // (self.card_h + self.pad) + 1)
+
+    def card_rect(self, idx: int) -> tuple[int, int, int, int]:
+        """Return absolute canvas coords (x1, y1, x2, y2) for card at sorted index."""
+        cw = self.cell_w()
+        col = idx % self.cols
+        row = idx // self.cols
+        x1 = self.pad + col * (cw + self.pad)
+        y1 = self.pad + row * (self.card_h + self.pad)
+        return x1, y1, x1 + cw, y1 + self.card_h
+
+    def total_height(self, n: int) -> int:
+        if n == 0:
+            return 0
+        rows = (n + self.cols - 1) // self.cols
+        return self.pad + rows * (self.card_h + self.pad)
+
+    def index_at(self, cx: int, cy: int, n: int) -> int:
+        """Return the sorted index of the card under a canvas point, or -1."""
+        cw = self.cell_w()
+        if cw <= 0:
+            return -1
+        col = (cx - self.pad) // (cw + self.pad)
+        if col < 0 or col >= self.cols:
+            return -1
+        row = (cy - self.pad) // (self.card_h + self.pad)
+        idx = row * self.cols + col
+        if idx < 0 or idx >= n:
+            return -1
+        x1, y1, x2, y2 = self.card_rect(idx)
+        if x1 <= cx <= x2 and y1 <= cy <= y2:
+            return idx
+        return -1
+
+
+class Card:
+    """One card: the entity's display state and the ids of its canvas items.
+
+    A grid can hold tens of thousands of cards, so this is a __slots__
+    record rather than a dict.
+    """
+
+    __slots__ = (
+        "name",
+        "status",
+        "ts",
+        "version",
+        "idx",
+        "tag_border",
+        "tag_bg",
+        "tag_name",
+        "tag_sub1",
+        "tag_sub2",
+    )
+
+    def __init__(self, name: str, status: str, ts: str, version: int):
+        self.name = name
+        self.status = status
+        self.ts = ts
+        self.version = version
+        self.idx = -1  # position in CardGridModel.order
+        self.tag_border: int | None = None
+        self.tag_bg: int | None = None
+        self.tag_name: int | None = None
+        self.tag_sub1: int | None = None
+        self.tag_sub2: int | None = None  # no timestamp line while idle
+
+    def canvas_items(self) -> list[int]:
+        items = [self.tag_border, self.tag_bg, self.tag_name, self.tag_sub1]
+        if self.tag_sub2 is not None:
+            items.append(self.tag_sub2)
+        return items
+
+
+class CardGridModel:
+    """Cards, sort order and canvas items of one card grid.
+
+    load() draws every card in O(N) canvas calls, or only the first ones:
+    cards [0, drawn) of the order have canvas items and draw_more() adds
+    the rest in chunks. Cards not drawn yet keep their state but cannot be
+    hit, hovered or repainted. update() and hover() touch only the
+    affected card with a constant number of calls. resize() and remove()
+    never recreate items: they move the existing ones with coords(), and
+    remove() only moves the cards after the removed one.
+
+    `overdue` holds the ids of departed cards past their allowance; it
+    outlives load() and reconcile(), and a status change drops the card
+    from it. set_overdue() repaints one card like update().
+    """
+
+    def __init__(
+        self,
+        canvas: CanvasLike,
+        entity_type: str,
+        fonts: tuple[Any, Any, Any] = (None, None, None),
+    ):
+        self.canvas = canvas
+        self.entity_type = entity_type
+        self.geometry = GridGeometry()
+        # (name, small name for long names, status/timestamp lines)
+        self._font_name, self._font_name_sm, self._font_sub = fonts
+
+        self.items: dict[int, Card] = {}  # eid → card
+        self.order: list[int] = []  # eids in display order
+        self.drawn: int = 0  # leading cards of order that have canvas items
+        self.hovered: int = -1
+        self.overdue: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def total_height(self) -> int:
+        return self.geometry.total_height(len(self.order))
+
+    def hit_test(self, cx: int, cy: int) -> int:
+        """Return the eid of the card under the given canvas point, or -1."""
+        idx = self.geometry.index_at(cx, cy, self.drawn)
+        return self.order[idx] if idx != -1 else -1
+
+    # ── Mutations ────────────────────────────────────────────────────────────
+
+    def load(self, cards: Iterable[CardRow], first: int | None = None) -> None:
+        """Replace every card with the given rows and draw them in name order.
+
+        cards may be a generator over a database cursor; it is consumed
+        once and never copied into an intermediate list. With `first`, only
+        that many cards are drawn now and draw_more() draws the rest.
+        """
+        items: dict[int, Card] = {}
+        for eid, name, status, ts, version in cards:
+            items[eid] = Card(name, status, ts, version)
+        self.items = items
+        self.order = sorted(items, key=lambda e: items[e].name.lower())
+        for idx, eid in enumerate(self.order):
+            items[eid].idx = idx
+        self.redraw(first)
+
+    def draw_more(self, count: int) -> bool:
+        """Draw up to count more cards; return True while some are still undrawn."""
+        end = min(self.drawn + count, len(self.order))
+        for idx in range(self.drawn, end):
+            self._draw_card(idx, self.order[idx])
+        self.drawn = end
+        return end < len(self.order)
+
+    def remove(self, eid: int) -> None:
+        """Drop one card and close the gap by moving the cards after it."""
+        card = self.items.pop(eid, None)
+        self.overdue.discard(eid)
+        if card is None:
+            return
+        idx = card.idx
+        del self.order[idx]
+        if idx < self.drawn:
+            self.canvas.delete(*card.canvas_items())
+            self.drawn -= 1
+        if self.hovered == eid:
+            self.hovered = -1
+        for i in range(idx, self.drawn):
+            self._place_card(i, self.order[i], resize_text=False)
+        for i in range(max(idx, self.drawn), len(self.order)):
+            self.items[self.order[i]].idx = i
+
+    def resize(self, width: int) -> bool:
+        """Lay the grid out for a new canvas width; return False if unchanged."""
+        geo = self.geometry
+        if width == geo.width:
+            return False
+        before = (geo.cols, geo.cell_w())
+        geo.set_width(width)
+        if self.drawn and (geo.cols, geo.cell_w()) != before:
+            for idx in range(self.drawn):
+                self._place_card(idx, self.order[idx], resize_text=True)
+        return True
+
+    def update(self, eid: int, status: str, ts: str, version: int) -> None:
+        """Store a card's new state and repaint only that card."""
+        card = self.items.get(eid)
+        if card is None:
+            return
+        if status != card.status:
+            self.overdue.discard(eid)
+        card.status = status
+        card.ts = ts
+        card.version = version
+        if card.idx < self.drawn:
+            self._repaint_card(card, eid)
+
+    def reconcile(self, cards: Iterable[CardRow]) -> int:
+        """Bring the grid in line with fresh rows, touching only what differs.
+
+        Used to correct a grid painted from a saved snapshot. New, deleted
+        and renamed cards change the order: from the first changed position
+        on, drawn cards are moved with coords(), new ones are drawn and the
+        ones pushed past the drawn part lose their items. A changed status
+        repaints one card, as update() does; a row with a lower version
+        than its card (read before a local click) is ignored. Returns how
+        many cards were added, removed or changed.
+        """
+        fresh: dict[int, CardRow] = {row[0]: row for row in cards}
+        items = self.items
+        gone = {
+            eid
+            for eid, card in items.items()
+            if eid not in fresh or fresh[eid][1] != card.name
+        }
+        new = [eid for eid in fresh if eid not in items or eid in gone]
+        if gone or new:
+            self._restructure(gone, [fresh[eid] for eid in new])
+
+        changed = 0
+        for eid, card in items.items():
+            _eid, _name, status, ts, version = fresh[eid]
+            if version < card.version:
+                continue
+            if (status, ts, version) != (card.status, card.ts, card.version):
+                self.update(eid, status, ts, version)
+                changed += 1
+        return len(gone | set(new)) + changed
+
+    def set_overdue(self, eid: int, on: bool) -> None:
+        """Flag or unflag a card as overdue and repaint it if drawn."""
+        if on == (eid in self.overdue):
+            return
+        if on:
+            self.overdue.add(eid)
+        else:
+            self.overdue.discard(eid)
+        card = self.items.get(eid)
+        if card is not None and card.idx < self.drawn:
+            self._repaint_card(card, eid)
+            if self.hovered == eid:
+                self._set_hover(eid, True)
+
+    def hover(self, eid: int) -> bool:
+        """Move the hover highlight to eid (-1 for none); return True if it moved."""
+        if eid == self.hovered:
+            return False
+        if self.hovered != -1:
+            self._set_hover(self.hovered, False)
+        self.hovered = eid
+        if eid != -1:
+            self._set_hover(eid, True)
+        return True
+
+    def redraw(self, first: int | None = None) -> None:
+        """Delete every canvas item and draw all cards, or the first ones, again."""
+        self.canvas.delete("all")
+        self.hovered = -1
+        self.drawn = 0
+        self.draw_more(len(self.order) if first is None else first)
+
+    def _restructure(self, gone: set[int], added: list[CardRow]) -> None:
+        """Remove and add cards, then re-lay the order from the first change."""
+        items = self.items
+        old_order = self.order
+        was_drawn = set(old_order[: self.drawn])
+        for eid in gone:
+            card = items.pop(eid)
+            if eid in was_drawn:
+                self.canvas.delete(*card.canvas_items())
+                was_drawn.discard(eid)
+            if self.hovered == eid:
+                self.hovered = -1
+        for eid, name, status, ts, version in added:
+            items[eid] = Card(name, status, ts, version)
+
+        order = sorted(items, key=lambda e: items[e].name.lower())
+        start = next(
+            (i for i, (a, b) in enumerate(zip(old_order, order)) if a != b),
+            min(len(old_order), len(order)),
+        )
+        # A fully drawn grid stays fully drawn; one still filling keeps its
+        # drawn count and draw_more() continues from there.
+        drawn = len(order) if self.drawn >= len(old_order) else self.drawn
+        drawn = min(drawn, len(order))
+        for idx in range(start, len(order)):
+            eid = order[idx]
+            card = items[eid]
+            if idx < drawn:
+                if eid not in was_drawn:
+                    self._draw_card(idx, eid)
+                elif card.idx != idx:
+                    self._place_card(idx, eid, resize_text=False)
+            else:
+                if eid in was_drawn:
+                    self.canvas.delete(*card.canvas_items())
+                    if self.hovered == eid:
+                        self.hovered = -1
+                card.idx = idx
+        self.order = order
+        self.drawn = drawn
+
+    # ── Drawing ──────────────────────────────────────────────────────────────
+
+    def _card_tag(self, eid: int) -> str:
+        return f"c{eid}"
+
+    def _colors(self, card: Card, eid: int) -> dict[str, str]:
+        if card.status == "departed" and eid in self.overdue:
+            return CARD_OVERDUE_COLORS
+        return CARD_STATUS_COLORS.get(card.status, CARD_STATUS_COLORS["idle"])
+
+    def _draw_card(self, idx: int, eid: int) -> None:
+        """Create all canvas items for a card."""
+        card = self.items[eid]
+        card.idx = idx
+        status = card.status
+        colors = self._colors(card, eid)
+        cw = self.geometry.cell_w()
+        x1, y1, x2, y2 = self.geometry.card_rect(idx)
+        tag = self._card_tag(eid)
+        cv = self.canvas
+
+        card.tag_border = cv.create_rectangle(
+            x1,
+            y1,
+            x2,
+            y2,
+            fill=colors["border"],
+            outline="",
+            tags=tag,
+        )
+        # Inner rect inset by 1 px so the border color is visible around the edge.
+        card.tag_bg = cv.create_rectangle(
+            x1 + 1,
+            y1 + 1,
+            x2 - 1,
+            y2 - 1,
+            fill=colors["bg"],
+            outline="",
+            tags=tag,
+        )
+        name_font = (
+            self._font_name if len(card.name) <= _NAME_SHORT else self._font_name_sm
+        )
+        card.tag_name = cv.create_text(
+            x1 + CARD_TEXT_PAD_X,
+            y1 + CARD_NAME_Y,
+            text=card.name,
+            fill=colors["text"],
+            font=name_font,
+            anchor="w",
+            width=cw - CARD_TEXT_PAD_X * 2,
+            tags=tag,
+        )
+        status_lbl = STATUS_LABEL[self.entity_type].get(status, "В ожидании")
+        if status != "idle":
+            card.tag_sub1 = cv.create_text(
+                x1 + CARD_TEXT_PAD_X,
+                y1 + CARD_STATUS_Y_DOUBLE,
+                text=status_lbl,
+                fill=colors["sub"],
+                font=self._font_sub,
+                anchor="w",
+                tags=tag,
+            )
+            card.tag_sub2 = cv.create_text(
+                x1 + CARD_TEXT_PAD_X,
+                y1 + CARD_TIME_Y,
+                text=card.ts,
+                fill=colors["sub"],
+                font=self._font_sub,
+                anchor="w",
+                tags=tag,
+            )
+        else:
+            card.tag_sub1 = cv.create_text(
+                x1 + CARD_TEXT_PAD_X,
+                y1 + CARD_STATUS_Y_SINGLE,
+                text=status_lbl,
+                fill=colors["sub"],
+                font=self._font_sub,
+                anchor="w",
+                tags=tag,
+            )
+            card.tag_sub2 = None
+
+    def _place_card(self, idx: int, eid: int, resize_text: bool) -> None:
+        """Move an existing card's items into the slot at idx."""
+        card = self.items[eid]
+        card.idx = idx
+        cv = self.canvas
+        x1, y1, x2, y2 = self.geometry.card_rect(idx)
+        tx = x1 + CARD_TEXT_PAD_X
+
+        cv.coords(card.tag_border, x1, y1, x2, y2)
+        cv.coords(card.tag_bg, x1 + 1, y1 + 1, x2 - 1, y2 - 1)
+        cv.coords(card.tag_name, tx, y1 + CARD_NAME_Y)
+        if resize_text:
+            cv.itemconfigure(card.tag_name, width=x2 - x1 - CARD_TEXT_PAD_X * 2)
+        if card.status != "idle":
+            cv.coords(card.tag_sub1, tx, y1 + CARD_STATUS_Y_DOUBLE)
+        else:
+            cv.coords(card.tag_sub1, tx, y1 + CARD_STATUS_Y_SINGLE)
+        if card.tag_sub2 is not None:
+            cv.coords(card.tag_sub2, tx, y1 + CARD_TIME_Y)
+
+    def _repaint_card(self, card: Card, eid: int) -> None:
+        """Update colors and text of an existing card without recreating its items."""
+        status = card.status
+        colors = self._colors(card, eid)
+        status_lbl = STATUS_LABEL[self.entity_type].get(status, "В ожидании")
+        cv = self.canvas
+
+        cv.itemconfigure(card.tag_border, fill=colors["border"])
+        cv.itemconfigure(card.tag_bg, fill=colors["bg"])
+        cv.itemconfigure(card.tag_name, fill=colors["text"])
+        x1, y1, _x2, _y2 = self.geometry.card_rect(card.idx)
+
+        if status != "idle":
+            cv.coords(card.tag_sub1, x1 + CARD_TEXT_PAD_X, y1 + CARD_STATUS_Y_DOUBLE)
+            cv.itemconfigure(card.tag_sub1, text=status_lbl, fill=colors["sub"])
+            if card.tag_sub2 is None:
+                # Card was previously idle and had no timestamp item — create it now.
+                card.tag_sub2 = cv.create_text(
+                    x1 + CARD_TEXT_PAD_X,
+                    y1 + CARD_TIME_Y,
+                    text=card.ts,
+                    fill=colors["sub"],
+                    font=self._font_sub,
+                    anchor="w",
+                    tags=self._card_tag(eid),
+                )
+            else:
+                cv.coords(card.tag_sub2, x1 + CARD_TEXT_PAD_X, y1 + CARD_TIME_Y)
+                cv.itemconfigure(
+                    card.tag_sub2,
+                    text=card.ts,
+                    fill=colors["sub"],
+                    state="normal",
+                )
+        else:
+            cv.coords(card.tag_sub1, x1 + CARD_TEXT_PAD_X, y1 + CARD_STATUS_Y_SINGLE)
+            cv.itemconfigure(card.tag_sub1, text=status_lbl, fill=colors["sub"])
+            if card.tag_sub2 is not None:
+                cv.itemconfigure(card.tag_sub2, state="hidden")
+
+    def _set_hover(self, eid: int, on: bool) -> None:
+        card = self.items.get(eid)
+        if card is None:
+            return
+        colors = self._colors(card, eid)
+        self.canvas.itemconfigure(
+            card.tag_border,
+            fill=colors["text"] if on else colors["border"],
+        )
+
+
+class RecordingCanvas:
+    """In-memory stand-in for tk.Canvas that counts every call.
+
+    Items are kept as id → {"kind", "coords", "options", "tags"} so tests
+    can check what would be on screen; `calls` counts calls per method.
+    """
+
+    def __init__(self):
+        self.items: dict[int, dict] = {}
+        self.calls: Counter = Counter()
+        self._next_id = 1
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+
+    def _create(self, kind: str, args: tuple, kw: dict) -> int:
+        self.calls[f"create_{kind}"] += 1
+        tags = kw.pop("tags", ())
+        item_id = self._next_id
+        self._next_id += 1
+        self.items[item_id] = {
+            "kind": kind,
+            "coords": list(args),
+            "options": kw,
+            "tags": (tags,) if isinstance(tags, str) else tuple(tags),
+        }
+        return item_id
+
+    def create_rectangle(self, *args: Any, **kw: Any) -> int:
+        return self._create("rectangle", args, kw)
+
+    def create_text(self, *args: Any, **kw: Any) -> int:
+        return self._create("text", args, kw)
+
+    def itemconfigure(self, item: int, **kw: Any) -> None:
+        self.calls["itemconfigure"] += 1
+        self.items[item]["options"].update(kw)
+
+    def coords(self, item: int, *args: Any) -> list:
+        self.calls["coords"] += 1
+        if args:
+            self.items[item]["coords"] = list(args)
+        return list(self.items[item]["coords"])
+
+    def delete(self, *items: Any) -> None:
+        self.calls["delete"] += 1
+        for target in items:
+            if target == "all":
+                self.items.clear()
+            elif isinstance(target, int):
+                self.items.pop(target, None)
+            else:
+                for item_id in [
+                    i for i, it in self.items.items() if target in it["tags"]
+                ]:
+                    del self.items[item_id]
@@ -1,22 +1,53 @@
-"""Reusable UI components: EntityCardGrid and EventTreeview."""
+"""Reusable UI components: EntityCardGrid, EventTreeview and ActivityChart."""
 
 import tkinter as tk
 import tkinter.font as tkfont
 import tkinter.ttk as ttk
-from datetime import datetime
+from functools import lru_cache
 from tkinter import messagebox
+from typing import Iterable
 
-from config import EVENT_COLORS, EVENT_LABELS, STATUS_ORDER, TYPE_LABELS, C
-from database import Database, DatabaseError, NotFoundError
+from config import (
+    EVENT_COLORS,
+    EVENT_LABELS,
+    GRID_FILL_CHUNK,
+    STATUS_ORDER,
+    TYPE_LABELS,
+    C,
+)
+from database import ConflictError, Database, DatabaseError, NotFoundError
+from ui.cardlayout import CardGridModel
 
 
+# Formatted timestamps kept per distinct stored value. Grid and table rebuilds
+# (every search keystroke) format the same values again.
+_TS_CACHE_SIZE = 16384
+
+
+@lru_cache(maxsize=_TS_CACHE_SIZE)
 def fmt_timestamp(raw: str) -> str:
-    """Parse a stored ISO timestamp and return 'HH:MM DD.MM.YYYY', or '—' on failure."""
-    try:
-        dt = datetime.strptime(raw[:16], "%Y-%m-%d %H:%M")
-        return dt.strftime("%H:%M %d.%m.%Y")
-    except (ValueError, TypeError):
-        return raw[:16] if raw else "—"
+    """Turn a stored 'YYYY-MM-DD HH:MM:SS' into 'HH:MM DD.MM.YYYY', or '—' if empty.
+
+    Stored timestamps always have this fixed layout, so the fields are
+    sliced out rather than parsed. Anything else is shown as its first
+    16 characters.
+    """
+    if not raw:
+        return "—"
+    if (
+        raw[4:5] == "-"
+        and raw[7:8] == "-"
+        and raw[10:11] == " "
+        and raw[13:14] == ":"
+        and (raw[:4] + raw[5:7] + raw[8:10] + raw[11:13] + raw[14:16]).isdigit()
+    ):
+        return f"{raw[11:16]} {raw[8:10]}.{raw[5:7]}.{raw[:4]}"
+    return raw[:16]
+
+
+def fmt_timestamps(raws: Iterable[str]) -> list[str]:
+    """Format a whole column of stored timestamps, e.g. one query result."""
+    return list(map(fmt_timestamp, raws))
 
 
 def apply_treeview_style(
@@ -111,13 +142,15 @@ class EventTreeview(tk.Frame):
     def populate(self, rows) -> None:
         """Replace all rows with the given dataset."""
         self._tree.delete(*self._tree.get_children())
-        for ev in rows:
+        rows = list(rows)
+        stamps = fmt_timestamps(ev["ts"] for ev in rows)
+        for ev, stamp in zip(rows, stamps):
             tag = ev["event_type"] if ev["event_type"] in EVENT_COLORS else "default"
             self._tree.insert(
                 "",
                 "end",
                 values=(
-                    fmt_timestamp(ev["ts"]),
+                    stamp,
                     TYPE_LABELS.get(ev["entity_type"], ev["entity_type"]),
                     ev["entity_name"],
                     EVENT_LABELS.get(ev["event_type"], ev["event_type"]),
@@ -126,59 +159,87 @@ class EventTreeview(tk.Frame):
             )
 
 
-# Per-status visual theme for cards: background, border, text, and subdued text colors.
-_CARD_STATUS_COLORS: dict[str, dict[str, str]] = {
-    "idle": {
-        "bg": "#1e2130",
-        "border": "#2a2d3e",
-        "text": C["text"],
-        "sub": C["subtext"],
-    },
-    "arrived": {
-        "bg": "#0d2318",
-        "border": "#3dd68c",
-        "text": C["arrived"],
-        "sub": "#2a9c65",
-    },
-    "departed": {
-        "bg": "#280f0f",
-        "border": "#f75f5f",
-        "text": C["departed"],
-        "sub": "#9c2a2a",
-    },
-}
-
-# Status label text differs slightly between vehicles and commanders (grammatical gender).
-_STATUS_LABEL: dict[str, dict[str, str]] = {
-    "vehicle": {
-        "idle": "В ожидании",
-        "arrived": "Прибыло в",
-        "departed": "Убыло в",
-    },
-    "commander": {
-        "idle": "В ожидании",
-        "arrived": "Прибыл(а) в",
-        "departed": "Убыл(а) в",
-    },
-}
-
-_CARD_COLS = 3
-_CARD_PAD = 10
-_CARD_H = 82  # card height in pixels
-
-_CARD_TEXT_PAD_X = 14  # horizontal inset from the left card edge
-_CARD_NAME_Y = 20  # Y offset of the name label from the card top
-_CARD_STATUS_Y_SINGLE = 54  # Y for the status line when there is only one line (idle)
-_CARD_STATUS_Y_DOUBLE = 46  # Y for the status line when a timestamp follows below it
-_CARD_TIME_Y = 62  # Y for the timestamp line
+class ActivityChart(tk.Canvas):
+    """Bar chart of arrivals and departures per bucket of activity_series().
+
+    Drawn with plain canvas rectangles and redrawn on resize.
+    """
+
+    _SERIES = ("arrived", "departed")
+    _PAD_LEFT = 40
+    _PAD_RIGHT = 12
+    _PAD_TOP = 28
+    _PAD_BOTTOM = 24
+
+    def __init__(self, master, height: int = 220, **kwargs):
+        super().__init__(
+            master, bg=C["surface"], height=height, bd=0, highlightthickness=0, **kwargs
+        )
+        self._series: list[dict] = []
+        self._labels: list[str] = []
+        self.bind("<Configure>", lambda _e: self._draw())
+
+    def plot(self, series: list[dict], label_fmt: str = "%d.%m") -> None:
+        """Show `series`; each bucket is labelled with its start in label_fmt."""
+        self._series = series
+        self._labels = [item["start"].strftime(label_fmt) for item in series]
+        self._draw()
+
+    def _draw(self) -> None:
+        self.delete("all")
+        width, height = self.winfo_width(), self.winfo_height()
+        left, top = self._PAD_LEFT, self._PAD_TOP
+        right, bottom = width - self._PAD_RIGHT, height - self._PAD_BOTTOM
+        if not self._series or right <= left or bottom <= top:
+            return
+
+        x = left
+        for key in self._SERIES:
+            self.create_rectangle(x, 8, x + 10, 18, fill=EVENT_COLORS[key], width=0)
+            self.create_text(
+                x + 16, 13, text=EVENT_LABELS[key], anchor="w", fill=C["subtext"]
+            )
+            x += 100
+
+        peak = max(max(item[k] for k in self._SERIES) for item in self._series)
+        scale = (bottom - top) / max(peak, 1)
+        self.create_line(left, bottom, right, bottom, fill=C["border"])
+        self.create_text(left - 6, top, text=str(peak), anchor="e", fill=C["subtext"])
+        self.create_text(left - 6, bottom, text="0", anchor="e", fill=C["subtext"])
+
+        slot = (right - left) / len(self._series)
+        bar = max(1.0, slot * 0.8 / len(self._SERIES))
+        # Label every n-th bucket so the labels do not overlap.
+        label_every = max(1, int(48 // slot) + 1)
+        for i, item in enumerate(self._series):
+            x0 = left + i * slot + slot * 0.1
+            for j, key in enumerate(self._SERIES):
+                if item[key]:
+                    self.create_rectangle(
+                        x0 + j * bar,
+                        bottom - item[key] * scale,
+                        x0 + (j + 1) * bar,
+                        bottom,
+                        fill=EVENT_COLORS[key],
+                        width=0,
+                    )
+            if i % label_every == 0:
+                self.create_text(
+                    left + (i + 0.5) * slot,
+                    bottom + 4,
+                    text=self._labels[i],
+                    anchor="n",
+                    fill=C["subtext"],
+                )
 
 
 class EntityCardGrid(tk.Frame):
     """Interactive card grid backed by a scrolling tk.Canvas.
 
     Cards are drawn as Canvas rectangles and text items for performance.
-    populate() rebuilds the whole grid in O(N); hover and click update
-    only the affected card via O(1) itemconfigure calls.
+    Layout, ordering, hit-testing and drawing live in the Tk-free
+    CardGridModel (ui/cardlayout.py); this widget wires the model to the
+    canvas, mouse events and the database.
     """
 
     _font_name: tkfont.Font | None = None
@@ -191,26 +252,37 @@ class EntityCardGrid(tk.Frame):
         db: Database,
         entity_type: str,
         on_changed=None,
+        on_status=None,
         **kwargs,
     ):
+        """on_status(eid, name, status, ts) is called after every status
+        change made or seen here, with the raw ts; status is 'deleted'
+        for a deleted entity."""
         super().__init__(master, bg=C["bg"], **kwargs)
         self.db = db
         self.entity_type = entity_type
         self._on_changed = on_changed or (lambda: None)
-
-        self._items: dict[int, dict] = {}  # eid → card data + canvas item ids
-        self._order: list[int] = []  # sorted list of eids
-        self._idx_to_eid: list[int] = []  # position → eid
-        self._eid_to_idx: dict[int, int] = {}  # eid → position
-
-        self._canvas_w: int = 0
-        self._hovered_eid: int = -1
+        self._on_status = on_status or (lambda *_args: None)
         self._context_menu: tk.Menu | None = None
+        # Latest <Configure> width / <Motion> position not yet handled; see
+        # _on_configure and _on_motion.
+        self._pending_width: int | None = None
+        self._pending_motion: tuple[int, int] | None = None
+        self._fill_job: str | None = None  # after() id while cards are still drawn
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self._init_fonts()
         self._build()
+        self._model = CardGridModel(
+            self._canvas,
+            entity_type,
+            fonts=(
+                EntityCardGrid._font_name,
+                EntityCardGrid._font_name_sm,
+                EntityCardGrid._font_sub,
+            ),
+        )
 
     def _init_fonts(self) -> None:
         """Initialise shared class-level Font objects on first instantiation."""
@@ -250,262 +322,111 @@ class EntityCardGrid(tk.Frame):
         self._canvas.unbind_all("<MouseWheel>")
         self._on_leave(event)
 
-    def _cell_w(self) -> int:
-        w = max(self._canvas_w, _CARD_COLS * 30)
-        return (w - _CARD_PAD * (_CARD_COLS + 1)) // _CARD_COLS
-
-    def _card_rect(self, idx: int) -> tuple[int, int, int, int]:
-        """Return absolute canvas coords (x1, y1, x2, y2) for card at sorted index."""
-        cw = self._cell_w()
-        col = idx % _CARD_COLS
-        row = idx // _CARD_COLS
-        x1 = _CARD_PAD + col * (cw + _CARD_PAD)
-        y1 = _CARD_PAD + row * (_CARD_H + _CARD_PAD)
-        return x1, y1, x1 + cw, y1 + _CARD_H
-
-    def _total_height(self) -> int:
-        n = len(self._order)
-        if n == 0:
-            return 0
-        rows = (n + _CARD_COLS - 1) // _CARD_COLS
-        return _CARD_PAD + rows * (_CARD_H + _CARD_PAD)
-
     def _update_scroll_region(self) -> None:
-        content_h = self._total_height()
+        content_h = self._model.total_height()
         canvas_h = self._canvas.winfo_height()
         region_h = max(content_h, canvas_h if canvas_h > 1 else 0)
         self._canvas.configure(
-            scrollregion=(0, 0, max(self._canvas_w, 1), max(region_h, 1))
+            scrollregion=(0, 0, max(self._model.geometry.width, 1), max(region_h, 1))
         )
 
     def _canvas_coords(self, event) -> tuple[int, int]:
         """Convert widget-relative mouse coords to absolute canvas coords."""
         return int(self._canvas.canvasx(event.x)), int(self._canvas.canvasy(event.y))
 
-    def _hit_test(self, cx: int, cy: int) -> int:
-        """Return the eid of the card under the given canvas point, or -1."""
-        cw = self._cell_w()
-        if cw <= 0:
-            return -1
-        col = (cx - _CARD_PAD) // (cw + _CARD_PAD)
-        if col < 0 or col >= _CARD_COLS:
-            return -1
-        row = (cy - _CARD_PAD) // (_CARD_H + _CARD_PAD)
-        idx = row * _CARD_COLS + col
-        if idx < 0 or idx >= len(self._idx_to_eid):
-            return -1
-        x1, y1, x2, y2 = self._card_rect(idx)
-        if x1 <= cx <= x2 and y1 <= cy <= y2:
-            return self._idx_to_eid[idx]
-        return -1
-
-    def _card_tag(self, eid: int) -> str:
-        return f"c{eid}"
-
-    def _draw_card(self, idx: int, eid: int) -> None:
-        """Create all canvas items for a card. Called once per card in populate()."""
-        item = self._items[eid]
-        status = item["status"]
-        colors = _CARD_STATUS_COLORS.get(status, _CARD_STATUS_COLORS["idle"])
-        cw = self._cell_w()
-        x1, y1, x2, y2 = self._card_rect(idx)
-        tag = self._card_tag(eid)
-        cv = self._canvas
-
-        item["tag_border"] = cv.create_rectangle(
-            x1,
-            y1,
-            x2,
-            y2,
-            fill=colors["border"],
-            outline="",
-            tags=tag,
-        )
-        # Inner rect inset by 1 px so the border color is visible around the edge.
-        item["tag_bg"] = cv.create_rectangle(
-            x1 + 1,
-            y1 + 1,
-            x2 - 1,
-            y2 - 1,
-            fill=colors["bg"],
-            outline="",
-            tags=tag,
-        )
-        name_font = (
-            EntityCardGrid._font_name
-            if len(item["name"]) <= 18
-            else EntityCardGrid._font_name_sm
-        )
-        item["tag_name"] = cv.create_text(
-            x1 + _CARD_TEXT_PAD_X,
-            y1 + _CARD_NAME_Y,
-            text=item["name"],
-            fill=colors["text"],
-            font=name_font,
-            anchor="w",
-            width=cw - _CARD_TEXT_PAD_X * 2,
-            tags=tag,
+    def populate(self, rows) -> None:
+        """Rebuild the entire grid from Database.iter_entities() rows.
+
+        Rows are (id, name, status, last change ts, version) tuples and are
+        consumed one at a time, straight from the cursor. Only one screenful
+        of cards is drawn right away; the rest follow GRID_FILL_CHUNK at a
+        time on later event-loop turns.
+        """
+        self.paint(
+            (eid, name, status, fmt_timestamp(ts), version)
+            for eid, name, status, ts, version in rows
         )
-        status_lbl = _STATUS_LABEL[self.entity_type].get(status, "В ожидании")
-        if status != "idle":
-            item["tag_sub1"] = cv.create_text(
-                x1 + _CARD_TEXT_PAD_X,
-                y1 + _CARD_STATUS_Y_DOUBLE,
-                text=status_lbl,
-                fill=colors["sub"],
-                font=EntityCardGrid._font_sub,
-                anchor="w",
-                tags=tag,
-            )
-            item["tag_sub2"] = cv.create_text(
-                x1 + _CARD_TEXT_PAD_X,
-                y1 + _CARD_TIME_Y,
-                text=item["ts"],
-                fill=colors["sub"],
-                font=EntityCardGrid._font_sub,
-                anchor="w",
-                tags=tag,
-            )
-        else:
-            item["tag_sub1"] = cv.create_text(
-                x1 + _CARD_TEXT_PAD_X,
-                y1 + _CARD_STATUS_Y_SINGLE,
-                text=status_lbl,
-                fill=colors["sub"],
-                font=EntityCardGrid._font_sub,
-                anchor="w",
-                tags=tag,
-            )
-            item["tag_sub2"] = None
-
-    def _repaint_card(self, eid: int) -> None:
-        """Update colors and text of an existing card without recreating its items."""
-        item = self._items.get(eid)
-        if not item:
-            return
-        status = item["status"]
-        colors = _CARD_STATUS_COLORS.get(status, _CARD_STATUS_COLORS["idle"])
-        status_lbl = _STATUS_LABEL[self.entity_type].get(status, "В ожидании")
-        cv = self._canvas
-
-        cv.itemconfigure(item["tag_border"], fill=colors["border"])
-        cv.itemconfigure(item["tag_bg"], fill=colors["bg"])
-        cv.itemconfigure(item["tag_name"], fill=colors["text"])
 
-        idx = self._eid_to_idx.get(eid, -1)
-        if idx == -1:
-            return
-        x1, y1, _x2, _y2 = self._card_rect(idx)
+    def paint(self, cards) -> None:
+        """Rebuild the grid from rows whose timestamps are already formatted.
+
+        populate() uses this for database rows; the accounting tab uses it
+        directly for the rows of the startup snapshot.
+        """
+        if self._fill_job is not None:
+            self._canvas.after_cancel(self._fill_job)
+            self._fill_job = None
+        self._model.load(cards, first=self._screenful())
+        if self._model.drawn < len(self._model):
+            self._fill_job = self._canvas.after(1, self._fill_step)
+        self._canvas.after_idle(self._update_scroll_region)
 
-        if status != "idle":
-            cv.coords(
-                item["tag_sub1"], x1 + _CARD_TEXT_PAD_X, y1 + _CARD_STATUS_Y_DOUBLE
-            )
-            cv.itemconfigure(item["tag_sub1"], text=status_lbl, fill=colors["sub"])
-            if item["tag_sub2"] is None:
-                # Card was previously idle and had no timestamp item — create it now.
-                item["tag_sub2"] = cv.create_text(
-                    x1 + _CARD_TEXT_PAD_X,
-                    y1 + _CARD_TIME_Y,
-                    text=item["ts"],
-                    fill=colors["sub"],
-                    font=EntityCardGrid._font_sub,
-                    anchor="w",
-                    tags=self._card_tag(eid),
-                )
-            else:
-                cv.coords(item["tag_sub2"], x1 + _CARD_TEXT_PAD_X, y1 + _CARD_TIME_Y)
-                cv.itemconfigure(
-                    item["tag_sub2"],
-                    text=item["ts"],
-                    fill=colors["sub"],
-                    state="normal",
-                )
-        else:
-            cv.coords(
-                item["tag_sub1"], x1 + _CARD_TEXT_PAD_X, y1 + _CARD_STATUS_Y_SINGLE
-            )
-            cv.itemconfigure(item["tag_sub1"], text=status_lbl, fill=colors["sub"])
-            if item["tag_sub2"] is not None:
-                cv.itemconfigure(item["tag_sub2"], state="hidden")
+    def reconcile(self, rows) -> int:
+        """Apply fresh Database rows to the painted grid; return the cards changed.
 
-    def _set_hover(self, eid: int, on: bool) -> None:
-        item = self._items.get(eid)
-        if not item:
-            return
-        colors = _CARD_STATUS_COLORS.get(item["status"], _CARD_STATUS_COLORS["idle"])
-        self._canvas.itemconfigure(
-            item["tag_border"],
-            fill=colors["text"] if on else colors["border"],
+        Only the differences are drawn (see CardGridModel.reconcile). If the
+        grid was fully drawn it stays so; a fill in progress carries on.
+        """
+        changes = self._model.reconcile(
+            (eid, name, status, fmt_timestamp(ts), version)
+            for eid, name, status, ts, version in rows
         )
+        if changes:
+            self._canvas.after_idle(self._update_scroll_region)
+        return changes
+
+    def cards(self) -> list[tuple[int, str, str, str, int]]:
+        """The grid's rows in display order, with formatted timestamps."""
+        rows = []
+        for eid in self._model.order:
+            card = self._model.items[eid]
+            rows.append((eid, card.name, card.status, card.ts, card.version))
+        return rows
+
+    def _screenful(self) -> int:
+        w, h = self._canvas.winfo_width(), self._canvas.winfo_height()
+        if w <= 1 or h <= 1:
+            # Not mapped yet (first populate at startup): assume the whole screen.
+            w, h = self.winfo_screenwidth(), self.winfo_screenheight()
+        return self._model.geometry.capacity(w, h)
+
+    def _fill_step(self) -> None:
+        if self._model.draw_more(GRID_FILL_CHUNK):
+            self._fill_job = self._canvas.after(1, self._fill_step)
+        else:
+            self._fill_job = None
 
-    def _sync_order_index(self) -> None:
-        """Rebuild the position ↔ eid lookup tables from _order."""
-        self._idx_to_eid = list(self._order)
-        self._eid_to_idx = {eid: idx for idx, eid in enumerate(self._order)}
+    def filling(self) -> bool:
+        """True while cards of the last populate() are still being drawn."""
+        return self._fill_job is not None
 
-    def populate(self, rows) -> None:
-        """Rebuild the entire grid from a fresh row set."""
-        self._canvas.delete("all")
-        self._items.clear()
-        self._order.clear()
-        self._idx_to_eid.clear()
-        self._eid_to_idx.clear()
-        self._hovered_eid = -1
-
-        rows_list = sorted(
-            (dict(r) for r in rows),
-            key=lambda r: (r.get("number") or r.get("name") or "").lower(),
-        )
+    def row_count(self) -> int:
+        return len(self._model)
 
-        for row in rows_list:
-            eid = row["id"]
-            self._items[eid] = {
-                "name": row.get("number") or row.get("name", ""),
-                "status": row.get("status", "idle"),
-                "ts": fmt_timestamp(row.get("updated") or row.get("created", "")),
-                "tag_border": None,
-                "tag_bg": None,
-                "tag_name": None,
-                "tag_sub1": None,
-                "tag_sub2": None,
-            }
-            self._order.append(eid)
-
-        self._sync_order_index()
-        for idx, eid in enumerate(self._order):
-            self._draw_card(idx, eid)
-        self._canvas.after_idle(self._update_scroll_region)
+    def set_overdue(self, eid: int, on: bool) -> None:
+        """Highlight a departed card as overdue, or stop highlighting it."""
+        self._model.set_overdue(eid, on)
 
-    def row_count(self) -> int:
-        return len(self._items)
-
-    def _rebuild_after_delete(self) -> None:
-        """Redraw all cards from in-memory data without re-querying the database."""
-        self._canvas.delete("all")
-        self._order = sorted(
-            self._items.keys(),
-            key=lambda e: self._items[e]["name"].lower(),
-        )
-        self._sync_order_index()
-        self._hovered_eid = -1
-        for idx, eid in enumerate(self._order):
-            self._draw_card(idx, eid)
-        self._canvas.after_idle(self._update_scroll_region)
+    def canvas_stats(self) -> dict[str, int]:
+        """Cards loaded, cards drawn and items on the canvas, for diagnostics."""
+        return {
+            "cards": len(self._model),
+            "drawn": self._model.drawn,
+            "items": len(self._canvas.find_all()),
+        }
 
     def _on_configure(self, event) -> None:
-        new_w = event.width
-        if new_w == self._canvas_w:
-            return
-        self._canvas_w = new_w
-        if not self._order:
-            self._update_scroll_region()
-            return
-        # Card width depends on canvas width, so a resize forces a full redraw.
+        # Dragging the window edge fires <Configure> for every pixel; lay the
+        # grid out once per idle pass, for the latest width only.
+        if self._pending_width is None:
+            self._canvas.after_idle(self._apply_resize)
+        self._pending_width = event.width
+
+    def _apply_resize(self) -> None:
+        width, self._pending_width = self._pending_width, None
         yview = self._canvas.yview()
-        self._canvas.delete("all")
-        for idx, eid in enumerate(self._order):
-            self._draw_card(idx, eid)
+        if not self._model.resize(width):
+            return
         self._update_scroll_region()
         self._canvas.yview_moveto(yview[0])
 
@@ -515,40 +436,43 @@ class EntityCardGrid(tk.Frame):
         self._canvas.yview_scroll(units, "units")
 
     def _on_motion(self, event) -> None:
-        cx, cy = self._canvas_coords(event)
-        eid = self._hit_test(cx, cy)
-        if eid == self._hovered_eid:
-            return
-        if self._hovered_eid != -1:
-            self._set_hover(self._hovered_eid, False)
-        self._hovered_eid = eid
-        if eid != -1:
-            self._set_hover(eid, True)
-        self._canvas.configure(cursor="hand2" if eid != -1 else "")
+        # Same for motion: only the last position before the idle pass matters.
+        if self._pending_motion is None:
+            self._canvas.after_idle(self._apply_motion)
+        self._pending_motion = (event.x, event.y)
+
+    def _apply_motion(self) -> None:
+        if self._pending_motion is None:
+            return  # the pointer left the canvas before the idle pass
+        x, y = self._pending_motion
+        self._pending_motion = None
+        cx, cy = int(self._canvas.canvasx(x)), int(self._canvas.canvasy(y))
+        eid = self._model.hit_test(cx, cy)
+        if self._model.hover(eid):
+            self._canvas.configure(cursor="hand2" if eid != -1 else "")
 
     def _on_leave(self, _event) -> None:
-        if self._hovered_eid != -1:
-            self._set_hover(self._hovered_eid, False)
-            self._hovered_eid = -1
+        self._pending_motion = None
+        self._model.hover(-1)
         self._canvas.configure(cursor="")
 
     def _on_click(self, event) -> None:
         cx, cy = self._canvas_coords(event)
-        eid = self._hit_test(cx, cy)
+        eid = self._model.hit_test(cx, cy)
         if eid != -1:
             self._toggle_status(eid)
 
     def _on_right(self, event) -> None:
         cx, cy = self._canvas_coords(event)
-        eid = self._hit_test(cx, cy)
+        eid = self._model.hit_test(cx, cy)
         if eid != -1:
             self._show_context_menu(eid, event)
 
     def _toggle_status(self, eid: int) -> None:
-        item = self._items.get(eid)
-        if not item:
+        card = self._model.items.get(eid)
+        if card is None:
             return
-        current = item["status"]
+        current = card.status
         if current in STATUS_ORDER:
             new_status = STATUS_ORDER[
                 (STATUS_ORDER.index(current) + 1) % len(STATUS_ORDER)
@@ -557,15 +481,42 @@ class EntityCardGrid(tk.Frame):
             # "idle" is not in the cycle — first click always goes to arrived.
             new_status = STATUS_ORDER[0]
         try:
-            self.db.update_status_and_log(
-                self.entity_type, eid, item["name"], new_status
+            change = self.db.update_status_and_log(
+                self.entity_type,
+                eid,
+                card.name,
+                new_status,
+                expected_version=card.version,
             )
+        except (ConflictError, NotFoundError):
+            # Another station changed or deleted this entity since the card
+            # was drawn. Show its real state instead of applying the click.
+            self._reload_card(eid)
+            return
         except DatabaseError as exc:
             messagebox.showerror("Ошибка", str(exc))
             return
-        item["status"] = new_status
-        item["ts"] = datetime.now().strftime("%H:%M %d.%m.%Y")
-        self._repaint_card(eid)
+        self._model.update(eid, new_status, fmt_timestamp(change.ts), change.version)
+        self._on_status(eid, card.name, new_status, change.ts)
+        self._on_changed()
+
+    def _reload_card(self, eid: int) -> None:
+        """Re-read one entity from the database and repaint only its card."""
+        try:
+            row = self.db.get_entity(self.entity_type, eid)
+        except DatabaseError as exc:
+            messagebox.showerror("Ошибка", str(exc))
+            return
+        if row is None:
+            card = self._model.items.get(eid)
+            self._model.remove(eid)
+            self._canvas.after_idle(self._update_scroll_region)
+            if card is not None:
+                self._on_status(eid, card.name, "deleted", None)
+        else:
+            ts = row["updated"] or row["created"]
+            self._model.update(eid, row["status"], fmt_timestamp(ts), row["version"])
+            self._on_status(eid, row[1], row["status"], ts)
         self._on_changed()
 
     def _show_context_menu(self, eid: int, event) -> None:
@@ -593,16 +544,17 @@ class EntityCardGrid(tk.Frame):
             menu.grab_release()
 
     def _delete_card(self, eid: int) -> None:
-        item = self._items.get(eid)
-        if not item:
+        card = self._model.items.get(eid)
+        if card is None:
             return
-        if not messagebox.askyesno("Удаление", f"Удалить «{item['name']}»?"):
+        if not messagebox.askyesno("Удаление", f"Удалить «{card.name}»?"):
             return
         try:
             self.db.delete_entity(self.entity_type, eid)
         except (DatabaseError, NotFoundError) as exc:
             messagebox.showerror("Ошибка", str(exc))
             return
-        del self._items[eid]
-        self._rebuild_after_delete()
+        self._model.remove(eid)
+        self._canvas.after_idle(self._update_scroll_region)
+        self._on_status(eid, card.name, "deleted", None)
         self._on_changed()
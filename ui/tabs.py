@@ -1,19 +1,47 @@
-"""Application tabs: AccountingTab, HistoryTab, StatsTab."""
+"""Application tabs: AccountingTab, HistoryTab, StatsTab, DiagnosticsTab."""
 
+import threading
+import time
+import tkinter.ttk as ttk
+from datetime import date, datetime, timedelta
 from tkinter import messagebox
+from typing import Callable
 
 import customtkinter as ctk
 
-from config import C
+import reports
+import snapshot
+from alerts import OverdueScheduler
+from config import TYPE_LABELS, C
 from database import Database, DatabaseError, DuplicateError
-from ui.components import EntityCardGrid, EventTreeview
+from instrumentation import CallRecord, Instrumentation
+from ui.components import (
+    ActivityChart,
+    EntityCardGrid,
+    EventTreeview,
+    apply_treeview_style,
+    fmt_timestamp,
+)
 from ui.dialogs import InputDialog
 
 
+def _collect(rows, into: list):
+    """Yield rows unchanged, appending each to `into` on the way."""
+    for row in rows:
+        into.append(row)
+        yield row
+
+
 class _EntitySection(ctk.CTkFrame):
     """Toolbar + search field + card grid for a single entity type.
 
     Used as one half of AccountingTab (vehicles on the left, commanders on the right).
+    With `rows` the grid is painted from those (snapshot) rows instead of
+    the database, until AccountingTab reconciles it.
+
+    on_rows(entity_type, rows) receives every full set of database rows
+    the grid is loaded or reconciled with (not the rows of a search), and
+    on_status(entity_type, eid, name, status, ts) every status change.
     """
 
     def __init__(
@@ -24,18 +52,28 @@ class _EntitySection(ctk.CTkFrame):
         title: str,
         add_prompt: str,
         search_placeholder: str,
+        rows: list | None = None,
+        on_rows=None,
+        on_status=None,
         **kwargs,
     ):
         super().__init__(master, fg_color=C["bg"], **kwargs)
         self.db = db
         self.entity_type = entity_type
         self.add_prompt = add_prompt
+        self._syncing = False
+        self._on_rows = on_rows or (lambda *_args: None)
+        self._on_status = on_status or (lambda *_args: None)
 
         self.grid_rowconfigure(2, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
         self._build(title, search_placeholder)
-        self.refresh()
+        if rows is None:
+            self.refresh()
+        else:
+            self._grid.paint(rows)
+            self._update_counter()
 
     def _build(self, title: str, search_placeholder: str) -> None:
         self._build_toolbar(title, search_placeholder)
@@ -46,6 +84,7 @@ class _EntitySection(ctk.CTkFrame):
             self.db,
             self.entity_type,
             on_changed=self._on_grid_changed,
+            on_status=lambda *change: self._on_status(self.entity_type, *change),
         )
         self._grid.grid(row=2, column=0, sticky="nsew", padx=8, pady=(0, 8))
 
@@ -95,15 +134,56 @@ class _EntitySection(ctk.CTkFrame):
         self._counter_lbl.grid(row=1, column=0, sticky="w", padx=14, pady=(0, 4))
 
     def refresh(self) -> None:
-        rows = self.db.get_entities(self.entity_type, self._search_var.get().strip())
-        self._grid.populate(rows)
+        search = self._search_var.get().strip()
+        rows = self.db.iter_entities(self.entity_type, search)
+        if search:
+            self._grid.populate(rows)
+        else:
+            seen: list = []
+            self._grid.populate(_collect(rows, seen))
+            self._on_rows(self.entity_type, seen)
+        self._update_counter()
+
+    def filling(self) -> bool:
+        return self._grid.filling()
+
+    def card_grid(self) -> EntityCardGrid:
+        return self._grid
+
+    def reconcile(self, rows) -> int:
+        """Apply fresh database rows to a grid painted from the snapshot."""
+        if self._search_var.get().strip():
+            return 0  # the search has already replaced the grid with fresh rows
+        changes = self._grid.reconcile(rows)
+        self._on_rows(self.entity_type, rows)
+        self._update_counter()
+        return changes
+
+    def set_syncing(self, syncing: bool) -> None:
+        self._syncing = syncing
         self._update_counter()
 
+    def snapshot_rows(self) -> list[tuple[int, str, str, str, int]]:
+        """All rows of this section for the snapshot, whatever the search shows."""
+        if not self._search_var.get().strip():
+            return self._grid.cards()
+        return [
+            (eid, name, status, fmt_timestamp(ts), version)
+            for eid, name, status, ts, version in self.db.iter_entities(
+                self.entity_type
+            )
+        ]
+
     def _on_grid_changed(self) -> None:
         self._update_counter()
 
     def _update_counter(self) -> None:
-        self._counter_lbl.configure(text=f"Записей: {self._grid.row_count()}")
+        text = f"Записей: {self._grid.row_count()}"
+        if self._syncing:
+            text += "  ·  ⟳ синхронизация…"
+        self._counter_lbl.configure(
+            text=text, text_color=C["yellow"] if self._syncing else C["subtext"]
+        )
 
     def _on_add(self) -> None:
         dialog = InputDialog(self, title="Добавить", prompt=self.add_prompt)
@@ -120,20 +200,42 @@ class _EntitySection(ctk.CTkFrame):
 
 
 class AccountingTab(ctk.CTkFrame):
-    """Two-column accounting tab: vehicles on the left, commanders on the right."""
+    """Two-column accounting tab: vehicles on the left, commanders on the right.
+
+    If a snapshot from the last exit exists (see snapshot.py), the grids are
+    painted from it right away and reconciled with the database read on a
+    worker thread; the counters show a syncing note until that is done.
+
+    Entities departed for longer than OVERDUE_HOURS are highlighted and
+    listed below the grids. The OverdueScheduler learns every status
+    change from the grids, and one after() job wakes up at the earliest
+    deadline; nothing is rescanned on a clock.
+    """
+
+    # Longest sleep between deadline checks, in case the system clock jumps.
+    _OVERDUE_MAX_WAIT_S = 300
+    _ALERTS_LISTED = 6
 
     def __init__(self, master, db: Database, **kwargs):
         super().__init__(master, fg_color=C["bg"], **kwargs)
         self.db = db
+        self._sync_thread: threading.Thread | None = None
+        self._sync_result: dict | DatabaseError | None = None
+        self._sync_started = 0.0
+        self._overdue = OverdueScheduler()
+        self._overdue_job: str | None = None
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=0)
         self.grid_columnconfigure(2, weight=1)
 
-        self._build()
+        saved = snapshot.load()
+        self._build(saved)
+        if saved:
+            self._start_sync()
 
-    def _build(self) -> None:
+    def _build(self, saved: dict) -> None:
         self._section_vehicles = _EntitySection(
             self,
             db=self.db,
@@ -141,6 +243,9 @@ class AccountingTab(ctk.CTkFrame):
             title="ТС",
             add_prompt="Введите номер ТС:",
             search_placeholder="Поиск по номеру ТС...",
+            rows=saved.get("vehicle"),
+            on_rows=self._on_rows,
+            on_status=self._on_status,
         )
         self._section_vehicles.grid(row=0, column=0, sticky="nsew")
 
@@ -155,13 +260,150 @@ class AccountingTab(ctk.CTkFrame):
             title="Командование",
             add_prompt="Введите ФИО командира:",
             search_placeholder="Поиск по ФИО...",
+            rows=saved.get("commander"),
+            on_rows=self._on_rows,
+            on_status=self._on_status,
         )
         self._section_commanders.grid(row=0, column=2, sticky="nsew")
 
+        self._alerts_lbl = ctk.CTkLabel(
+            self,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=C["yellow"],
+            fg_color=C["surface"],
+            anchor="w",
+            justify="left",
+            corner_radius=8,
+        )
+        self._alerts_lbl.grid(
+            row=1, column=0, columnspan=3, sticky="ew", padx=8, pady=(0, 8)
+        )
+        self._alerts_lbl.grid_remove()
+
+    def _sections(self) -> tuple[_EntitySection, _EntitySection]:
+        return self._section_vehicles, self._section_commanders
+
     def refresh(self) -> None:
         self._section_vehicles.refresh()
         self._section_commanders.refresh()
 
+    def filling(self) -> bool:
+        """True while either card grid is still drawing after a refresh."""
+        return self._section_vehicles.filling() or self._section_commanders.filling()
+
+    def card_grids(self) -> dict[str, EntityCardGrid]:
+        return {s.entity_type: s.card_grid() for s in self._sections()}
+
+    def syncing(self) -> bool:
+        """True until the grids painted from the snapshot are reconciled."""
+        return self._sync_thread is not None
+
+    def save_snapshot(self) -> None:
+        """Save both grids for the first paint of the next start."""
+        try:
+            sections = {s.entity_type: s.snapshot_rows() for s in self._sections()}
+        except DatabaseError:
+            return  # keep the previous snapshot; it is reconciled at start anyway
+        snapshot.save(sections)
+
+    # ── Overdue alerts ───────────────────────────────────────────────────────
+
+    def _on_rows(self, entity_type: str, rows) -> None:
+        cleared = self._overdue.load(entity_type, rows)
+        # A section loads during its own construction, before card_grids()
+        # has both grids; flag the cards once the tab is built.
+        self.after_idle(lambda: self._apply_cleared(entity_type, cleared))
+
+    def _on_status(self, entity_type: str, eid: int, name, status, ts) -> None:
+        if self._overdue.track(entity_type, eid, name, status, ts):
+            self._apply_cleared(entity_type, {eid})
+        else:
+            self._check_overdue()
+
+    def _apply_cleared(self, entity_type: str, cleared: set[int]) -> None:
+        grid = self.card_grids()[entity_type]
+        for eid in cleared:
+            grid.set_overdue(eid, False)
+        if cleared:
+            self._show_alerts()
+        self._check_overdue()
+
+    def _check_overdue(self) -> None:
+        """Flag the cards whose deadline has passed; sleep until the next one."""
+        if self._overdue_job is not None:
+            self.after_cancel(self._overdue_job)
+            self._overdue_job = None
+        fired = self._overdue.due(datetime.now())
+        if fired:
+            grids = self.card_grids()
+            for alert in fired:
+                grids[alert.entity_type].set_overdue(alert.entity_id, True)
+            self._show_alerts()
+            self.bell()
+        deadline = self._overdue.next_deadline()
+        if deadline is not None:
+            wait = (deadline - datetime.now()).total_seconds()
+            wait = min(max(wait, 0), self._OVERDUE_MAX_WAIT_S)
+            self._overdue_job = self.after(int(wait * 1000) + 1, self._check_overdue)
+
+    def _show_alerts(self) -> None:
+        alerts = self._overdue.overdue()
+        if not alerts:
+            self._alerts_lbl.grid_remove()
+            return
+        listed = ",   ".join(
+            f"{TYPE_LABELS.get(a.entity_type, a.entity_type)} {a.entity_name} "
+            f"(убыл {a.departed:%H:%M %d.%m})"
+            for a in alerts[: self._ALERTS_LISTED]
+        )
+        more = len(alerts) - self._ALERTS_LISTED
+        if more > 0:
+            listed += f"   и ещё {more}"
+        self._alerts_lbl.configure(
+            text=f"  ⚠  Превышено время отсутствия ({len(alerts)}):   {listed}"
+        )
+        self._alerts_lbl.grid()
+
+    # ── Reconciliation ───────────────────────────────────────────────────────
+
+    def _start_sync(self) -> None:
+        """Read the database on a worker thread; _poll_sync() applies the rows."""
+        self._sync_started = time.monotonic()
+        self._sync_result = None
+        for section in self._sections():
+            section.set_syncing(True)
+        self._sync_thread = threading.Thread(
+            target=self._read_entities, name="ui-sync", daemon=True
+        )
+        self._sync_thread.start()
+        self.after(50, self._poll_sync)
+
+    def _read_entities(self) -> None:
+        try:
+            self._sync_result = self.db.read_entities()
+        except DatabaseError as e:
+            self._sync_result = e
+
+    def _poll_sync(self) -> None:
+        if self._sync_thread.is_alive():
+            self.after(50, self._poll_sync)
+            return
+        result = self._sync_result
+        if self.db.idle_seconds() < time.monotonic() - self._sync_started:
+            # This window wrote to the database while the rows were being
+            # read, so they may predate its own change: read them again.
+            self._start_sync()
+            return
+        self._sync_thread = None
+        if isinstance(result, DatabaseError):
+            self.refresh()
+        else:
+            for section in self._sections():
+                section.reconcile(result[section.entity_type])
+        for section in self._sections():
+            section.set_syncing(False)
+
 
 class HistoryTab(ctk.CTkFrame):
     """Event log tab with search and clear controls."""
@@ -175,6 +417,8 @@ class HistoryTab(ctk.CTkFrame):
         self.refresh()
 
     def _build(self) -> None:
+        self._report_thread: threading.Thread | None = None
+        self._report_result = None
         self._build_header()
         self._build_search()
 
@@ -210,6 +454,19 @@ class HistoryTab(ctk.CTkFrame):
             command=self.refresh,
         ).pack(side="left", padx=(0, 6))
 
+        self._report_btn = ctk.CTkButton(
+            btn_frame,
+            text="📄  Суточный расход",
+            font=ctk.CTkFont(size=12),
+            fg_color=C["surface"],
+            hover_color=C["border"],
+            text_color=C["text"],
+            corner_radius=8,
+            height=34,
+            command=self._on_duty_report,
+        )
+        self._report_btn.pack(side="left", padx=(0, 6))
+
         ctk.CTkButton(
             btn_frame,
             text="🗑  Очистить",
@@ -250,9 +507,50 @@ class HistoryTab(ctk.CTkFrame):
                 messagebox.showerror("Ошибка", str(e), parent=self)
             self.refresh()
 
+    def _on_duty_report(self) -> None:
+        """Write the report for the last duty day on a worker thread."""
+        self._report_btn.configure(state="disabled")
+        self._report_result = None
+        self._report_thread = threading.Thread(
+            target=self._write_duty_report, name="duty-report", daemon=True
+        )
+        self._report_thread.start()
+        self.after(100, self._poll_duty_report)
+
+    def _write_duty_report(self) -> None:
+        # Anything raised here would otherwise be lost with the thread.
+        try:
+            start, end = reports.last_duty_period()
+            self._report_result = reports.write_duty_report(
+                start, end, path=self.db.path
+            )
+        except Exception as e:
+            self._report_result = e
+
+    def _poll_duty_report(self) -> None:
+        if self._report_thread.is_alive():
+            self.after(100, self._poll_duty_report)
+            return
+        self._report_thread = None
+        self._report_btn.configure(state="normal")
+        result = self._report_result
+        if isinstance(result, Exception):
+            messagebox.showerror(
+                "Суточный расход",
+                f"Не удалось сформировать отчёт:\n{result}",
+                parent=self,
+            )
+        else:
+            messagebox.showinfo(
+                "Суточный расход",
+                f"Событий: {result.events}, отсутствуют: {len(result.absent)}.\n"
+                f"Отчёт сохранён:\n{result.paths[-1]}",
+                parent=self,
+            )
+
 
 class StatsTab(ctk.CTkFrame):
-    """Aggregate statistics tab with a recent-activity feed."""
+    """Aggregate statistics tab with an activity chart and a recent-activity feed."""
 
     _STAT_CARDS = [
         ("ТС", "vehicles", "accent"),
@@ -262,10 +560,17 @@ class StatsTab(ctk.CTkFrame):
         ("Всего событий", "total_events", "yellow"),
     ]
 
+    # Chart period label → (bucket, buckets shown, bucket label format).
+    _PERIODS = {
+        "По дням": ("day", 14, "%d.%m"),
+        "По неделям": ("week", 12, "%d.%m"),
+        "По месяцам": ("month", 12, "%m.%Y"),
+    }
+
     def __init__(self, master, db: Database, **kwargs):
         super().__init__(master, fg_color=C["bg"], **kwargs)
         self.db = db
-        self.grid_rowconfigure(2, weight=1)
+        self.grid_rowconfigure(3, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self._build()
         self.refresh()
@@ -276,8 +581,10 @@ class StatsTab(ctk.CTkFrame):
         self._stats_row = ctk.CTkFrame(self, fg_color="transparent")
         self._stats_row.grid(row=1, column=0, sticky="ew", padx=16, pady=(0, 16))
 
+        self._build_activity_panel()
+
         recent_panel = ctk.CTkFrame(self, fg_color=C["surface"], corner_radius=10)
-        recent_panel.grid(row=2, column=0, sticky="nsew", padx=12, pady=(0, 12))
+        recent_panel.grid(row=3, column=0, sticky="nsew", padx=12, pady=(0, 12))
         recent_panel.grid_rowconfigure(2, weight=1)
         recent_panel.grid_columnconfigure(0, weight=1)
 
@@ -321,6 +628,44 @@ class StatsTab(ctk.CTkFrame):
             command=self.refresh,
         ).grid(row=0, column=1, sticky="e")
 
+    def _build_activity_panel(self) -> None:
+        panel = ctk.CTkFrame(self, fg_color=C["surface"], corner_radius=10)
+        panel.grid(row=2, column=0, sticky="ew", padx=12, pady=(0, 12))
+        panel.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(
+            panel,
+            text="Активность",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=C["text"],
+        ).grid(row=0, column=0, sticky="w", padx=16, pady=(12, 6))
+
+        self._period = ctk.CTkSegmentedButton(
+            panel,
+            values=list(self._PERIODS),
+            font=ctk.CTkFont(size=12),
+            command=lambda _value: self._plot_activity(),
+        )
+        self._period.set(next(iter(self._PERIODS)))
+        self._period.grid(row=0, column=1, sticky="e", padx=16, pady=(12, 6))
+
+        self._chart = ActivityChart(panel)
+        self._chart.grid(
+            row=1, column=0, columnspan=2, sticky="ew", padx=12, pady=(0, 12)
+        )
+
+    def _plot_activity(self) -> None:
+        bucket, count, label_fmt = self._PERIODS[self._period.get()]
+        end = date.today()
+        if bucket == "day":
+            start = end - timedelta(days=count - 1)
+        elif bucket == "week":
+            start = end - timedelta(weeks=count - 1)
+        else:
+            month = end.year * 12 + end.month - count
+            start = date(month // 12, month % 12 + 1, 1)
+        self._chart.plot(self.db.activity_series(start, end, bucket), label_fmt)
+
     def _make_stat_card(
         self, parent, col: int, title: str, value: str, color: str
     ) -> None:
@@ -356,4 +701,267 @@ class StatsTab(ctk.CTkFrame):
                 self._stats_row, i, title, str(stats[key]), C[color_key]
             )
 
+        self._plot_activity()
         self._recent_tree.populate(self.db.recent_activity(10))
+
+
+class DiagnosticsTab(ctk.CTkFrame):
+    """Hidden tab with latency percentiles of Database calls.
+
+    Shows, from the app's Instrumentation: p50/p95/p99 per operation, the
+    slowest recent calls and, for the selected one, its SQL with EXPLAIN
+    QUERY PLAN; plus the canvas item counts of every card grid.
+    """
+
+    _OP_COLUMNS = ("op", "calls", "errors", "rows", "p50", "p95", "p99", "max")
+    _OP_HEADERS = {
+        "op": "Операция",
+        "calls": "Вызовов",
+        "errors": "Ошибок",
+        "rows": "Строк",
+        "p50": "p50, мс",
+        "p95": "p95, мс",
+        "p99": "p99, мс",
+        "max": "max, мс",
+    }
+    _SLOW_COLUMNS = ("time", "op", "ms", "rows")
+    _SLOW_HEADERS = {"time": "Время", "op": "Операция", "ms": "мс", "rows": "Строк"}
+
+    def __init__(
+        self,
+        master,
+        db: Database,
+        instrumentation: Instrumentation,
+        card_grids: Callable[[], dict[str, EntityCardGrid]],
+        **kwargs,
+    ):
+        super().__init__(master, fg_color=C["bg"], **kwargs)
+        self.db = db
+        self._instrumentation = instrumentation
+        self._card_grids = card_grids
+        self._slow_calls: dict[str, CallRecord] = {}  # tree item id → CallRecord
+        self.grid_rowconfigure(3, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self._build()
+        self.refresh()
+
+    def _build(self) -> None:
+        self._build_header()
+
+        self._canvas_lbl = ctk.CTkLabel(
+            self,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=C["subtext"],
+            anchor="w",
+        )
+        self._canvas_lbl.grid(row=1, column=0, sticky="ew", padx=16, pady=(0, 8))
+
+        self._ops_tree = self._make_tree(
+            self, "DiagOps", self._OP_COLUMNS, self._OP_HEADERS, height=8
+        )
+        self._ops_tree.master.grid(row=2, column=0, sticky="ew", padx=12, pady=(0, 12))
+
+        slow_panel = ctk.CTkFrame(self, fg_color=C["surface"], corner_radius=10)
+        slow_panel.grid(row=3, column=0, sticky="nsew", padx=12, pady=(0, 12))
+        slow_panel.grid_rowconfigure(1, weight=1)
+        slow_panel.grid_columnconfigure(0, weight=1)
+        slow_panel.grid_columnconfigure(1, weight=2)
+
+        ctk.CTkLabel(
+            slow_panel,
+            text="Самые медленные вызовы",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=C["text"],
+        ).grid(row=0, column=0, sticky="w", padx=16, pady=(12, 6))
+
+        self._slow_tree = self._make_tree(
+            slow_panel, "DiagSlow", self._SLOW_COLUMNS, self._SLOW_HEADERS, height=10
+        )
+        self._slow_tree.master.grid(
+            row=1, column=0, sticky="nsew", padx=(12, 6), pady=(0, 12)
+        )
+        self._slow_tree.bind("<<TreeviewSelect>>", self._on_select_call)
+
+        self._sql_box = ctk.CTkTextbox(
+            slow_panel,
+            font=ctk.CTkFont(family="Courier", size=11),
+            fg_color=C["bg"],
+            text_color=C["text"],
+            wrap="word",
+        )
+        self._sql_box.grid(row=1, column=1, sticky="nsew", padx=(6, 12), pady=(0, 12))
+
+    def _build_header(self) -> None:
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.grid(row=0, column=0, sticky="ew", padx=16, pady=(16, 8))
+        header.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(
+            header,
+            text="Диагностика",
+            font=ctk.CTkFont(size=20, weight="bold"),
+            text_color=C["text"],
+        ).grid(row=0, column=0, sticky="w")
+
+        btn_frame = ctk.CTkFrame(header, fg_color="transparent")
+        btn_frame.grid(row=0, column=1, sticky="e")
+
+        self._record_btn = ctk.CTkButton(
+            btn_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            fg_color=C["surface"],
+            hover_color=C["border"],
+            text_color=C["text"],
+            corner_radius=8,
+            height=34,
+            command=self._on_toggle_recording,
+        )
+        self._record_btn.pack(side="left", padx=(0, 6))
+
+        for text, command in (
+            ("↻  Обновить", self.refresh),
+            ("Сбросить", self._on_reset),
+        ):
+            ctk.CTkButton(
+                btn_frame,
+                text=text,
+                font=ctk.CTkFont(size=12),
+                fg_color=C["surface"],
+                hover_color=C["border"],
+                text_color=C["text"],
+                corner_radius=8,
+                height=34,
+                command=command,
+            ).pack(side="left", padx=(0, 6))
+
+    @staticmethod
+    def _make_tree(
+        parent, style_name: str, columns, headers, height: int
+    ) -> ttk.Treeview:
+        """A dark Treeview with a scrollbar; the returned tree's master is its frame."""
+        apply_treeview_style(style_name, row_height=24, font_size=10)
+        frame = ctk.CTkFrame(parent, fg_color=C["surface"], corner_radius=0)
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+        tree = ttk.Treeview(
+            frame,
+            columns=columns,
+            show="headings",
+            style=f"{style_name}.Treeview",
+            selectmode="browse",
+            height=height,
+        )
+        for i, col in enumerate(columns):
+            tree.heading(col, text=headers[col])
+            tree.column(
+                col,
+                width=200 if i == 0 else 90,
+                minwidth=60,
+                anchor="w" if i == 0 else "e",
+            )
+        vsb = ttk.Scrollbar(
+            frame,
+            orient="vertical",
+            command=tree.yview,
+            style=f"{style_name}.Vertical.TScrollbar",
+        )
+        tree.configure(yscrollcommand=vsb.set)
+        tree.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+        return tree
+
+    def refresh(self) -> None:
+        recording = self._instrumentation.attached
+        self._record_btn.configure(
+            text="⏸  Остановить запись" if recording else "⏺  Начать запись"
+        )
+
+        self._ops_tree.delete(*self._ops_tree.get_children())
+        for op in self._instrumentation.summary():
+            self._ops_tree.insert(
+                "",
+                "end",
+                values=(
+                    op.name,
+                    op.calls,
+                    op.errors,
+                    op.rows,
+                    f"{op.p50_ms:.2f}",
+                    f"{op.p95_ms:.2f}",
+                    f"{op.p99_ms:.2f}",
+                    f"{op.max_ms:.2f}",
+                ),
+            )
+
+        self._slow_tree.delete(*self._slow_tree.get_children())
+        self._slow_calls.clear()
+        for call in self._instrumentation.slowest():
+            iid = self._slow_tree.insert(
+                "",
+                "end",
+                values=(
+                    datetime.fromtimestamp(call.started).strftime("%H:%M:%S"),
+                    call.name + (f" ({call.error})" if call.error else ""),
+                    f"{call.duration_us / 1000:.2f}",
+                    "" if call.rows is None else call.rows,
+                ),
+            )
+            self._slow_calls[iid] = call
+        self._show_call(None)
+        self._refresh_canvas_counts()
+
+    def _refresh_canvas_counts(self) -> None:
+        grids = self._card_grids()
+        if not grids:
+            self._canvas_lbl.configure(text="Холсты: вкладка «Учёт» ещё не открыта")
+            return
+        parts = []
+        for entity_type, grid in grids.items():
+            stats = grid.canvas_stats()
+            parts.append(
+                f"{TYPE_LABELS.get(entity_type, entity_type)}: "
+                f"{stats['cards']} карточек, нарисовано {stats['drawn']}, "
+                f"элементов холста {stats['items']}"
+            )
+        self._canvas_lbl.configure(text="Холсты — " + "  ·  ".join(parts))
+
+    def _on_select_call(self, _event) -> None:
+        selected = self._slow_tree.selection()
+        self._show_call(self._slow_calls.get(selected[0]) if selected else None)
+
+    def _show_call(self, call: CallRecord | None) -> None:
+        """Show the SQL of a recorded call, each statement with its query plan."""
+        box = self._sql_box
+        box.configure(state="normal")
+        box.delete("1.0", "end")
+        if call is None:
+            box.insert("end", "Выберите вызов, чтобы увидеть его SQL и план запроса.")
+        else:
+            for sql in dict.fromkeys(call.statements):
+                box.insert("end", sql + "\n")
+                if (
+                    sql.lstrip()
+                    .upper()
+                    .startswith(("SELECT", "INSERT", "UPDATE", "DELETE"))
+                ):
+                    try:
+                        plan = self.db.explain(sql)
+                    except DatabaseError as e:
+                        plan = [str(e)]
+                    for line in plan:
+                        box.insert("end", "    " + line + "\n")
+                box.insert("end", "\n")
+        box.configure(state="disabled")
+
+    def _on_toggle_recording(self) -> None:
+        if self._instrumentation.attached:
+            self._instrumentation.detach()
+        else:
+            self._instrumentation.attach(self.db)
+        self.refresh()
+
+    def _on_reset(self) -> None:
+        self._instrumentation.reset()
+        self.refresh()
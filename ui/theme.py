@@ -0,0 +1,9 @@
+"""CustomTkinter appearance, applied once when the UI starts."""
+
+import customtkinter as ctk
+
+
+def apply_theme() -> None:
+    """Dark appearance and the dark-blue theme; call before the first CTk widget."""
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("dark-blue")
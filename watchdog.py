@@ -0,0 +1,190 @@
+"""Event-loop stall detection with stack sampling.
+
+A heartbeat callback runs on the Tk loop every heartbeat_ms through
+after(); a worker thread checks that it keeps arriving. When the loop is
+late by more than threshold_ms — a long callback, a slow query, a big
+redraw — the worker samples the loop thread's stack with
+sys._current_frames() every sample_ms until the heartbeat comes back, then
+writes the stall's duration and its most frequent stacks to STALL_LOG:
+
+    2026-03-01 08:00:01  stall 1.234 s, 61 samples
+      58×  ui/components.py:312 _fill_step
+           ui/cardlayout.py:240 draw_more
+           ...
+
+Nothing in the app is special-cased: the clock tick, search-field traces
+and every other callback simply show up by name in the sampled stacks.
+While the loop is healthy the worker only compares two timestamps a few
+times per heartbeat, so the watchdog stays on in production.
+"""
+
+import logging
+import logging.handlers
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable
+
+from config import (
+    STALL_LOG,
+    STALL_LOG_BACKUPS,
+    STALL_LOG_BYTES,
+    WATCHDOG_HEARTBEAT_MS,
+    WATCHDOG_REPORT_SECONDS,
+    WATCHDOG_SAMPLE_MS,
+    WATCHDOG_THRESHOLD_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+_STACK_DEPTH = 12  # innermost frames kept per sample
+_TOP_STACKS = 3  # distinct stacks written per stall
+
+Stack = tuple[str, ...]  # "file:line function", outermost first
+
+
+def _stack(frame) -> Stack:
+    entries = []
+    while frame is not None and len(entries) < _STACK_DEPTH:
+        code = frame.f_code
+        entries.append(f"{code.co_filename}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    return tuple(reversed(entries))
+
+
+class StallWatchdog:
+    """Detects stalls of an event loop and logs where the loop thread was.
+
+    schedule(ms, callback) must run callback on the loop thread after ms
+    milliseconds — Tk's after(). start() must be called on the loop thread.
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[int, Callable[[], None]], Any],
+        heartbeat_ms: int = WATCHDOG_HEARTBEAT_MS,
+        threshold_ms: int = WATCHDOG_THRESHOLD_MS,
+        sample_ms: int = WATCHDOG_SAMPLE_MS,
+        report_seconds: float = WATCHDOG_REPORT_SECONDS,
+        log_path: str = STALL_LOG,
+        log_bytes: int = STALL_LOG_BYTES,
+        log_backups: int = STALL_LOG_BACKUPS,
+    ):
+        self.schedule = schedule
+        self.heartbeat = heartbeat_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = sample_ms / 1000
+        self.report_seconds = report_seconds
+        self.log_path = log_path
+        self.log_bytes = log_bytes
+        self.log_backups = log_backups
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._loop_thread_id: int | None = None
+        # Time of the last heartbeat. Written by the loop thread, read by the
+        # worker; a float assignment needs no lock.
+        self._last_beat = 0.0
+        self._stalls = 0
+        self._samples = 0
+        self._handler: logging.Handler | None = None
+
+    def start(self) -> None:
+        """Start the heartbeat and the worker thread. Safe to call more than once."""
+        if self._thread is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._open_log()
+        self._stop.clear()
+        self._beat()
+        self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker; a stall in progress is logged as it stands."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_log()
+
+    def stats(self) -> tuple[int, int]:
+        """Return (stalls logged, stack samples taken) so far."""
+        with self._lock:
+            return self._stalls, self._samples
+
+    # ── Loop side ────────────────────────────────────────────────────────────
+
+    def _beat(self) -> None:
+        self._last_beat = time.monotonic()
+        if not self._stop.is_set():
+            self.schedule(int(self.heartbeat * 1000), self._beat)
+
+    # ── Worker side ──────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        poll = min(self.threshold / 4, self.heartbeat)
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            due = beat + self.heartbeat
+            if time.monotonic() - due > self.threshold:
+                self._follow_stall(beat, due)
+
+    def _follow_stall(self, beat: float, due: float) -> None:
+        """Sample the loop thread until the heartbeat returns, then log the stall."""
+        stacks: Counter[Stack] = Counter()
+        samples = 0
+        next_report = due + self.report_seconds
+        while self._last_beat == beat and not self._stop.is_set():
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stacks[_stack(frame)] += 1
+                samples += 1
+            del frame
+            now = time.monotonic()
+            if now >= next_report:
+                self._write(now - due, samples, stacks, ongoing=True)
+                next_report = now + self.report_seconds
+            self._stop.wait(self.sample_interval)
+        end = self._last_beat if self._last_beat != beat else time.monotonic()
+        self._write(end - due, samples, stacks, ongoing=False)
+        with self._lock:
+            self._stalls += 1
+            self._samples += samples
+
+    # ── Log ──────────────────────────────────────────────────────────────────
+
+    def _open_log(self) -> None:
+        try:
+            self._handler = logging.handlers.RotatingFileHandler(
+                self.log_path,
+                maxBytes=self.log_bytes,
+                backupCount=self.log_backups,
+                encoding="utf-8",
+            )
+        except OSError as e:
+            logger.warning("Cannot open stall log %s: %s", self.log_path, e)
+
+    def _close_log(self) -> None:
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    def _write(
+        self, seconds: float, samples: int, stacks: Counter, ongoing: bool
+    ) -> None:
+        state = "ongoing stall" if ongoing else "stall"
+        logger.warning("Event loop %s: %.3f s", state, seconds)
+        if self._handler is None:
+            return
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        lines = [f"{stamp}  {state} {seconds:.3f} s, {samples} samples"]
+        for stack, count in stacks.most_common(_TOP_STACKS):
+            prefix = f"  {count:>4}×  "
+            for entry in stack:
+                lines.append(prefix + entry)
+                prefix = " " * len(prefix)
+        self._handler.handle(logging.makeLogRecord({"msg": "\n".join(lines)}))